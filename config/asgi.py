@@ -4,6 +4,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Servi par ASGI (par ex. "uvicorn config.asgi:application"), le tableau de
+bord reçoit les soldes en direct par un flux SSE (points/live.py) : LIVE_SSE
+est activé ici. Passenger reste en WSGI (passenger_wsgi.py) : la page
+interroge alors points:soldes périodiquement.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -12,6 +17,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+os.environ.setdefault("DJANGO_LIVE_SSE", "True")
 
 application = get_asgi_application()
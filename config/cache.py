@@ -0,0 +1,18 @@
+# config/cache.py
+from django.core.cache.backends.locmem import LocMemCache
+
+from config.instrumentation import record_cache
+
+_MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """
+    LocMemCache qui compte les succès/échecs de get() dans les mesures de la
+    requête en cours (en-tête Server-Timing, log de performance).
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
@@ -0,0 +1,293 @@
+# config/db/pool.py
+"""
+Pool de connexions base de données, par processus, pour les backends Django
+qui n'en ont pas (MySQL/PyMySQL, SQLite). Activé via OPTIONS["pool"] :
+
+    DATABASES["default"]["ENGINE"] = "config.db.pooled_mysql"
+    DATABASES["default"]["OPTIONS"]["pool"] = {"max_size": 4, "idle_timeout": 300}
+
+Django « ferme » la connexion en fin de requête (CONN_MAX_AGE=0) : elle est
+en fait rendue au pool, et la requête suivante (quel que soit le thread) la
+réutilise sans refaire la poignée de main TLS/authentification.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Aucune connexion libre dans le délai imparti (pool plein)."""
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de connexions DB-API.
+
+    - max_size : nombre maximum de connexions ouvertes (prêtées + au repos)
+    - min_size : connexions ouvertes dès la création du pool (préchauffage)
+    - idle_timeout : une connexion au repos plus longtemps est fermée
+    - max_lifetime : une connexion plus vieille est fermée à son retour
+    - health_check : vérifie (ping) une connexion au repos avant de la prêter
+    - timeout : attente maximale d'une connexion libre quand le pool est plein
+    """
+
+    def __init__(
+        self,
+        connect,
+        *,
+        ping=None,
+        max_size=4,
+        min_size=0,
+        idle_timeout=300,
+        max_lifetime=3600,
+        health_check=True,
+        timeout=10,
+    ):
+        self._connect = connect
+        self._ping = ping
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.timeout = timeout
+        self._idle = deque()  # (connexion, créée_à, rendue_à)
+        self._created = {}  # id(connexion) -> créée_à
+        self._opening = 0  # connexions en cours d'ouverture (hors verrou)
+        self._cond = threading.Condition()
+        self.stats = {
+            "connects": 0,
+            "connect_time": 0.0,
+            "acquires": 0,
+            "reuses": 0,
+            "acquire_time": 0.0,
+            "discarded": 0,
+            "timeouts": 0,
+        }
+        for _ in range(min(min_size, max_size)):
+            conn = self._open()
+            self._idle.append((conn, self._created[id(conn)], time.monotonic()))
+
+    # ---------- Interne ----------
+    @property
+    def size(self):
+        return len(self._created) + self._opening
+
+    def _open(self):
+        # Connexion ouverte hors du verrou, comptée sous le verrou
+        start = time.perf_counter()
+        conn = self._connect()
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self.stats["connects"] += 1
+            self.stats["connect_time"] += elapsed
+        logger.info("[DB POOL] nouvelle connexion en %.1f ms", elapsed * 1000)
+        return conn
+
+    def _forget(self, conn):
+        """Retire `conn` du pool (sous le verrou) ; à fermer ensuite par _close."""
+        self._created.pop(id(conn), None)
+        self.stats["discarded"] += 1
+        self._cond.notify()  # une place se libère
+
+    @staticmethod
+    def _close(*conns):
+        # Hors du verrou : close() peut attendre le réseau (MySQL)
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn):
+        if not self.health_check or self._ping is None:
+            return True
+        try:
+            self._ping(conn)
+            return True
+        except Exception:
+            return False
+
+    def _prune_idle(self, now):
+        """Retire les connexions restées trop longtemps au repos ; les renvoie."""
+        stale = []
+        while self._idle and now - self._idle[0][2] > self.idle_timeout:
+            conn, _, _ = self._idle.popleft()
+            self._forget(conn)
+            stale.append(conn)
+        return stale
+
+    # ---------- API ----------
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            candidate, stale = None, []
+            try:
+                with self._cond:
+                    while True:
+                        now = time.monotonic()
+                        stale += self._prune_idle(now)
+                        if self._idle:
+                            candidate, _, _ = self._idle.pop()  # LIFO : la plus « chaude »
+                            break
+                        if self.size < self.max_size:
+                            # Réserve une place ; la connexion est ouverte hors du verrou
+                            self._opening += 1
+                            break
+                        remaining = deadline - now
+                        if remaining <= 0 or not self._cond.wait(remaining):
+                            self.stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                f"Pas de connexion libre après {self.timeout}s "
+                                f"(max_size={self.max_size})"
+                            )
+            finally:
+                self._close(*stale)
+            if candidate is None:
+                break
+            # Vérification (ping) hors du verrou : une connexion lente ou morte
+            # ne bloque pas les autres threads
+            if self._is_healthy(candidate):
+                with self._cond:
+                    self._record_acquire(start, reused=True)
+                return candidate
+            with self._cond:
+                self._forget(candidate)
+            self._close(candidate)
+        try:
+            conn = self._open()
+        finally:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+        with self._cond:
+            self._record_acquire(start, reused=False)
+        return conn
+
+    def _record_acquire(self, start, *, reused):
+        self.stats["acquires"] += 1
+        self.stats["reuses"] += int(reused)
+        self.stats["acquire_time"] += time.perf_counter() - start
+
+    def release(self, conn, *, discard=False):
+        with self._cond:
+            created = self._created.get(id(conn))
+            now = time.monotonic()
+            if created is None:
+                # Connexion inconnue (pool recréé entre-temps) : on la ferme
+                keep = False
+            elif discard or now - created > self.max_lifetime:
+                self._forget(conn)
+                keep = False
+            else:
+                self._idle.append((conn, created, now))
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._close(conn)
+
+    def close_all(self):
+        with self._cond:
+            conns = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            for conn in conns:
+                self._forget(conn)
+        self._close(*conns)
+
+    def snapshot(self):
+        """Statistiques + état courant (pour les logs / métriques)."""
+        with self._cond:
+            return {**self.stats, "size": self.size, "idle": len(self._idle)}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, make):
+    """Pool du processus pour cet alias de base (créé par make() au premier appel)."""
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = make()
+        return pool
+
+
+def pool_stats():
+    """{alias: statistiques} pour tous les pools du processus."""
+    with _pools_lock:
+        return {alias: pool.snapshot() for alias, pool in _pools.items()}
+
+
+def reset_pools():
+    """Ferme et oublie tous les pools (tests, fork d'un worker)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    À combiner avec le DatabaseWrapper d'un backend Django. Les options du
+    pool sont lues dans OPTIONS["pool"] (retirées des paramètres de connexion
+    transmis au driver).
+    """
+
+    def _pool_ping(self, conn):
+        """
+        Vérifie une connexion DB-API au repos avant de la prêter ; lève une
+        exception si elle est inutilisable. Par défaut un SELECT 1 ; les
+        backends le remplacent par moins cher (ping() de MySQL).
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self._make_pool)
+
+    def _make_pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool") or {}
+        if options is True:
+            options = {}
+        # Les connexions sont ouvertes par un wrapper propre au pool, et non
+        # par celui (d'un thread) qui l'a créé ; paramètres calculés une fois
+        wrapper = type(self)(self.settings_dict, self.alias)
+        params = wrapper.get_connection_params()
+        return ConnectionPool(
+            partial(super(PooledDatabaseWrapperMixin, wrapper).get_new_connection, params),
+            ping=wrapper._pool_ping,
+            **options,
+        )
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block:
+            # Fermeture au milieu d'une transaction : on ne recycle pas
+            self.pool.release(self.connection, discard=True)
+            return
+        try:
+            if not self.get_autocommit():
+                self.connection.rollback()
+        except Exception:
+            self.pool.release(self.connection, discard=True)
+        else:
+            self.pool.release(self.connection)
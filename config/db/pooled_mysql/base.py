@@ -0,0 +1,10 @@
+# config/db/pooled_mysql/base.py
+"""Backend MySQL (mysqlclient ou PyMySQL installé comme MySQLdb) avec pool."""
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def _pool_ping(self, conn):
+        conn.ping(False)  # pas de reconnexion silencieuse : on jette si KO
@@ -0,0 +1,10 @@
+# config/db/pooled_sqlite/base.py
+"""Backend SQLite avec pool : pour essayer le pool en local, sans MySQL."""
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from config.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    def _pool_ping(self, conn):
+        conn.execute("SELECT 1")
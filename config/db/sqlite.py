@@ -0,0 +1,47 @@
+# config/db/sqlite.py
+"""
+Profils SQLite pour `DATABASES[...]["OPTIONS"]`.
+
+Le profil "tuned" convient à une petite instance auto-hébergée (quelques
+familles en parallèle) :
+  - journal WAL : les lectures (tableau de bord) ne bloquent plus les
+    écritures (ajout de points) et inversement ;
+  - synchronous=NORMAL : un fsync par checkpoint au lieu d'un par transaction
+    (sans risque de corruption en WAL, seules les dernières transactions
+    peuvent être perdues en cas de coupure de courant) ;
+  - cache de pages, tables temporaires en mémoire, lecture par mmap ;
+  - busy timeout : on attend le verrou au lieu de lever "database is locked" ;
+  - transactions IMMEDIATE : `atomic()` prend le verrou d'écriture dès le
+    BEGIN, ce qui évite l'échec d'une transaction lecture → écriture quand
+    une autre écrit déjà (le busy timeout ne s'applique pas à ce cas).
+"""
+
+PROFILES = ("default", "tuned")
+
+
+def sqlite_options(
+    profile="tuned",
+    *,
+    busy_timeout=20,
+    cache_size_kib=20000,
+    mmap_size=64 * 1024 * 1024,
+    synchronous="NORMAL",
+):
+    """Options du backend sqlite3 de Django pour le profil demandé."""
+    if profile not in PROFILES:
+        raise ValueError(f"Profil SQLite inconnu : {profile!r} (attendu : {PROFILES})")
+    if profile == "default":
+        return {}
+    pragmas = (
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA cache_size=-{cache_size_kib}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA mmap_size={mmap_size}",
+        "PRAGMA foreign_keys=ON",
+    )
+    return {
+        "timeout": busy_timeout,
+        "transaction_mode": "IMMEDIATE",
+        "init_command": ";".join(pragmas),
+    }
@@ -0,0 +1,33 @@
+# config/hashers.py
+"""
+Hacheurs de mots de passe aux coûts réglables par l'environnement.
+
+Mêmes algorithmes (et mêmes préfixes "argon2$", "pbkdf2_sha256$") que ceux
+de Django, mais coûts lus dans les réglages ARGON2_* / PBKDF2_ITERATIONS,
+calibrés pour la machine par "manage.py calibrate_hashers". must_update()
+compare les coûts d'un hash enregistré aux réglages : à la connexion
+suivante, check_password() ré-hache le mot de passe aux nouveaux coûts
+(à la hausse comme à la baisse), sans rien demander à l'utilisateur.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
@@ -0,0 +1,142 @@
+# config/instrumentation.py
+"""
+Mesures par requête : temps total, nombre et durée des requêtes SQL, temps de
+rendu des gabarits, succès/échecs du cache.
+
+Les compteurs vivent dans un ContextVar (un objet RequestStats par requête,
+sûr en WSGI multi-thread comme en ASGI). Hors requête instrumentée, les
+crochets ne font qu'une lecture du ContextVar : le coût reste négligeable.
+Alimenté par config.middleware.PerformanceMiddleware.
+"""
+import time
+from contextvars import ContextVar
+
+_current = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = (
+        "start",
+        "db_count",
+        "db_time",
+        "template_time",
+        "template_depth",
+        "cache_hits",
+        "cache_misses",
+        "slow_threshold",
+        "slow_queries",
+    )
+
+    def __init__(self, slow_threshold=None):
+        self.start = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Requêtes SQL plus lentes que slow_threshold (secondes) : [(sql, durée)]
+        self.slow_threshold = slow_threshold
+        self.slow_queries = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_dict(self):
+        """Valeurs arrondies (ms) pour les logs structurés."""
+        return {
+            "dur_ms": round(self.elapsed * 1000, 1),
+            "db_count": self.db_count,
+            "db_ms": round(self.db_time * 1000, 1),
+            "tpl_ms": round(self.template_time * 1000, 1),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+    def server_timing(self):
+        """Valeur de l'en-tête Server-Timing (visible dans l'onglet Réseau)."""
+        return ", ".join(
+            (
+                f"app;dur={self.elapsed * 1000:.1f}",
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} requetes"',
+                f"tpl;dur={self.template_time * 1000:.1f}",
+                f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+            )
+        )
+
+
+def start_request(slow_threshold=None):
+    """Démarre la collecte ; renvoie (stats, jeton pour stop_request)."""
+    stats = RequestStats(slow_threshold)
+    return stats, _current.set(stats)
+
+
+def stop_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    """RequestStats de la requête en cours, ou None hors requête instrumentée."""
+    return _current.get()
+
+
+# ---------- Base de données ----------
+def db_execute_wrapper(execute, sql, params, many, context):
+    """À installer via connection.execute_wrapper() (voir le middleware)."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.db_count += 1
+        stats.db_time += elapsed
+        if stats.slow_threshold is not None and elapsed >= stats.slow_threshold:
+            stats.slow_queries.append((sql, elapsed))
+
+
+# ---------- Cache ----------
+def record_cache(hit):
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+# ---------- Gabarits ----------
+_installed = False
+
+
+def install_template_timer():
+    """
+    Chronomètre le rendu des gabarits Django (render(), TemplateResponse,
+    render_to_string). Seul le rendu de plus haut niveau est compté : les
+    {% include %} passent par le moteur, pas par cette enveloppe, et un
+    render_to_string imbriqué n'est pas compté deux fois. Idempotent.
+    """
+    global _installed
+    if _installed:
+        return
+    from django.template.backends.django import Template
+
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats.template_depth:
+            return original(self, context, request)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats.template_depth -= 1
+
+    Template.render = render
+    _installed = True
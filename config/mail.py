@@ -0,0 +1,280 @@
+# config/mail.py
+"""
+Boîte d'envoi : aucune requête n'attend le serveur SMTP.
+
+EMAIL_BACKEND = "config.mail.OutboxBackend" écrit chaque message dans un
+répertoire de spool (OUTBOX_DIR) : un fichier JSON par message, écrit dans
+tmp/ puis déplacé dans new/ (rename atomique, jamais de fichier à moitié
+écrit). AdminEmailHandler, BrokenLinkEmailsMiddleware et tout send_mail()
+passent par là sans modification. Un spool plutôt qu'une table : les
+erreurs à signaler viennent souvent de la base elle-même.
+
+La commande send_outbox (cron ou boucle) envoie ensuite les messages par
+lots sur UNE connexion du vrai backend (OUTBOX_BACKEND, SMTP en
+production). Les mails d'erreur (destinés aux seuls ADMINS/MANAGERS)
+identiques — même sujet aux nombres près, mêmes destinataires — sont
+regroupés dans un lot, puis limités à un envoi par OUTBOX_DEDUP_WINDOW
+secondes ; l'envoi suivant indique combien ont été retenus.
+"""
+import base64
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from hashlib import sha1
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+_NUMBERS = re.compile(r"\d+")
+
+
+# ---------- Sérialisation ----------
+def message_to_dict(message):
+    alternatives = getattr(message, "alternatives", [])
+    return {
+        "subject": str(message.subject),
+        "body": str(message.body),
+        "from_email": message.from_email,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        "headers": dict(message.extra_headers),
+        "alternatives": [[str(content), mimetype] for content, mimetype in alternatives],
+        "attachments": _attachments_to_list(message),
+    }
+
+
+def _attachments_to_list(message):
+    """
+    Pièces jointes (nom, contenu, type) ; un contenu binaire est encodé en
+    base64 (4e élément : True). Une pièce jointe déjà MIME (attach(MIMEBase))
+    n'est pas sérialisable : signalée et non transmise.
+    """
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            logger.warning(
+                "[OUTBOX] pièce jointe MIME non transmise (%s) : %s",
+                attachment.get_content_type(),
+                message.subject,
+            )
+            continue
+        filename, content, mimetype = attachment
+        if isinstance(content, bytes):
+            attachments.append([filename, base64.b64encode(content).decode("ascii"), mimetype, True])
+        else:
+            attachments.append([filename, content, mimetype])
+    return attachments
+
+
+def message_from_dict(data):
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[tuple(a) for a in data["alternatives"]],
+    )
+    for filename, content, mimetype, *binary in data["attachments"]:
+        message.attach(filename, base64.b64decode(content) if binary else content, mimetype)
+    return message
+
+
+def _staff_addresses():
+    return {email.lower() for _, email in [*settings.ADMINS, *settings.MANAGERS]}
+
+
+def dedup_key(data):
+    """Clé des mails d'erreur (destinataires = ADMINS/MANAGERS) ; None sinon."""
+    recipients = {r.lower() for r in [*data["to"], *data["cc"], *data["bcc"]]}
+    if not recipients or not recipients <= _staff_addresses():
+        return None
+    shape = _NUMBERS.sub("#", data["subject"])
+    return sha1(f"{shape}|{','.join(sorted(recipients))}".encode()).hexdigest()
+
+
+# ---------- Spool ----------
+class Outbox:
+    """
+    Répertoire de spool façon Maildir : tmp/ (écriture), new/ (en attente),
+    cur/ (réservés par un envoi), failed/ (abandonnés après max_attempts).
+    """
+
+    def __init__(self, directory, max_attempts=5):
+        self.root = Path(directory)
+        self.max_attempts = max_attempts
+        for sub in ("tmp", "new", "cur", "failed"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    def put(self, message):
+        data = {"queued_at": time.time(), "attempts": 0, "message": message_to_dict(message)}
+        # Nom triable par date : les plus anciens partent en premier
+        name = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        tmp = self.root / "tmp" / name
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.root / "new" / name)
+
+    def pending(self):
+        return sum(1 for _ in (self.root / "new").iterdir())
+
+    def claim(self, limit):
+        """Réserve jusqu'à `limit` messages (rename atomique : un seul envoyeur par message)."""
+        claimed = []
+        for path in sorted((self.root / "new").iterdir())[: limit * 2]:
+            target = self.root / "cur" / path.name
+            try:
+                os.replace(path, target)
+            except FileNotFoundError:  # pris par un autre envoyeur
+                continue
+            try:
+                claimed.append((target, json.loads(target.read_text(encoding="utf-8"))))
+            except ValueError:
+                logger.warning("[OUTBOX] message illisible, mis de côté : %s", target.name)
+                os.replace(target, self.root / "failed" / target.name)
+            if len(claimed) >= limit:
+                break
+        return claimed
+
+    def done(self, path):
+        path.unlink(missing_ok=True)
+
+    def retry(self, path, data, error):
+        data["attempts"] += 1
+        data["last_error"] = str(error)[:500]
+        folder = "failed" if data["attempts"] >= self.max_attempts else "new"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(path, self.root / folder / path.name)
+
+    def recover(self, older_than=600):
+        """Remet en file les messages réservés par un envoi interrompu."""
+        limit = time.time() - older_than
+        for path in (self.root / "cur").iterdir():
+            if path.stat().st_mtime < limit:
+                os.replace(path, self.root / "new" / path.name)
+
+    # --- État de la limitation (mails d'erreur), écrit par le seul envoyeur ---
+    def load_state(self):
+        try:
+            return json.loads((self.root / "state.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        tmp = self.root / "tmp" / "state.json"
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.root / "state.json")
+
+
+def get_outbox():
+    return Outbox(settings.OUTBOX_DIR, max_attempts=getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5))
+
+
+# ---------- Backend ----------
+class OutboxBackend(BaseEmailBackend):
+    """Met les messages en file ; send_outbox les envoie."""
+
+    def send_messages(self, email_messages):
+        outbox = get_outbox()
+        sent = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                outbox.put(message)
+            except OSError:
+                if not self.fail_silently:
+                    raise
+                logger.exception("[OUTBOX] mise en file impossible : %s", message.subject)
+                continue
+            sent += 1
+        return sent
+
+
+# ---------- Envoi ----------
+def _note(count, suppressed):
+    lines = []
+    if count > 1:
+        lines.append(f"{count} messages identiques regroupés dans ce lot.")
+    if suppressed:
+        lines.append(f"{suppressed} message(s) identique(s) retenu(s) depuis le dernier envoi.")
+    return "\n\n-- \n" + "\n".join(lines) if lines else ""
+
+
+def deliver(outbox, connection, batch_size=50, window=600, now=None):
+    """
+    Envoie un lot sur `connection` (ouverte une fois pour tout le lot).
+    Renvoie {"sent", "grouped", "suppressed", "failed"}.
+    """
+    now = time.time() if now is None else now
+    stats = {"sent": 0, "grouped": 0, "suppressed": 0, "failed": 0}
+    claimed = outbox.claim(batch_size)
+    if not claimed:
+        return stats
+
+    # Regroupement des mails d'erreur identiques (le plus ancien représente le groupe)
+    groups = {}
+    for path, data in claimed:
+        key = dedup_key(data["message"])
+        groups.setdefault(key or path.name, (key, []))[1].append((path, data))
+
+    try:
+        opened = connection.open()
+    except Exception as exc:
+        logger.warning("[OUTBOX] connexion impossible (%s), nouvel essai plus tard", exc)
+        for path, data in claimed:
+            outbox.retry(path, data, exc)
+        stats["failed"] = len(claimed)
+        return stats
+
+    state = outbox.load_state()
+    try:
+        for key, items in groups.values():
+            path, data = items[0]
+            entry = state.get(key, {"last_sent": 0, "suppressed": 0}) if key else None
+
+            if entry and now - entry["last_sent"] < window:
+                entry["suppressed"] += len(items)
+                state[key] = entry
+                stats["suppressed"] += len(items)
+                for p, _ in items:
+                    outbox.done(p)
+                continue
+
+            message = message_from_dict(data["message"])
+            if entry:
+                message.body += _note(len(items), entry["suppressed"])
+            try:
+                connection.send_messages([message])
+            except Exception as exc:  # SMTP, réseau... : nouvel essai au prochain passage
+                logger.warning("[OUTBOX] échec d'envoi (%s) : %s", exc, data["message"]["subject"])
+                stats["failed"] += len(items)
+                for p, d in items:
+                    outbox.retry(p, d, exc)
+                continue
+
+            stats["sent"] += 1
+            stats["grouped"] += len(items) - 1
+            for p, _ in items:
+                outbox.done(p)
+            if entry:
+                state[key] = {"last_sent": now, "suppressed": 0}
+    finally:
+        if opened:
+            connection.close()
+        # Les entrées expirées ne servent plus à rien
+        outbox.save_state(
+            {k: v for k, v in state.items() if now - v["last_sent"] < window or v["suppressed"]}
+        )
+    return stats
@@ -0,0 +1,272 @@
+# config/metrics.py
+"""
+Métriques applicatives au format texte Prometheus, sans APM externe.
+
+Chaque worker (Passenger en lance plusieurs) accumule ses compteurs en
+mémoire, puis les ajoute toutes les METRICS_FLUSH_INTERVAL secondes dans un
+petit fichier SQLite partagé (METRICS_STORE) : l'endpoint /metrics/ lit ce
+fichier et présente donc le total de tous les workers. Sans METRICS_STORE,
+les métriques restent propres au processus.
+
+Métriques, par nom de route résolu (label "view", ex. "points:dashboard") :
+  - vlp_http_request_duration_seconds : histogramme des durées
+  - vlp_http_requests_total : nombre de réponses par code HTTP
+  - vlp_http_request_db_queries : histogramme du nombre de requêtes SQL
+Plus des compteurs applicatifs (MetricsRegistry.inc), ex.
+vlp_login_throttle_total (famille/throttle.py).
+Les buckets des histogrammes sont cumulatifs (le="..."), comme l'attend
+Prometheus : le p95 se lit avec histogram_quantile(0.95, ...).
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "vlp_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+FAMILIES = {
+    "http_request_duration_seconds": (
+        "histogram",
+        "Durée des requêtes HTTP (secondes) par vue",
+    ),
+    "http_requests_total": ("counter", "Réponses HTTP par vue et code de statut"),
+    "http_request_db_queries": (
+        "histogram",
+        "Nombre de requêtes SQL par requête HTTP, par vue",
+    ),
+    "login_throttle_total": (
+        "counter",
+        "Connexions limitées par portée (ip, email) : délais imposés et tentatives refusées",
+    ),
+}
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------- Stockage ----------
+class MemoryStore:
+    """Totaux du seul processus courant."""
+
+    def __init__(self):
+        self._totals = {}
+
+    def add(self, deltas):
+        for key, value in deltas.items():
+            self._totals[key] = self._totals.get(key, 0) + value
+
+    def read(self):
+        return dict(self._totals)
+
+    def clear(self):
+        self._totals.clear()
+
+
+class SQLiteStore:
+    """
+    Totaux partagés entre workers : une ligne par échantillon, incrémentée
+    par UPSERT (SQLite gère le verrouillage entre processus).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                " name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,"
+                " PRIMARY KEY (name, labels))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=2)
+
+    def add(self, deltas):
+        rows = [(name, labels, value) for (name, labels), value in deltas.items()]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO samples (name, labels, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    def read(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT name, labels, value FROM samples").fetchall()
+        finally:
+            conn.close()
+        return {(name, labels): value for name, labels, value in rows}
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM samples")
+        finally:
+            conn.close()
+
+
+# ---------- Registre ----------
+class MetricsRegistry:
+    """
+    Accumule des deltas en mémoire (sous verrou, coût O(nb de buckets)) et
+    les pousse dans le stockage au plus toutes les `flush_interval` secondes.
+    Clé d'un échantillon : (nom, labels JSON triés).
+    """
+
+    def __init__(self, store, flush_interval=10):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _inc(self, name, labels, value=1):
+        key = (name, json.dumps(labels, sort_keys=True))
+        self._pending[key] = self._pending.get(key, 0) + value
+
+    def _observe(self, name, buckets, labels, value):
+        for le in buckets:
+            # Les buckets non atteints sont créés à 0 : Prometheus attend la série complète
+            self._inc(f"{name}_bucket", {**labels, "le": _fmt(le)}, int(value <= le))
+        self._inc(f"{name}_bucket", {**labels, "le": "+Inf"})
+        self._inc(f"{name}_sum", labels, value)
+        self._inc(f"{name}_count", labels)
+
+    def observe_request(self, view, status, duration, db_queries):
+        labels = {"view": view or "<non résolue>"}
+        with self._lock:
+            self._observe("http_request_duration_seconds", LATENCY_BUCKETS, labels, duration)
+            self._observe("http_request_db_queries", QUERY_BUCKETS, labels, db_queries)
+            self._inc("http_requests_total", {**labels, "status": str(status)})
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def inc(self, name, labels, value=1):
+        """Incrémente un compteur (déclaré dans FAMILIES)."""
+        with self._lock:
+            self._inc(name, labels, value)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except sqlite3.Error:
+            logger.warning("[METRICS] écriture impossible dans %s", self.store, exc_info=True)
+            with self._lock:  # on réessaiera au prochain flush
+                for key, value in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + value
+
+    def samples(self):
+        self.flush()
+        return self.store.read()
+
+    def render(self):
+        """Exposition texte Prometheus (version 0.0.4)."""
+        by_family = {}
+        for (name, labels), value in self.samples().items():
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[: -len(suffix)] in FAMILIES:
+                    family = name[: -len(suffix)]
+            by_family.setdefault(family, []).append((name, json.loads(labels), value))
+
+        lines = []
+        for family, (kind, help_text) in FAMILIES.items():
+            rows = by_family.get(family)
+            if not rows:
+                continue
+            lines.append(f"# HELP {PREFIX}{family} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{family} {kind}")
+            for name, labels, value in sorted(rows, key=_sort_key):
+                ordered = sorted(labels.items(), key=lambda kv: kv[0] == "le")
+                label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in ordered)
+                lines.append(f"{PREFIX}{name}{{{label_str}}} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _fmt_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sort_key(row):
+    name, labels, _ = row
+    le = labels.get("le")
+    rest = tuple((k, v) for k, v in labels.items() if k != "le")
+    order = {"_bucket": 0, "_sum": 1, "_count": 2}
+    suffix = next((order[s] for s in order if name.endswith(s)), 0)
+    return (rest, suffix, float(le.replace("+Inf", "inf")) if le else 0.0)
+
+
+# ---------- Registre du processus ----------
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            path = getattr(settings, "METRICS_STORE", "")
+            store = SQLiteStore(path) if path else MemoryStore()
+            _registry = MetricsRegistry(
+                store, flush_interval=getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+            )
+        return _registry
+
+
+def reset_registry():
+    """Oublie le registre du processus (tests, changement de réglages)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+# ---------- Vue ----------
+def metrics_view(request):
+    """
+    /metrics/ : réservé au staff connecté, ou à un collecteur présentant
+    "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    authorized = request.user.is_staff or (
+        token and constant_time_compare(auth, f"Bearer {token}")
+    )
+    if not authorized:
+        raise PermissionDenied
+    return HttpResponse(
+        get_registry().render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
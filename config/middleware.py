@@ -1,6 +1,18 @@
 # config/middleware.py
+import json
+import logging
+import random
+import re
+from contextlib import ExitStack
+
 from django.conf import settings
+from django.db import connections
 from django.http import HttpResponsePermanentRedirect
+from django.middleware.gzip import GZipMiddleware
+
+from config import instrumentation, metrics, slow_queries
+
+perf_logger = logging.getLogger("config.perf")
 
 
 class CanonicalHostMiddleware:
@@ -20,3 +32,160 @@ class CanonicalHostMiddleware:
             return HttpResponsePermanentRedirect(f"https://{host}{request.get_full_path()}")
 
         return self.get_response(request)
+
+
+# --- Compression ------------------------------------------------------------
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limité aux types textuels (COMPRESS_CONTENT_TYPES) et aux
+    chemins non exclus (COMPRESS_EXCLUDE_URLS). Les images/polices et les
+    fichiers déjà précompressés servis par WhiteNoise ne sont pas recompressés.
+    Le jeton CSRF étant masqué à chaque requête et GZipMiddleware ajoutant des
+    octets aléatoires, la compression ne réouvre pas d'attaque de type BREACH.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in getattr(settings, "COMPRESS_CONTENT_TYPES", ()):
+            return response
+        excluded = getattr(settings, "COMPRESS_EXCLUDE_URLS", [])
+        if any(p.search(request.path_info) for p in excluded):
+            return response
+        return super().process_response(request, response)
+
+
+# --- Minification HTML ------------------------------------------------------
+# Contenus laissés intacts : espaces significatifs (<pre>, <textarea>) ou code.
+_HTML_PROTECTED = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I
+)
+# Balise entière : un ">" entre guillemets (valeur d'attribut) ne la ferme pas
+_HTML_TAG = re.compile(r"""(<(?:[^>"']|"[^"]*"|'[^']*')*>)""")
+_HTML_SPACES = re.compile(r"\s+")
+
+
+def _collapse(match):
+    return "\n" if "\n" in match.group(0) else " "
+
+
+def minify_html(html: str) -> str:
+    """
+    Réduit les espaces du HTML rendu sans en changer le sens :
+      - seuls les nœuds texte entre balises sont touchés (une suite d'espaces
+        devient un seul espace ou un seul retour à la ligne) ;
+      - l'intérieur des balises (attributs, valeurs des champs, jeton CSRF)
+        et le contenu de <pre>, <textarea>, <script>, <style> sont conservés.
+    """
+    parts = _HTML_PROTECTED.split(html)
+    out = []
+    # split() avec 2 groupes : [texte, bloc protégé, nom de balise, texte, ...]
+    for i in range(0, len(parts), 3):
+        for j, chunk in enumerate(_HTML_TAG.split(parts[i])):
+            out.append(chunk if j % 2 else _HTML_SPACES.sub(_collapse, chunk))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out)
+
+
+class HtmlMinifyMiddleware:
+    """
+    Minifie les réponses HTML des chemins listés dans HTML_MINIFY_URLS
+    (expressions régulières, comme IGNORABLE_404_URLS) si HTML_MINIFY est vrai.
+    À placer juste après GZipMiddleware : on minifie avant de compresser.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Réglages lus à chaque requête (override_settings, bascule à chaud)
+        if not getattr(settings, "HTML_MINIFY", False) or response.streaming:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith("text/html"):
+            return response
+        if not any(p.search(request.path_info) for p in getattr(settings, "HTML_MINIFY_URLS", [])):
+            return response
+
+        charset = response.charset or "utf-8"
+        response.content = minify_html(response.content.decode(charset)).encode(charset)
+        if response.has_header("Content-Length"):
+            response.headers["Content-Length"] = str(len(response.content))
+        return response
+
+
+# --- Mesures de performance --------------------------------------------------
+class PerformanceMiddleware:
+    """
+    Mesure chaque requête (temps total, requêtes SQL, rendu des gabarits,
+    cache) :
+      - en-tête Server-Timing pour le staff (ou tout le monde si DEBUG) ;
+      - une ligne de log JSON sur le logger "config.perf", pour une fraction
+        PERF_LOG_SAMPLE_RATE des requêtes et pour toutes celles qui dépassent
+        PERF_LOG_SLOW_MS ;
+      - les métriques par vue de config.metrics (si METRICS_ENABLED) ;
+      - le journal des requêtes SQL lentes (config.slow_queries, SLOW_QUERY_MS).
+    À placer en tête de MIDDLEWARE pour mesurer aussi les autres middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PERF_INSTRUMENTATION", True)
+        self.metrics = getattr(settings, "METRICS_ENABLED", False)
+        slow_ms = getattr(settings, "SLOW_QUERY_MS", None)
+        self.slow_threshold = slow_ms / 1000 if slow_ms is not None else None
+        if self.enabled:
+            instrumentation.install_template_timer()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats, token = instrumentation.start_request(self.slow_threshold)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(
+                        conn.execute_wrapper(instrumentation.db_execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            instrumentation.stop_request(token)
+
+        if settings.DEBUG or self._is_staff(request):
+            response.headers["Server-Timing"] = stats.server_timing()
+        if self.metrics:
+            metrics.get_registry().observe_request(
+                self.url_name(request), response.status_code, stats.elapsed, stats.db_count
+            )
+        self.log(request, response, stats)
+        slow_queries.log_slow_queries(request, stats)
+        return response
+
+    @staticmethod
+    def _is_staff(request):
+        # Utilisateur déjà chargé par la vue seulement (request.user est
+        # paresseux) : pas de lecture de session ni de SELECT en plus
+        user = getattr(request, "_cached_user", None)
+        return bool(user is not None and user.is_staff)
+
+    @staticmethod
+    def url_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else None
+
+    def log(self, request, response, stats):
+        data = stats.as_dict()
+        slow_ms = getattr(settings, "PERF_LOG_SLOW_MS", 500)
+        sample_rate = getattr(settings, "PERF_LOG_SAMPLE_RATE", 0.0)
+        if data["dur_ms"] < slow_ms and random.random() >= sample_rate:
+            return
+        data.update(
+            method=request.method,
+            path=request.path,
+            url_name=self.url_name(request),
+            status=response.status_code,
+        )
+        perf_logger.info("[PERF] %s", json.dumps(data, ensure_ascii=False))
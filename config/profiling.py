@@ -0,0 +1,105 @@
+# config/profiling.py
+"""
+Profilage cProfile à la demande d'une requête en production, pour le staff.
+
+1. Le membre du staff récupère un jeton signé (valable PROFILING_TOKEN_MAX_AGE
+   secondes, lié à son compte) sur /profiling/jeton/.
+2. Il rejoue la page à examiner avec ?_profile=<jeton> ou l'en-tête
+   "X-Profile: <jeton>" : la réponse porte l'en-tête X-Profile-URL.
+3. Il télécharge le fichier .prof (snakeviz, pstats...) ou sa version texte
+   (?format=txt) à cette adresse. Chaque profil est rangé au nom du compte
+   qui l'a produit : un autre membre du staff ne peut pas le télécharger.
+
+Sans jeton, le middleware ne coûte qu'une lecture de paramètre/en-tête.
+"""
+import cProfile
+import io
+import pstats
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+
+_SALT = "config.profiling"
+QUERY_PARAM = "_profile"
+HEADER = "X-Profile"
+
+
+def make_token(user):
+    return signing.TimestampSigner(salt=_SALT).sign(str(user.pk))
+
+
+def token_is_valid(token, user):
+    max_age = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600)
+    try:
+        value = signing.TimestampSigner(salt=_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == str(user.pk)
+
+
+def profile_dir():
+    path = Path(getattr(settings, "PROFILING_DIR"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def profile_path(directory, user, profile_id):
+    """Fichier du profil `profile_id` de `user` (le compte fait partie du nom)."""
+    return directory / f"{user.pk}-{profile_id}.prof"
+
+
+def _prune(directory, keep):
+    dumps = sorted(directory.glob("*.prof"), key=lambda f: f.stat().st_mtime, reverse=True)
+    for old in dumps[keep:]:
+        old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """À placer après AuthenticationMiddleware (l'utilisateur doit être connu)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.GET.get(QUERY_PARAM) or request.headers.get(HEADER)
+        if not token or not request.user.is_staff or not token_is_valid(token, request.user):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+
+        profile_id = uuid.uuid4()
+        directory = profile_dir()
+        profiler.dump_stats(profile_path(directory, request.user, profile_id))
+        _prune(directory, getattr(settings, "PROFILING_KEEP", 20))
+        response.headers["X-Profile-URL"] = reverse("profiling_download", args=[profile_id])
+        return response
+
+
+def profiling_token_view(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(make_token(request.user), content_type="text/plain; charset=utf-8")
+
+
+def profiling_download_view(request, profile_id):
+    """Fichier .prof brut, ou ?format=txt : 60 fonctions les plus coûteuses."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    path = profile_path(profile_dir(), request.user, profile_id)
+    if not path.exists():  # expiré, ou profil d'un autre compte
+        raise Http404("Profil introuvable (expiré ?)")
+
+    if request.GET.get("format") == "txt":
+        out = io.StringIO()
+        sort = request.GET.get("sort", "cumulative")
+        if sort not in ("cumulative", "tottime", "ncalls"):
+            sort = "cumulative"
+        pstats.Stats(str(path), stream=out).strip_dirs().sort_stats(sort).print_stats(60)
+        return HttpResponse(out.getvalue(), content_type="text/plain; charset=utf-8")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
@@ -1,10 +1,12 @@
 # config/settings/base.py
 import os
 import locale
+import tempfile
 from django.contrib.messages import constants as message_constants
 from pathlib import Path
 from . import BASE_DIR
 from . import env
+from config.db.sqlite import sqlite_options
 #import pymysql
 
 #pymysql.install_as_MySQLdb()
@@ -29,16 +31,24 @@ INSTALLED_APPS = [
     "crispy_bootstrap5",
     "famille.apps.FamilleConfig",
     "points.apps.PointsConfig",
+    "taches.apps.TachesConfig",
 
 ]
 
 MIDDLEWARE = [
+    # Mesures (Server-Timing, log de performance) : englobe tout le reste
+    "config.middleware.PerformanceMiddleware",
+    # Puis : compresse (puis minifie) la réponse finale
+    "config.middleware.CompressionMiddleware",
+    "config.middleware.HtmlMinifyMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Profilage cProfile à la demande (staff + jeton signé), voir config/profiling.py
+    "config.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'famille.middleware.SessionDebugMiddleware',
@@ -64,10 +74,17 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# SQLite : profil "tuned" (WAL, pragmas, busy timeout, transactions IMMEDIATE)
+# par défaut, "default" pour retrouver le comportement standard de Django.
+# Voir config/db/sqlite.py. (En production, MySQL : voir production.py.)
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": env("DJANGO_SQLITE_PATH", default=str(BASE_DIR / "db.sqlite3")),
+        "OPTIONS": sqlite_options(
+            env("DJANGO_SQLITE_PROFILE", default="tuned"),
+            busy_timeout=env.int("DJANGO_SQLITE_BUSY_TIMEOUT", default=20),
+        ),
     }
 }
 
@@ -87,11 +104,28 @@ PASSWORD_HASHERS = [
     # Hashing Competition recommandent cependant l’utilisation immédiate de
     # Argon2 plutôt que les autres algorithmes pris en charge par Django.
     # https://docs.djangoproject.com/fr/5.1/topics/auth/passwords/#using-argon2-with-django
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
-    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    #
+    # Coûts réglés par l'environnement (config/hashers.py) : voir
+    # "manage.py calibrate_hashers", qui les mesure sur la machine pour un
+    # budget de temps de connexion. Un hash aux anciens coûts est refait à la
+    # connexion suivante.
+    "config.hashers.Argon2PasswordHasher",
+    "config.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
 ]
+# Défauts : ceux de Django 5.2 (memory_cost en Kio)
+ARGON2_TIME_COST = env.int("DJANGO_ARGON2_TIME_COST", default=2)
+ARGON2_MEMORY_COST = env.int("DJANGO_ARGON2_MEMORY_COST", default=102400)
+ARGON2_PARALLELISM = env.int("DJANGO_ARGON2_PARALLELISM", default=8)
+PBKDF2_ITERATIONS = env.int("DJANGO_PBKDF2_ITERATIONS", default=1_000_000)
+
+# Threads qui hachent en parallèle les mots de passe d'une même requête
+# (inscription, gestion du compte : voir famille/comptes.py). Pool partagé par
+# le processus : borne le CPU pris par des inscriptions simultanées.
+PASSWORD_HASH_WORKERS = env.int(
+    "DJANGO_PASSWORD_HASH_WORKERS", default=min(4, os.cpu_count() or 1)
+)
 
 
 AUTHENTICATION_BACKENDS = [
@@ -182,6 +216,41 @@ MEDIA_URL = "/media/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# CACHE
+# Cache mémoire local au processus : suffit pour les fragments de gabarit, dont
+# les clés contiennent le tampon de version (jamais de donnée périmée, même
+# avec plusieurs workers Passenger).
+# https://docs.djangoproject.com/fr/5.1/topics/cache/
+CACHES = {
+    "default": {
+        # LocMemCache qui compte les succès/échecs (voir PerformanceMiddleware)
+        "BACKEND": "config.cache.InstrumentedLocMemCache",
+        "LOCATION": "vive-les-points",
+    },
+    # Compteurs de tentatives de connexion (famille/throttle.py) : à partager
+    # entre workers en production (voir production.py)
+    "throttle": env.cache_url("DJANGO_THROTTLE_CACHE_URL", default="locmemcache://login-throttle"),
+}
+
+# LIMITATION DES CONNEXIONS (famille/throttle.py)
+# Par IP et par email, fenêtre glissante de LOGIN_THROTTLE_WINDOW secondes :
+# au-delà de *_FREE échecs, délai de LOGIN_THROTTLE_BASE_DELAY secondes,
+# doublé à chaque nouvel échec (plafond LOGIN_THROTTLE_MAX_DELAY).
+# LOGIN_THROTTLE_IP_HEADER : clé de request.META portant l'IP du client.
+LOGIN_THROTTLE_ENABLED = env.bool("DJANGO_LOGIN_THROTTLE", default=True)
+LOGIN_THROTTLE_CACHE = "throttle"
+LOGIN_THROTTLE_WINDOW = env.int("DJANGO_LOGIN_THROTTLE_WINDOW", default=900)
+LOGIN_THROTTLE_IP_FREE = env.int("DJANGO_LOGIN_THROTTLE_IP_FREE", default=30)
+LOGIN_THROTTLE_EMAIL_FREE = env.int("DJANGO_LOGIN_THROTTLE_EMAIL_FREE", default=5)
+LOGIN_THROTTLE_BASE_DELAY = 2
+LOGIN_THROTTLE_MAX_DELAY = env.int("DJANGO_LOGIN_THROTTLE_MAX_DELAY", default=900)
+LOGIN_THROTTLE_IP_HEADER = env("DJANGO_LOGIN_THROTTLE_IP_HEADER", default="REMOTE_ADDR")
+
+# Identifiant de la version déployée (à changer à chaque déploiement) : il entre
+# dans les ETag des pages, pour qu'un nouveau gabarit ne soit pas masqué par
+# une réponse 304.
+RELEASE = env("DJANGO_RELEASE", default="")
+
 # SECURITE
 # Indique si le drapeau HttpOnly doit être utilisé sur le cookie de session.
 # Si ce paramètre est défini à True, le code JavaScript côté client ne sera
@@ -233,6 +302,42 @@ EMAIL_HOST_USER = "no-reply@dgpython.fr"
 EMAIL_HOST_PASSWORD = "********"
 EMAIL_USE_TLS = True
 
+# Boîte d'envoi (config.mail) : avec EMAIL_BACKEND = "config.mail.OutboxBackend",
+# les messages sont mis en file dans OUTBOX_DIR et envoyés par
+# "manage.py send_outbox" via OUTBOX_BACKEND (activé en production).
+OUTBOX_DIR = env("DJANGO_OUTBOX_DIR", default=str(BASE_DIR / "tmp" / "outbox"))
+OUTBOX_BACKEND = EMAIL_BACKEND
+OUTBOX_BATCH_SIZE = env.int("DJANGO_OUTBOX_BATCH_SIZE", default=50)
+# Mails d'erreur identiques : un envoi au plus par fenêtre (secondes)
+OUTBOX_DEDUP_WINDOW = env.int("DJANGO_OUTBOX_DEDUP_WINDOW", default=600)
+OUTBOX_MAX_ATTEMPTS = 5
+
+# Tâches de fond (taches.queue, "manage.py run_taches") : délai avant le
+# 2e essai d'une tâche en échec, doublé à chaque essai (plafond 1 h)
+TACHES_RETRY_DELAY = env.int("DJANGO_TACHES_RETRY_DELAY", default=30)
+# Bail d'une tâche en cours (secondes) : renouvelé par le travailleur tant
+# qu'il l'exécute ; expiré, la tâche est remise en file (travailleur mort)
+TACHES_BAIL = env.int("DJANGO_TACHES_BAIL", default=300)
+
+# Soldes en direct sur le tableau de bord (points/live.py) : flux SSE quand
+# le site est servi par ASGI (config/asgi.py active LIVE_SSE), sinon la page
+# interroge points:soldes toutes les LIVE_POLL_INTERVAL secondes.
+LIVE_SSE = env.bool("DJANGO_LIVE_SSE", default=False)
+LIVE_POLL_INTERVAL = env.int("DJANGO_LIVE_POLL_INTERVAL", default=20)
+# Côté ASGI : lecture des versions de toutes les familles suivies (une
+# requête par intervalle et par processus), commentaire de maintien de la
+# connexion, et durée d'un flux avant reconnexion du navigateur (secondes)
+LIVE_CHECK_INTERVAL = env.float("DJANGO_LIVE_CHECK_INTERVAL", default=2)
+LIVE_KEEPALIVE = env.int("DJANGO_LIVE_KEEPALIVE", default=25)
+LIVE_MAX_DURATION = env.int("DJANGO_LIVE_MAX_DURATION", default=600)
+
+# Suppression d'une famille (famille.suppression) : lignes supprimées par
+# transaction, et exécution en tâche de fond plutôt que dans la requête
+FAMILLE_SUPPRESSION_LOT = env.int("DJANGO_FAMILLE_SUPPRESSION_LOT", default=1000)
+FAMILLE_SUPPRESSION_EN_TACHE = env.bool("DJANGO_FAMILLE_SUPPRESSION_EN_TACHE", default=False)
+# Export des données d'une famille (famille.export) : lignes lues par requête
+FAMILLE_EXPORT_LOT = env.int("DJANGO_FAMILLE_EXPORT_LOT", default=2000)
+
 MIDDLEWARE += ["django.middleware.common.BrokenLinkEmailsMiddleware"]
 
 # Évite le spam (favicon, robots, etc.)
@@ -245,6 +350,65 @@ IGNORABLE_404_URLS = [
 ]
 
 
+# COMPRESSION ET MINIFICATION DES RÉPONSES
+# Types compressés (gzip) par CompressionMiddleware ; les images et polices
+# sont déjà compressées.
+COMPRESS_CONTENT_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+)
+# Chemins jamais compressés (regex sur request.path_info)
+COMPRESS_EXCLUDE_URLS = []
+
+# Minification des espaces du HTML rendu (désactivable : DJANGO_HTML_MINIFY=False)
+HTML_MINIFY = env.bool("DJANGO_HTML_MINIFY", default=True)
+# Chemins concernés (regex sur request.path_info) : pages de l'application,
+# pas l'admin Django.
+HTML_MINIFY_URLS = [
+    re.compile(r"^/$"),
+    re.compile(r"^/confidentialite/"),
+    re.compile(r"^/famille/"),
+    re.compile(r"^/points/"),
+]
+
+
+# MESURES DE PERFORMANCE (config.middleware.PerformanceMiddleware)
+# En-tête Server-Timing pour le staff et log JSON "[PERF]" sur le logger
+# "config.perf" pour une fraction PERF_LOG_SAMPLE_RATE des requêtes (tirage
+# aléatoire), plus toutes celles qui dépassent PERF_LOG_SLOW_MS millisecondes.
+PERF_INSTRUMENTATION = env.bool("DJANGO_PERF_INSTRUMENTATION", default=True)
+PERF_LOG_SAMPLE_RATE = env.float("DJANGO_PERF_LOG_SAMPLE_RATE", default=0.1)
+PERF_LOG_SLOW_MS = env.int("DJANGO_PERF_LOG_SLOW_MS", default=500)
+
+# MÉTRIQUES (config.metrics, endpoint /metrics/ au format Prometheus)
+# METRICS_STORE : fichier SQLite partagé par les workers ; vide = métriques
+# propres à chaque processus. METRICS_TOKEN : accès "Authorization: Bearer"
+# pour un collecteur (sinon staff connecté uniquement).
+METRICS_ENABLED = env.bool("DJANGO_METRICS_ENABLED", default=True)
+METRICS_STORE = env("DJANGO_METRICS_STORE", default="")
+METRICS_FLUSH_INTERVAL = env.int("DJANGO_METRICS_FLUSH_INTERVAL", default=10)
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN", default="")
+
+# REQUÊTES SQL LENTES (config.slow_queries) : seuil en millisecondes, journal
+# sur le logger "config.slow_sql" ; SLOW_QUERY_LOG = fichier lu par la commande
+# slow_queries_report (vide = console seulement).
+SLOW_QUERY_MS = env.int("DJANGO_SLOW_QUERY_MS", default=100)
+SLOW_QUERY_LOG = env("DJANGO_SLOW_QUERY_LOG", default="")
+
+# PROFILAGE À LA DEMANDE (config.profiling) : dossier des fichiers .prof (les
+# PROFILING_KEEP plus récents sont conservés), validité du jeton en secondes.
+PROFILING_DIR = env(
+    "DJANGO_PROFILING_DIR",
+    default=os.path.join(tempfile.gettempdir(), "vive-les-points-profiles"),
+)
+PROFILING_KEEP = env.int("DJANGO_PROFILING_KEEP", default=20)
+PROFILING_TOKEN_MAX_AGE = env.int("DJANGO_PROFILING_TOKEN_MAX_AGE", default=3600)
+
+
 env.read_env(BASE_DIR / ".env")
 
 # Messages
@@ -306,5 +470,17 @@ LOGGING = {
             "level": DJANGO_LOG_LEVEL,
             "propagate": False,
         },
+        # Lignes "[PERF]" de PerformanceMiddleware
+        "config.perf": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        # Requêtes SQL lentes (JSON)
+        "config.slow_sql": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
\ No newline at end of file
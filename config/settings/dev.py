@@ -15,7 +15,14 @@ SECRET_KEY = env(
 )
 
 INSTALLED_APPS += ["debug_toolbar"]
-MIDDLEWARE = ["debug_toolbar.middleware.DebugToolbarMiddleware"] + MIDDLEWARE
+# La toolbar doit se placer après la compression (elle injecte son HTML dans la
+# réponse non compressée) ; en dev, le HTML reste lisible (pas de minification).
+MIDDLEWARE = list(MIDDLEWARE)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("config.middleware.HtmlMinifyMiddleware") + 1,
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+)
+HTML_MINIFY = env.bool("DJANGO_HTML_MINIFY", default=False)
 INTERNAL_IPS = ["127.0.0.1"]
 
 
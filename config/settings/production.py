@@ -23,6 +23,20 @@ DATABASES["default"]["OPTIONS"] = {
 }
 DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
 
+# Pool de connexions (optionnel) : chaque worker Passenger garde quelques
+# connexions ouvertes, vérifiées (ping) avant réutilisation et fermées après
+# DJANGO_DB_POOL_IDLE_TIMEOUT secondes d'inactivité. Django "ferme" la connexion
+# en fin de requête : elle retourne au pool (CONN_MAX_AGE=0).
+if env.bool("DJANGO_DB_POOL", default=False):
+    DATABASES["default"]["ENGINE"] = "config.db.pooled_mysql"
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "max_size": env.int("DJANGO_DB_POOL_MAX_SIZE", default=4),
+        "idle_timeout": env.int("DJANGO_DB_POOL_IDLE_TIMEOUT", default=300),
+        "max_lifetime": env.int("DJANGO_DB_POOL_MAX_LIFETIME", default=3600),
+        "health_check": env.bool("DJANGO_DB_POOL_HEALTH_CHECK", default=True),
+    }
+
 # --- Sécurité / hôtes -------------------------------------------------------
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY")
 DEBUG = env.bool("DJANGO_DEBUG", False)
@@ -73,6 +87,32 @@ except ValueError:
     sec_idx = 0
 MIDDLEWARE.insert(sec_idx + 1, "config.middleware.CanonicalHostMiddleware")
 
+# --- Fichiers statiques -----------------------------------------------------
+# collectstatic minifie le CSS/JS de l'application, ajoute l'empreinte (hash) aux
+# noms de fichiers et génère les variantes .gz/.br. WhiteNoise sert ensuite les
+# fichiers empreintés avec "Cache-Control: max-age=315360000, public, immutable" :
+# une visite répétée ne retélécharge aucun octet statique.
+MIDDLEWARE.insert(sec_idx + 2, "whitenoise.middleware.WhiteNoiseMiddleware")
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "config.storage.MinifiedManifestStaticFilesStorage"},
+}
+
+
+# --- Gabarits ---------------------------------------------------------------
+# Chargeur de gabarits en cache imposé explicitement : chaque gabarit (y compris
+# ceux de crispy-forms) n'est lu et compilé qu'une fois par processus.
+TEMPLATES = [{**TEMPLATES[0], "APP_DIRS": False, "OPTIONS": {**TEMPLATES[0]["OPTIONS"]}}]
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    ),
+]
+
 
 # --- Emails -----------------------------------------------------------------
 EMAIL_CONFIG = env.email("DJANGO_EMAIL_URL", default="consolemail://")
@@ -82,11 +122,38 @@ DEFAULT_FROM_EMAIL = env("DJANGO_DEFAULT_FROM_EMAIL", default="Vive les points <
 SERVER_EMAIL = env("DJANGO_SERVER_EMAIL", default=DEFAULT_FROM_EMAIL)
 EMAIL_SUBJECT_PREFIX = env("DJANGO_EMAIL_SUBJECT_PREFIX", default="[Vive les points] ")
 
+# Boîte d'envoi : les requêtes (mails d'erreur 500, liens cassés...) ne font
+# qu'écrire un fichier ; le cron "manage.py send_outbox" envoie en SMTP
+# (indispensable, voir README, Déploiement).
+if env.bool("DJANGO_EMAIL_OUTBOX", default=True):
+    OUTBOX_BACKEND = EMAIL_BACKEND
+    EMAIL_BACKEND = "config.mail.OutboxBackend"
+
 ADMIN_URL = env("DJANGO_ADMIN_URL")
 
 # --- Clickjacking -----------------------------------------------------------
 X_FRAME_OPTIONS = "DENY"
 
+# --- Métriques -------------------------------------------------------------
+# Fichier partagé par les workers Passenger (tmp/ de l'application)
+METRICS_STORE = env("DJANGO_METRICS_STORE", default=str(BASE_DIR / "tmp" / "metrics.sqlite3"))
+
+# --- Limitation des connexions ---------------------------------------------
+# Compteurs partagés par les workers Passenger : cache fichiers dans tmp/
+CACHES["throttle"] = env.cache_url(
+    "DJANGO_THROTTLE_CACHE_URL", default=f"filecache://{BASE_DIR / 'tmp' / 'throttle'}"
+)
+
+# --- Profilage à la demande -------------------------------------------------
+PROFILING_DIR = env("DJANGO_PROFILING_DIR", default=str(BASE_DIR / "tmp" / "profiles"))
+
+# --- Requêtes SQL lentes ----------------------------------------------------
+# Journal JSON tournant (5 × 5 Mo), synthèse : manage.py slow_queries_report.
+# DJANGO_SLOW_QUERY_LOG vide : console seulement (voir base.py)
+SLOW_QUERY_LOG = env("DJANGO_SLOW_QUERY_LOG", default=str(BASE_DIR / "logs" / "slow_sql.log"))
+if SLOW_QUERY_LOG:
+    os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+
 # --- LOGGING ----------------------------------------------------------------
 LOGGING = {
     "version": 1,
@@ -107,8 +174,18 @@ LOGGING = {
     "loggers": {
         "django.request": {"handlers": ["mail_admins"], "level": "ERROR", "propagate": True},
         "django.security.DisallowedHost": {"level": "ERROR", "handlers": ["console"], "propagate": True},
+        "config.slow_sql": {"level": "WARNING", "handlers": ["console"], "propagate": False},
     },
 }
+if SLOW_QUERY_LOG:
+    LOGGING["handlers"]["slow_sql"] = {
+        "class": "logging.handlers.RotatingFileHandler",
+        "filename": SLOW_QUERY_LOG,
+        "maxBytes": 5 * 1024 * 1024,
+        "backupCount": 5,
+        "encoding": "utf-8",
+    }
+    LOGGING["loggers"]["config.slow_sql"]["handlers"] = ["slow_sql"]
 
 # --- SENTRY -----------------------------------------------------------------
 def _sentry_before_send(event, hint):
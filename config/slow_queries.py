@@ -0,0 +1,134 @@
+# config/slow_queries.py
+"""
+Journal des requêtes SQL lentes (au-delà de SLOW_QUERY_MS), avec la vue, le
+rôle de l'utilisateur et la famille concernés.
+
+Les requêtes sont repérées par config.instrumentation (execute_wrapper) ; le
+middleware appelle log_slow_queries() après la vue, hors instrumentation :
+l'éventuelle requête pour retrouver la famille n'est ni mesurée ni journalisée.
+Chaque requête lente donne une ligne JSON sur le logger "config.slow_sql"
+(fichier tournant en production, voir LOGGING). Les paramètres SQL ne sont
+jamais écrits (données personnelles) : Django les passe à part, la requête
+journalisée ne contient que des %s.
+
+Synthèse : python manage.py slow_queries_report
+"""
+import json
+import logging
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.utils import timezone
+
+logger = logging.getLogger("config.slow_sql")
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_SQL_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """
+    Forme normalisée d'une requête, pour regrouper les variantes :
+    littéraux et nombres → ?, listes IN de longueur variable → (...).
+    """
+    shape = _SQL_STRING.sub("?", sql)
+    shape = _SQL_NUMBER.sub("?", shape)
+    shape = shape.replace("%s", "?")
+    shape = _SQL_IN_LIST.sub("(...)", shape)
+    return _SQL_SPACES.sub(" ", shape).strip()
+
+
+def request_context(request):
+    """Vue, rôle et famille de la requête (rôle : anonyme, staff, parent, enfant)."""
+    from famille.mixins import get_user_famille
+
+    match = getattr(request, "resolver_match", None)
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        role = "anonyme"
+    elif user.is_staff:
+        role = "staff"
+    elif hasattr(user, "profile"):
+        role = user.profile.role
+    elif hasattr(user, "profil_enfant"):
+        role = "enfant"
+    else:
+        role = "inconnu"
+    famille = get_user_famille(request)
+    return {
+        "url_name": match.view_name if match else None,
+        "path": request.path,
+        "role": role,
+        "famille_id": famille.pk if famille else None,
+    }
+
+
+def log_slow_queries(request, stats):
+    if not stats.slow_queries:
+        return
+    context = request_context(request)
+    at = timezone.now().isoformat(timespec="seconds")
+    for sql, duration in stats.slow_queries:
+        record = {
+            "at": at,
+            "ms": round(duration * 1000, 1),
+            **context,
+            "sql": sql,
+        }
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+# ---------- Lecture / synthèse ----------
+def read_records(path):
+    """Lignes du journal et de ses rotations (slow_sql.log.1, .2...)."""
+    path = Path(path)
+    # Du plus ancien (numéro le plus grand) au plus récent
+    backups = [f for f in path.parent.glob(path.name + ".*") if f.suffix[1:].isdigit()]
+    backups.sort(key=lambda f: int(f.suffix[1:]), reverse=True)
+    for file in [*backups, path]:
+        if not file.exists():
+            continue
+        with file.open(encoding="utf-8") as fh:
+            for line in fh:
+                start = line.find("{")
+                if start == -1:
+                    continue
+                try:
+                    yield json.loads(line[start:])
+                except ValueError:
+                    continue
+
+
+def summarize(records, top=10):
+    """
+    Regroupe par forme de requête ; tri par temps cumulé décroissant.
+    Renvoie une liste de dicts (shape, count, total_ms, max_ms, mean_ms, views,
+    familles).
+    """
+    groups = defaultdict(
+        lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "views": set(), "familles": set()}
+    )
+    for record in records:
+        group = groups[normalize_sql(record.get("sql", ""))]
+        group["count"] += 1
+        group["total_ms"] += record.get("ms", 0)
+        group["max_ms"] = max(group["max_ms"], record.get("ms", 0))
+        group["views"].add(record.get("url_name") or "?")
+        if record.get("famille_id") is not None:
+            group["familles"].add(record["famille_id"])
+
+    rows = [
+        {
+            "shape": shape,
+            **group,
+            "mean_ms": group["total_ms"] / group["count"],
+            "views": sorted(group["views"]),
+            "familles": sorted(group["familles"]),
+        }
+        for shape, group in groups.items()
+    ]
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows[:top]
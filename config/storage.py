@@ -0,0 +1,67 @@
+# config/storage.py
+import re
+from fnmatch import fnmatch
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+_CSS_COMMENT = re.compile(r"/\*(?!!).*?\*/", re.S)
+_CSS_SPACES = re.compile(r"\s+")
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+_JS_LINE_COMMENT = re.compile(r"^\s*//.*$", re.M)
+
+
+def minify_css(source: str) -> str:
+    """Minification prudente : commentaires (hors /*! licence */) et espaces."""
+    source = _CSS_COMMENT.sub("", source)
+    source = _CSS_SPACES.sub(" ", source)
+    source = _CSS_PUNCT.sub(r"\1", source)
+    source = source.replace(": ", ":").replace(";}", "}")
+    return source.strip()
+
+
+def minify_js(source: str) -> str:
+    """
+    Minification prudente du JS de l'application : on retire les commentaires
+    de ligne, l'indentation et les lignes vides, mais on garde les retours à
+    la ligne (pas de risque avec l'insertion automatique des points-virgules).
+    """
+    source = _JS_LINE_COMMENT.sub("", source)
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class MinifiedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Stockage des fichiers statiques pour la production :
+      - minifie le CSS/JS propre à l'application (pas les librairies déjà .min)
+      - ajoute l'empreinte (hash) dans le nom via le manifest Django
+      - génère les variantes précompressées .gz (et .br si `brotli` est installé)
+    WhiteNoise sert ensuite les fichiers empreintés avec un Cache-Control
+    « immutable » d'un an.
+    """
+
+    minify_patterns = ("points/*.css", "points/js/*.js")
+
+    def _should_minify(self, name):
+        if ".min." in name:
+            return False
+        return any(fnmatch(name, pattern) for pattern in self.minify_patterns)
+
+    def _minify(self, name):
+        with self.open(name) as f:
+            source = f.read().decode("utf-8")
+        minifier = minify_css if name.endswith(".css") else minify_js
+        self.delete(name)
+        self.save(name, ContentFile(minifier(source).encode("utf-8")))
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in paths:
+                if self._should_minify(name):
+                    self._minify(name)
+                    # Le manifest calcule l'empreinte sur la copie minifiée
+                    paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.conf import settings
 from django.urls import include, path
 from famille.views import landing_view, confidentialite_view
+from config.metrics import metrics_view
+from config.profiling import profiling_download_view, profiling_token_view
 from django.shortcuts import render
 
 
@@ -16,7 +18,11 @@ urlpatterns = [
     path("confidentialite/", confidentialite_view, name="confidentialite"),
     path("famille/", include("famille.urls")),
     path("points/", include("points.urls")),
+    path("taches/", include("taches.urls")),
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view, name="metrics"),
+    path("profiling/jeton/", profiling_token_view, name="profiling_token"),
+    path("profiling/<uuid:profile_id>/", profiling_download_view, name="profiling_download"),
 ]
 
 if settings.DEBUG:
@@ -1,6 +1,10 @@
 import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from famille.models import Famille, UserProfile, Enfant
 
 # ... ton conftest actuel ...
@@ -8,6 +12,16 @@ from famille.models import Famille, UserProfile, Enfant
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Vide les caches entre les tests (fragments de gabarit, compteurs...)."""
+    for c in caches.all():
+        c.clear()
+    yield
+    for c in caches.all():
+        c.clear()
+
+
 @pytest.fixture
 def famille(db):
     return Famille.objects.create(nom="Dupont")
@@ -92,3 +106,38 @@ def give_perms():
         return user
 
     return _give
+
+
+@pytest.fixture
+def parent_dashboard(client, userprofile_parent, parent_user, give_perms):
+    """Client connecté en tant que parent pouvant voir/modifier les points."""
+    give_perms(
+        parent_user,
+        [
+            "points.view_pointpositif",
+            "points.view_pointnegatif",
+            "points.change_pointpositif",
+            "points.change_pointnegatif",
+        ],
+    )
+    client.force_login(parent_user)
+    return client
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Exécute un appel (requête du client de test) et renvoie (résultat, nombre
+    de requêtes SQL). Le cache est vidé avant chaque mesure (fragments de
+    gabarit) et le journal des requêtes lentes coupé (il peut lire la famille).
+    Usage : resp, n = count_queries(client.get, url)
+    """
+
+    def _count(func, *args, **kwargs):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        return result, len(ctx.captured_queries)
+
+    with override_settings(SLOW_QUERY_MS=None):
+        yield _count
@@ -0,0 +1,143 @@
+# famille/comptes.py
+"""
+Création des comptes (parents, enfants) par lots.
+
+Le hachage Argon2 coûte des centaines de millisecondes de CPU par mot de
+passe : une inscription à 1 parent + 3 enfants les enchaînait. argon2-cffi
+(comme hashlib pour PBKDF2) relâche le GIL pendant le calcul, donc un pool
+de threads hache les mots de passe d'une même requête en parallèle. Le pool
+est partagé par tout le processus et borné (PASSWORD_HASH_WORKERS) : des
+inscriptions simultanées ne multiplient pas les threads.
+
+Les comptes sont ensuite insérés en quelques requêtes (bulk_create des
+User, UserProfile et appartenances aux groupes), quel que soit leur nombre.
+Les pk des groupes "parents" et "enfant" sont résolus une fois par
+processus (group_id).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+User = get_user_model()
+
+# Groupe de chaque rôle de UserProfile
+GROUPES = {"parent": "parents", "enfant": "enfant"}
+
+_executor = None
+_executor_lock = threading.Lock()
+_group_ids = {}
+
+
+def group_id(name):
+    """pk du groupe `name` (créé au besoin), mis en cache pour le processus."""
+    try:
+        return _group_ids[name]
+    except KeyError:
+        pass
+    group, _ = Group.objects.get_or_create(name=name)
+    # Mis en cache après COMMIT seulement : un groupe créé dans une transaction
+    # annulée ne doit pas survivre dans le cache
+    transaction.on_commit(partial(_group_ids.__setitem__, name, group.pk))
+    return group.pk
+
+
+@receiver(post_delete, sender=Group)
+def oublier_groupes(**kwargs):
+    _group_ids.clear()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+        return _executor
+
+
+def hash_passwords(raw_passwords):
+    """
+    Hache une liste de mots de passe (make_password, donc le hacheur par
+    défaut de PASSWORD_HASHERS), en parallèle s'il y en a plusieurs.
+    None donne un mot de passe inutilisable, comme make_password.
+    """
+    raw_passwords = list(raw_passwords)
+    if len(raw_passwords) < 2 or settings.PASSWORD_HASH_WORKERS < 2:
+        return [make_password(p) for p in raw_passwords]
+    return list(_get_executor().map(make_password, raw_passwords))
+
+
+def creer_comptes(famille, comptes, hashes=None):
+    """
+    Crée des comptes rattachés à `famille`. `comptes` : dicts avec email,
+    password (en clair), first_name, last_name, role ("parent" ou "enfant").
+    `hashes` : mots de passe déjà hachés (hash_passwords), dans le même ordre.
+    Renvoie les User créés (avec leur pk), dans l'ordre de `comptes`.
+    """
+    if not comptes:
+        return []
+    if hashes is None:
+        hashes = hash_passwords(c["password"] for c in comptes)
+    users = []
+    for compte, password in zip(comptes, hashes):
+        email = User.objects.normalize_email(compte["email"])
+        users.append(
+            User(
+                username=User.normalize_username(email),
+                email=email,
+                password=password,
+                first_name=compte.get("first_name", ""),
+                last_name=compte.get("last_name", ""),
+            )
+        )
+    User.objects.bulk_create(users)
+    if any(u.pk is None for u in users):
+        # MySQL ne renvoie pas les clés des lignes insérées en masse
+        pks = dict(User.objects.filter(username__in=[u.username for u in users]).values_list("username", "pk"))
+        for u in users:
+            u.pk = pks[u.username]
+
+    UserProfile.objects.bulk_create(
+        UserProfile(user=u, famille=famille, role=c["role"]) for u, c in zip(users, comptes)
+    )
+    groupes = {role: group_id(GROUPES[role]) for role in {c["role"] for c in comptes}}
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        Membership(user_id=u.pk, group_id=groupes[c["role"]]) for u, c in zip(users, comptes)
+    )
+    return users
+
+
+def rattacher(famille, users, role):
+    """
+    Garantit profil et groupe de comptes existants, en deux INSERT quel que
+    soit le nombre de comptes : un profil déjà présent est corrigé (famille
+    et rôle), une appartenance au groupe déjà présente est ignorée.
+    """
+    if not users:
+        return
+    # MySQL (ON DUPLICATE KEY UPDATE) n'accepte pas de cible de conflit
+    cible = ["user"] if connection.features.supports_update_conflicts_with_target else None
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=u.pk, famille=famille, role=role) for u in users],
+        update_conflicts=True,
+        update_fields=["famille", "role"],
+        unique_fields=cible,
+    )
+    groupe = group_id(GROUPES[role])
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        [Membership(user_id=u.pk, group_id=groupe) for u in users], ignore_conflicts=True
+    )
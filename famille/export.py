@@ -0,0 +1,141 @@
+# famille/export.py
+"""
+Export des données d'une famille (droit d'accès et portabilité, RGPD) :
+archive ZIP de fichiers CSV (UTF-8, lisibles par un tableur) et d'un
+famille.json récapitulatif.
+
+L'archive est produite au fil de l'eau : zipfile écrit dans un tampon que
+archive() vide à chaque page de lignes (les en-têtes locaux ZIP portent
+alors des "data descriptors", le fichier n'a jamais besoin d'être relu).
+Les tables sont parcourues par pages de FAMILLE_EXPORT_LOT lignes, par clé
+(id > dernier id), et non par un curseur : PyMySQL rapatrierait sinon tout
+le résultat en mémoire. Ni fichier temporaire, ni table entière en
+mémoire : la taille de la famille ne change que la durée du téléchargement.
+"""
+import csv
+import io
+import json
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from points.models import (
+    BaremePointNegatif,
+    BaremePointPositif,
+    BaremeRecompense,
+    PointNegatif,
+    PointPositif,
+)
+
+from .models import Enfant, UserProfile
+
+
+class _Tampon:
+    """Flux d'écriture sans seek() : zipfile y écrit, archive() le vide."""
+
+    def __init__(self):
+        self.morceaux = []
+
+    def write(self, data):
+        self.morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b"".join(self.morceaux)
+        self.morceaux.clear()
+        return data
+
+
+def _pages(qs, champs, lot):
+    """Lignes (id, *champs) de `qs` par pages de `lot`, dans l'ordre des id."""
+    qs = qs.order_by("pk")
+    dernier = None
+    while True:
+        page = qs if dernier is None else qs.filter(pk__gt=dernier)
+        lignes = list(page.values_list("pk", *champs)[:lot])
+        if not lignes:
+            return
+        yield lignes
+        dernier = lignes[-1][0]
+
+
+def fichiers(famille_id):
+    """Fichiers CSV de l'archive : [(nom, en-têtes, queryset, champs)]."""
+    return [
+        (
+            "membres.csv",
+            ("id", "prenom", "nom", "email", "role", "inscrit_le", "derniere_connexion"),
+            UserProfile.objects.filter(famille_id=famille_id),
+            ("user__first_name", "user__last_name", "user__email", "role", "user__date_joined", "user__last_login"),
+        ),
+        (
+            "enfants.csv",
+            ("id", "prenom", "solde_points", "email_du_compte"),
+            Enfant.objects.filter(famille_id=famille_id),
+            ("prenom", "solde_points", "user__email"),
+        ),
+        (
+            "bareme_recompenses.csv",
+            ("id", "points", "valeur_euros", "valeur_temps"),
+            BaremeRecompense.objects.filter(famille_id=famille_id),
+            ("points", "valeur_euros", "valeur_temps"),
+        ),
+        (
+            "bareme_points_positifs.csv",
+            ("id", "motif", "points"),
+            BaremePointPositif.objects.filter(famille_id=famille_id),
+            ("motif", "points"),
+        ),
+        (
+            "bareme_points_negatifs.csv",
+            ("id", "motif", "points"),
+            BaremePointNegatif.objects.filter(famille_id=famille_id),
+            ("motif", "points"),
+        ),
+        (
+            "historique_points_positifs.csv",
+            ("id", "date", "id_enfant", "enfant", "motif", "nombre"),
+            PointPositif.objects.filter(enfant__famille_id=famille_id),
+            ("date", "enfant_id", "enfant__prenom", "motif1", "nb_positif"),
+        ),
+        (
+            "historique_points_negatifs.csv",
+            ("id", "date", "id_enfant", "enfant", "motif", "nombre"),
+            PointNegatif.objects.filter(enfant__famille_id=famille_id),
+            ("date", "enfant_id", "enfant__prenom", "motif2", "nb_negatif"),
+        ),
+    ]
+
+
+def nom_archive(famille):
+    return f"vive-les-points-{slugify(famille.nom) or famille.pk}-{timezone.localdate():%Y-%m-%d}.zip"
+
+
+def archive(famille, lot=None):
+    """Générateur des octets de l'archive ZIP de `famille` (StreamingHttpResponse)."""
+    lot = lot or settings.FAMILLE_EXPORT_LOT
+    tampon = _Tampon()
+    contenus = fichiers(famille.pk)
+    with zipfile.ZipFile(tampon, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        resume = {
+            "famille": {"id": famille.pk, "nom": famille.nom},
+            "exporte_le": timezone.now().isoformat(),
+            "fichiers": [nom for nom, *_ in contenus],
+        }
+        zf.writestr("famille.json", json.dumps(resume, ensure_ascii=False, indent=2))
+        for nom, entetes, qs, champs in contenus:
+            # utf-8-sig : accents lus correctement par Excel
+            with zf.open(nom, "w") as brut, io.TextIOWrapper(brut, encoding="utf-8-sig", newline="") as texte:
+                ecrivain = csv.writer(texte)
+                ecrivain.writerow(entetes)
+                for lignes in _pages(qs, champs, lot):
+                    ecrivain.writerows(lignes)
+                    if tampon.morceaux:
+                        yield tampon.vider()
+    # Fin des fichiers et répertoire central, écrits à la fermeture
+    yield tampon.vider()
@@ -3,14 +3,78 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
-from django.forms import formset_factory, inlineformset_factory, BaseFormSet
+from django.db.models.functions import Lower
+from django.forms import formset_factory, inlineformset_factory, BaseFormSet, BaseInlineFormSet
 from django.forms.widgets import HiddenInput
-from django.contrib.auth.models import Group
-from .models import Famille, Enfant, UserProfile
+from .models import Famille, Enfant
 
 User = get_user_model()
 
 
+# ------------------ Unicité des emails ------------------ #
+def comptes_par_email(emails):
+    """
+    {email en minuscules: [(pk du User, pk de l'Enfant lié ou None), ...]}
+    pour les emails donnés, en UNE requête : WHERE LOWER(email) IN (...),
+    servie par l'index fonctionnel auth_user_email_lower (migration famille
+    0006) là où la base le permet.
+    """
+    emails = {e.strip().lower() for e in emails if e}
+    if not emails:
+        return {}
+    comptes = {}
+    rows = (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower__in=emails)
+        .values_list("email", "pk", "profil_enfant")
+    )
+    for email, pk, enfant_id in rows:
+        comptes.setdefault(email.lower(), []).append((pk, enfant_id))
+    return comptes
+
+
+class EmailsMixin:
+    """
+    Formulaire dont l'unicité de l'email se vérifie sur `comptes_email`,
+    pré-rempli par le formset pour tous ses formulaires ; seul, le
+    formulaire interroge la base pour son propre email.
+    """
+
+    comptes_email = None
+
+    def comptes_pour(self, email):
+        email = (email or "").strip().lower()
+        if self.comptes_email is None:
+            return comptes_par_email([email]).get(email, [])
+        return self.comptes_email.get(email, [])
+
+
+class EmailsFormSetMixin:
+    """
+    Formset : une seule requête pour les emails de tous ses formulaires
+    (avant leur validation), et refus d'un même email saisi deux fois.
+    """
+
+    def full_clean(self):
+        if self.is_bound:
+            comptes = comptes_par_email(form.data.get(form.add_prefix("email")) for form in self.forms)
+            for form in self.forms:
+                form.comptes_email = comptes
+        super().full_clean()
+
+    def clean(self):
+        super().clean()
+        vus = set()
+        for form in self.forms:
+            cd = getattr(form, "cleaned_data", None) or {}
+            email = (cd.get("email") or "").strip().lower()
+            if not email or cd.get("DELETE"):
+                continue
+            if email in vus:
+                raise ValidationError("Le même email est saisi pour plusieurs personnes.")
+            vus.add(email)
+
+
 # ------------------ Auth ------------------ #
 class EmailAuthenticationForm(AuthenticationForm):
     username = forms.EmailField(
@@ -47,7 +111,7 @@ class FamilleForm(forms.ModelForm):
 # ==============================================================
 
 
-class ParentUserForm(forms.Form):
+class ParentUserForm(EmailsMixin, forms.Form):
     """
     Formulaires parents pour la page d'inscription.
     On crée des Users (parents) + UserProfile(role=parent).
@@ -79,15 +143,12 @@ class ParentUserForm(forms.Form):
         data = super().clean()
         if data.get("password1") != data.get("password2"):
             raise ValidationError("Les mots de passe ne correspondent pas.")
-        if (
-            data.get("email")
-            and User.objects.filter(email__iexact=data["email"]).exists()
-        ):
+        if data.get("email") and self.comptes_pour(data["email"]):
             raise ValidationError("Un compte existe déjà avec cet email.")
         return data
 
 
-class EnfantSignupForm(forms.Form):
+class EnfantSignupForm(EmailsMixin, forms.Form):
     """
     Formulaires enfants pour la page d'inscription.
     On crée des Enfant (modèle) et, si email saisi, un User enfant lié (OneToOne).
@@ -115,22 +176,13 @@ class EnfantSignupForm(forms.Form):
         email, password = data.get("email"), data.get("password")
 
         if email:
-            # 1) Unicité côté User
-            try:
-                existing_user = User.objects.get(email__iexact=email)
-            except User.DoesNotExist:
-                existing_user = None
-
-            # 2) Si un User existe déjà sur cet email, vérifier qu'il n'est pas déjà lié à un Enfant
-            if (
-                existing_user
-                and Enfant.objects.filter(user=existing_user).exists()
-            ):
+            # 1) Si un User existe déjà sur cet email, vérifier qu'il n'est pas déjà lié à un Enfant
+            if any(enfant_id for _, enfant_id in self.comptes_pour(email)):
                 raise ValidationError(
                     "Cet email est déjà utilisé par un autre enfant."
                 )
 
-            # 3) Mot de passe requis si email saisi
+            # 2) Mot de passe requis si email saisi
             if not password:
                 raise ValidationError(
                     "Mot de passe requis si un email enfant est saisi."
@@ -139,7 +191,7 @@ class EnfantSignupForm(forms.Form):
         return data
 
 
-class BaseParentFormSet(BaseFormSet):
+class BaseParentFormSet(EmailsFormSetMixin, BaseFormSet):
     def clean(self):
         super().clean()
         count = 0
@@ -155,7 +207,7 @@ class BaseParentFormSet(BaseFormSet):
             raise ValidationError("Ajoutez au moins un parent.")
 
 
-class BaseEnfantFormSet(BaseFormSet):
+class BaseEnfantFormSet(EmailsFormSetMixin, BaseFormSet):
     def clean(self):
         super().clean()
         count = 0
@@ -184,7 +236,7 @@ EnfantSignupFormSet = formset_factory(
 # ==============================================================
 
 
-class ParentInlineForm(forms.Form):
+class ParentInlineForm(EmailsMixin, forms.Form):
     """
     Edition des parents (Users existants ou ajout).
     """
@@ -226,20 +278,21 @@ class ParentInlineForm(forms.Form):
     def clean_email(self):
         email = self.cleaned_data.get("email")
         user_id = self.cleaned_data.get("user_id")
-        qs = User.objects.filter(email__iexact=email)
-        if user_id:
-            qs = qs.exclude(pk=user_id)
-        if qs.exists():
+        if any(pk != user_id for pk, _ in self.comptes_pour(email)):
             raise ValidationError("Un compte existe déjà avec cet email.")
         return email
 
 
+class BaseParentInlineFormSet(EmailsFormSetMixin, BaseFormSet):
+    pass
+
+
 ParentInlineFormSet = formset_factory(
-    ParentInlineForm, extra=0, can_delete=True
+    ParentInlineForm, extra=0, can_delete=True, formset=BaseParentInlineFormSet
 )
 
 
-class EnfantManageForm(forms.ModelForm):
+class EnfantManageForm(EmailsMixin, forms.ModelForm):
     """
     Edition d'un Enfant (modèle) + gestion du compte User enfant lié (OneToOne).
     """
@@ -270,8 +323,10 @@ class EnfantManageForm(forms.ModelForm):
             "prenom": forms.TextInput(attrs={"class": "form-control"}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, enfants=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Enfants déjà chargés par le formset (voir EnfantDejaChargeField)
+        self.enfants = enfants
         # Pré-remplir l'email si un User est lié
         if self.instance and self.instance.pk and self.instance.user:
             self.fields["email"].initial = self.instance.user.email
@@ -283,10 +338,8 @@ class EnfantManageForm(forms.ModelForm):
 
         if email:
             # Unicité email côté User (hors user déjà lié)
-            qs = User.objects.filter(email__iexact=email)
-            if self.instance and getattr(self.instance, "user", None):
-                qs = qs.exclude(pk=self.instance.user.pk)
-            if qs.exists():
+            user_id = self.instance.user_id if self.instance else None
+            if any(pk != user_id for pk, _ in self.comptes_pour(email)):
                 # >>> attacher l'erreur au champ email
                 self.add_error("email", "Un compte utilisateur existe déjà avec cet email.")
 
@@ -297,43 +350,57 @@ class EnfantManageForm(forms.ModelForm):
 
         return cleaned
 
-    def save_user(self, famille):
-        """
-        Crée/MAJ/supprime le compte enfant lié selon email/new_password,
-        met à jour le Group et le UserProfile.
-        """
-        email = self.cleaned_data.get("email") or ""
-        pwd = self.cleaned_data.get("new_password")
-
-        # Aucun compte voulu → supprimer le lien si existant
-        if not email:
-            if self.instance.user:
-                self.instance.user.delete()
-                self.instance.user = None
-                self.instance.save(update_fields=["user"])
-            return
-
-        # Créer/Màj le User enfant
-        if not self.instance.user:
-            user = User.objects.create_user(
-                username=email, email=email, password=pwd
+
+class EnfantDejaChargeField(forms.ModelChoiceField):
+    """
+    Champ "id" des formulaires enfants : l'enfant est pris parmi ceux que le
+    formset a déjà chargés (une requête pour tous) au lieu d'un SELECT par
+    formulaire ; un id hors de la famille est refusé.
+    """
+
+    def __init__(self, enfants, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enfants = enfants  # {pk: Enfant}
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            enfant = self.enfants.get(int(value))
+        except (TypeError, ValueError):
+            enfant = None
+        if enfant is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+            )
+        return enfant
+
+
+class BaseEnfantInlineFormSet(EmailsFormSetMixin, BaseInlineFormSet):
+    def __init__(self, *args, queryset=None, **kwargs):
+        # Compte lié chargé avec l'enfant (email pré-rempli, sauvegarde)
+        if queryset is None:
+            queryset = Enfant.objects.select_related("user")
+        super().__init__(*args, queryset=queryset, **kwargs)
+        self._enfants = None
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        if self.is_bound:
+            # Enfants de la famille, lus une fois pour tous les formulaires
+            if self._enfants is None:
+                self._enfants = {e.pk: e for e in self.get_queryset()}
+            kwargs["enfants"] = self._enfants
+        return kwargs
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if form.enfants is not None:
+            pk_name = self.model._meta.pk.name
+            field = form.fields[pk_name]
+            form.fields[pk_name] = EnfantDejaChargeField(
+                form.enfants, field.queryset, initial=field.initial, required=False, widget=field.widget
             )
-            self.instance.user = user
-            self.instance.save(update_fields=["user"])
-        else:
-            user = self.instance.user
-            user.email = email
-            user.username = email
-            if pwd:
-                user.set_password(pwd)
-            user.save()
-
-        # Groupe + profil enfant
-        group_enfant, _ = Group.objects.get_or_create(name="enfant")
-        user.groups.add(group_enfant)
-        UserProfile.objects.update_or_create(
-            user=user, defaults={"famille": famille, "role": "enfant"}
-        )
 
 
 # Inline formset basé sur Enfant (modèle) + notre form personnalisé
@@ -341,6 +408,7 @@ EnfantInlineFormSet = inlineformset_factory(
     Famille,
     Enfant,
     form=EnfantManageForm,
+    formset=BaseEnfantInlineFormSet,
     extra=0,
     can_delete=True,
     labels={"DELETE": "Retirer de la famille"},
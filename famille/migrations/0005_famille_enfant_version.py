@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("famille", "0004_alter_enfant_famille"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enfant",
+            name="maj_le",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name="enfant",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="famille",
+            name="maj_le",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name="famille",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
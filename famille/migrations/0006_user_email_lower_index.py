@@ -0,0 +1,30 @@
+# Index fonctionnel LOWER(email) sur auth_user : les vérifications d'unicité
+# des emails (famille.forms.comptes_par_email) filtrent sur LOWER(email).
+# Le modèle User appartient à django.contrib.auth : l'index est créé par le
+# schema editor, qui l'ignore là où les index d'expression n'existent pas
+# (MariaDB, MySQL < 8.0.13).
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+INDEX = models.Index(Lower("email"), name="auth_user_email_lower")
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model("auth", "User"), INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model("auth", "User"), INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("famille", "0005_famille_enfant_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
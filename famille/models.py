@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings  # système de configuration global de Django
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Famille(models.Model):
     nom = models.CharField(max_length=150)
+    # Tampon de version : incrémenté à chaque écriture de points, d'enfant ou
+    # de barème de la famille (voir bump_versions). Sert aux GET conditionnels.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    maj_le = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return self.nom
@@ -35,6 +41,36 @@ class Enfant(models.Model):
         on_delete=models.SET_NULL,
         related_name="profil_enfant",
     )
+    # Tampon de version propre à l'enfant (solde + historique)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    maj_le = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.prenom} {self.solde_points}"
+
+    @property
+    def cle_cache(self):
+        """
+        Clé des fragments de gabarit en cache (carte du tableau de bord,
+        en-tête de l'historique) : change à chaque bump_versions().
+        """
+        return f"{self.pk}.{self.version}.{self.maj_le.timestamp()}"
+
+
+def bump_versions(*, enfant_id=None, famille_id=None, enfant_ids=None):
+    """
+    Incrémente les tampons de version (UPDATE ... SET version = version + 1,
+    sans lecture préalable) :
+      - enfant_id : l'enfant ET sa famille (le tableau de bord affiche son solde)
+      - famille_id : la famille (barèmes), ou celle de l'enfant si déjà connue
+      - enfant_ids : plusieurs enfants en un UPDATE (famille_id à fournir)
+    """
+    stamp = {"version": F("version") + 1, "maj_le": timezone.now()}
+    if enfant_ids:
+        Enfant.objects.filter(pk__in=enfant_ids).update(**stamp)
+    if enfant_id is not None:
+        Enfant.objects.filter(pk=enfant_id).update(**stamp)
+        if famille_id is None:
+            Famille.objects.filter(enfants=enfant_id).update(**stamp)
+    if famille_id is not None:
+        Famille.objects.filter(pk=famille_id).update(**stamp)
@@ -0,0 +1,95 @@
+# famille/suppression.py
+"""
+Suppression d'une famille par lots.
+
+Un famille.delete() laisse le collecteur de Django charger en mémoire toute
+la descendance (profils, enfants, et surtout l'historique des points) pour
+émettre les signaux, le tout dans une seule transaction qui verrouille les
+tables le temps de l'opération. Ici :
+
+  1. les comptes (parents, enfants) sont supprimés par paquets de
+     FAMILLE_SUPPRESSION_LOT, avec le collecteur : ils ont peu de
+     dépendances (profil, groupes, journal d'admin) ;
+  2. la descendance de la famille (relations CASCADE, découvertes dans
+     _meta) est supprimée des feuilles vers la racine — points, puis
+     enfants, barèmes, profils — par DELETE ... WHERE id IN (lot), sans
+     chargement des objets ni signaux (inutiles : tout disparaît) ;
+  3. la famille elle-même.
+
+Chaque lot a sa propre transaction, courte. L'opération est idempotente :
+interrompue, elle reprend où elle en était (tâche de fond réessayée).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+
+from .models import Famille, UserProfile
+
+User = get_user_model()
+
+
+def _descendance(model, chemin):
+    """(modèle, filtre vers la famille) des relations CASCADE, feuilles d'abord."""
+    for rel in model._meta.related_objects:
+        if rel.many_to_many or rel.on_delete is not models.CASCADE:
+            continue
+        sous_chemin = f"{rel.field.name}__{chemin}"
+        yield from _descendance(rel.related_model, sous_chemin)
+        yield rel.related_model, sous_chemin
+
+
+def etapes(famille_id):
+    """Requêtes à vider, dans l'ordre des dépendances : [(étiquette, queryset)]."""
+    comptes = User._base_manager.filter(
+        pk__in=UserProfile.objects.filter(famille_id=famille_id).values("user_id")
+    )
+    plan = [("comptes", comptes)]
+    for model, chemin in _descendance(Famille, "pk"):
+        plan.append((model._meta.label_lower, model._base_manager.filter(**{chemin: famille_id})))
+    plan.append(("famille", Famille._base_manager.filter(pk=famille_id)))
+    return plan
+
+
+def _vider(etiquette, qs, lot):
+    """Supprime `qs` par paquets ; génère le nombre de lignes supprimées par lot."""
+    while True:
+        with transaction.atomic(using=qs.db):
+            # Ids matérialisés : MySQL refuse LIMIT dans un IN (sous-requête)
+            ids = list(qs.values_list("pk", flat=True)[:lot])
+            if not ids:
+                return
+            cible = qs.model._base_manager.using(qs.db).filter(pk__in=ids)
+            if etiquette == "comptes":
+                cible.delete()
+            else:
+                # DELETE direct, sans collecteur (celui qu'emploie Django
+                # pour ses suppressions "rapides")
+                cible._raw_delete(qs.db)
+        yield len(ids)
+
+
+def supprimer_famille(famille_id, lot=None, progression=None):
+    """
+    Supprime la famille et tout ce qui en dépend. `progression(fait, total,
+    etape)` est appelé après chaque lot. Renvoie {étiquette: lignes}.
+    """
+    lot = lot or settings.FAMILLE_SUPPRESSION_LOT
+    plan = etapes(famille_id)
+    total = sum(qs.count() for _, qs in plan)
+    fait = 0
+    bilan = {}
+    for etiquette, qs in plan:
+        for n in _vider(etiquette, qs, lot):
+            fait += n
+            bilan[etiquette] = bilan.get(etiquette, 0) + n
+            if progression:
+                progression(fait, total, etiquette)
+    if progression:
+        # Les profils partent avec les comptes : le total estimé était plus haut
+        progression(fait, fait, "terminée")
+    return bilan
+
+
+def desactiver_comptes(famille_id):
+    """Bloque tout de suite les comptes de la famille (connexion et sessions ouvertes)."""
+    return User.objects.filter(profile__famille_id=famille_id).update(is_active=False)
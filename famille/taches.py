@@ -0,0 +1,15 @@
+# famille/taches.py
+"""Tâches de fond de l'app famille (voir taches.queue)."""
+from taches.queue import progresser, tache
+
+from . import suppression
+
+
+@tache
+def supprimer_famille(famille_id):
+    """Suppression par lots (famille.suppression), avancement sur /taches/<pk>/."""
+    bilan = suppression.supprimer_famille(
+        famille_id,
+        progression=lambda fait, total, etape: progresser(fait=fait, total=total, etape=etape),
+    )
+    return {"famille_id": famille_id, "supprimes": bilan}
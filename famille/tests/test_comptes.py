@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, is_password_usable
+from django.contrib.auth.models import Group
+from django.test import override_settings
+
+from famille import comptes
+from famille.comptes import creer_comptes, group_id, hash_passwords, rattacher
+from famille.models import UserProfile
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASH_WORKERS=4)
+def test_hash_passwords_parallel_keeps_order(monkeypatch):
+    threads = set()
+    make_password = comptes.make_password
+
+    def tracing(password):
+        threads.add(threading.get_ident())
+        return make_password(password)
+
+    monkeypatch.setattr(comptes, "make_password", tracing)
+    raw = [f"secret-{i}" for i in range(6)]
+    hashes = hash_passwords(raw)
+    assert len(hashes) == 6
+    assert all(check_password(p, h) for p, h in zip(raw, hashes))
+    assert threading.get_ident() not in threads  # haché dans le pool
+
+
+@override_settings(PASSWORD_HASH_WORKERS=4)
+def test_hash_passwords_single_and_none_inline():
+    assert hash_passwords([]) == []
+    [h] = hash_passwords(["seul"])
+    assert check_password("seul", h)
+    [h, none] = hash_passwords(["a", None])
+    assert check_password("a", h)
+    assert not is_password_usable(none)
+
+
+@pytest.mark.django_db
+def test_creer_comptes_bulk(famille, django_assert_max_num_queries):
+    data = [
+        {"email": "Papa@Example.COM", "password": "pp", "first_name": "Papa", "last_name": "D", "role": "parent"},
+        {"email": "lea@example.com", "password": "pl", "first_name": "Léa", "last_name": "D", "role": "enfant"},
+    ]
+    # Insertions User, UserProfile, appartenances + groupes (get_or_create)
+    with django_assert_max_num_queries(12):
+        users = creer_comptes(famille, data)
+
+    papa, lea = users
+    assert papa.pk and lea.pk
+    papa.refresh_from_db()
+    assert papa.email == "Papa@example.com" == papa.username
+    assert papa.check_password("pp")
+    assert User.objects.get(pk=lea.pk).check_password("pl")
+    assert list(papa.groups.values_list("name", flat=True)) == ["parents"]
+    assert list(lea.groups.values_list("name", flat=True)) == ["enfant"]
+    assert UserProfile.objects.get(user=lea).role == "enfant"
+    assert UserProfile.objects.get(user=papa).famille == famille
+
+
+@pytest.mark.django_db
+def test_group_id_cached_after_commit(django_capture_on_commit_callbacks, django_assert_num_queries):
+    comptes._group_ids.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        pk = group_id("parents")
+    with django_assert_num_queries(0):
+        assert group_id("parents") == pk
+    Group.objects.filter(pk=pk).get().delete()
+    assert comptes._group_ids == {}
+
+
+@pytest.mark.django_db
+def test_group_id_not_cached_before_commit(django_capture_on_commit_callbacks):
+    comptes._group_ids.clear()
+    with django_capture_on_commit_callbacks(execute=False):
+        group_id("enfant")
+    # Transaction annulée : le groupe créé ne doit pas rester en cache
+    assert "enfant" not in comptes._group_ids
+
+
+@pytest.mark.django_db
+def test_rattacher_idempotent(famille, django_assert_max_num_queries):
+    [lea] = creer_comptes(
+        famille, [{"email": "lea@example.com", "password": "p", "first_name": "Léa", "last_name": "", "role": "enfant"}]
+    )
+    tom = User.objects.create_user(username="tom@example.com", email="tom@example.com", password="p")
+    with django_assert_max_num_queries(4):
+        rattacher(famille, [lea, tom], "enfant")
+    assert UserProfile.objects.filter(famille=famille, role="enfant").count() == 2
+    assert list(tom.groups.values_list("name", flat=True)) == ["enfant"]
+    assert lea.groups.count() == 1
+
+
+@pytest.mark.django_db
+def test_rattacher_corrects_existing_profile(famille, autre_famille):
+    tom = User.objects.create_user(username="tom@example.com", email="tom@example.com", password="p")
+    UserProfile.objects.create(user=tom, famille=autre_famille, role="parent")
+    rattacher(famille, [tom], "enfant")
+    profil = UserProfile.objects.get(user=tom)
+    assert (profil.famille, profil.role) == (famille, "enfant")
+    assert UserProfile.objects.count() == 1
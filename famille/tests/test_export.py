@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+from django.urls import reverse
+
+from famille.export import archive
+from famille.models import Enfant
+from points.models import BaremeRecompense, PointNegatif, PointPositif
+
+
+def _lire(contenu):
+    zf = zipfile.ZipFile(io.BytesIO(contenu))
+    assert zf.testzip() is None
+    return zf
+
+
+def _csv(zf, nom):
+    return list(csv.DictReader(io.StringIO(zf.read(nom).decode("utf-8-sig"))))
+
+
+@pytest.mark.django_db
+def test_archive_contents(famille, autre_famille, userprofile_parent, django_assert_max_num_queries):
+    lea = Enfant.objects.create(prenom="Léa", famille=famille)
+    Enfant.objects.create(prenom="Intrus", famille=autre_famille)
+    BaremeRecompense.objects.create(famille=famille, points=10, valeur_euros="1 €", valeur_temps="15 min")
+    PointPositif.objects.bulk_create(PointPositif(enfant=lea, nb_positif=i, motif1=f"m{i}") for i in range(7))
+    PointNegatif.objects.create(enfant=lea, nb_negatif=2, motif2="Retard")
+
+    # Pages de 3 : lecture par clé, quelques requêtes par fichier
+    with django_assert_max_num_queries(20):
+        morceaux = list(archive(famille, lot=3))
+    assert len(morceaux) > 2  # produit au fil de l'eau
+    zf = _lire(b"".join(morceaux))
+
+    resume = json.loads(zf.read("famille.json"))
+    assert resume["famille"] == {"id": famille.pk, "nom": "Dupont"}
+    assert set(resume["fichiers"]) <= set(zf.namelist())
+
+    [membre] = _csv(zf, "membres.csv")
+    assert (membre["email"], membre["role"]) == ("parent1@example.com", "parent")
+    assert [e["prenom"] for e in _csv(zf, "enfants.csv")] == ["Léa"]
+    assert _csv(zf, "bareme_recompenses.csv")[0]["valeur_euros"] == "1 €"
+    positifs = _csv(zf, "historique_points_positifs.csv")
+    assert [p["nombre"] for p in positifs] == [str(i) for i in range(7)]
+    assert {p["enfant"] for p in positifs} == {"Léa"}
+    assert _csv(zf, "historique_points_negatifs.csv")[0]["motif"] == "Retard"
+    assert _csv(zf, "bareme_points_positifs.csv") == []
+
+
+@pytest.mark.django_db
+def test_export_view_streams_zip_for_parent(client, userprofile_parent, parent_user, famille):
+    client.force_login(parent_user)
+    resp = client.get(reverse("famille:export_family"))
+    assert resp.status_code == 200
+    assert resp.streaming
+    assert resp["Content-Type"] == "application/zip"
+    assert 'filename="vive-les-points-dupont-' in resp["Content-Disposition"]
+    assert "famille.json" in _lire(b"".join(resp.streaming_content)).namelist()
+
+
+@pytest.mark.django_db
+def test_export_view_denies_non_parent(client, userprofile_enfant, enfant_user):
+    client.force_login(enfant_user)
+    resp = client.get(reverse("famille:export_family"))
+    assert resp.status_code == 302
+    assert reverse("points:dashboard") in resp.url
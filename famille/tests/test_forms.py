@@ -3,6 +3,8 @@ import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models.functions import Lower
 
 from famille.forms import (
     EmailAuthenticationForm,
@@ -13,9 +15,11 @@ from famille.forms import (
     EnfantSignupFormSet,
     ParentInlineForm,
     EnfantManageForm,
+    EnfantInlineFormSet,
     FamilyHardDeleteForm,
+    comptes_par_email,
 )
-from famille.models import Enfant, UserProfile
+from famille.models import Enfant
 
 User = get_user_model()
 
@@ -243,6 +247,57 @@ def test_enfant_signup_formset_valid_with_one_enfant():
     assert fs.is_valid(), fs.errors
 
 
+# ----------------------------
+# Unicité des emails par formset
+# ----------------------------
+def _parents_data(prefix, emails):
+    data = _fs_mgmt(prefix, total=len(emails))
+    for i, email in enumerate(emails):
+        data.update(
+            {
+                f"{prefix}-{i}-first_name": f"P{i}",
+                f"{prefix}-{i}-last_name": "Dupont",
+                f"{prefix}-{i}-email": email,
+                f"{prefix}-{i}-password1": "pwd",
+                f"{prefix}-{i}-password2": "pwd",
+            }
+        )
+    return data
+
+
+@pytest.mark.django_db
+def test_parent_formset_checks_emails_in_one_query(parent_user, django_assert_num_queries):
+    data = _parents_data("form", ["a@example.com", "PARENT1@example.com", "c@example.com", "d@example.com"])
+    fs = ParentFormSet(data=data, prefix="form")
+    with django_assert_num_queries(1):
+        assert not fs.is_valid()
+    assert "Un compte existe déjà avec cet email." in fs.forms[1].non_field_errors()
+    assert all(not f.errors for i, f in enumerate(fs.forms) if i != 1)
+
+
+@pytest.mark.django_db
+def test_parent_formset_rejects_same_email_twice():
+    fs = ParentFormSet(data=_parents_data("form", ["a@example.com", "A@Example.com"]), prefix="form")
+    assert not fs.is_valid()
+    assert "Le même email est saisi pour plusieurs personnes." in fs.non_form_errors()
+
+
+@pytest.mark.django_db
+def test_email_lower_index_used(parent_user):
+    assert comptes_par_email(["Parent1@Example.com"]) == {"parent1@example.com": [(parent_user.pk, None)]}
+    if connection.vendor != "sqlite":
+        pytest.skip("plan d'exécution propre à SQLite")
+    sql, params = (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower__in=["x@example.com"])
+        .query.sql_with_params()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = " ".join(str(row) for row in cursor.fetchall())
+    assert "auth_user_email_lower" in plan
+
+
 # -------------------
 # ParentInlineForm
 # -------------------
@@ -328,73 +383,6 @@ def test_enfant_manage_clean_requires_password_when_new_email_and_no_user(famill
     assert "Mot de passe requis si vous renseignez l'email." in form.errors["new_password"]
 
 
-@pytest.mark.django_db
-def test_enfant_manage_save_user_creates_new_user_and_profile(famille, enfant):
-    data = {
-        "prenom": enfant.prenom,
-        "solde_points": enfant.solde_points,
-        "email": "child@example.com",
-        "new_password": "pwd",
-    }
-    form = EnfantManageForm(data=data, instance=enfant)
-    assert form.is_valid(), form.errors
-
-    form.save_user(famille=famille)
-    enfant.refresh_from_db()
-    assert enfant.user is not None
-    u = enfant.user
-    assert u.email == "child@example.com"
-    assert u.username == "child@example.com"
-
-    # Groupe "enfant"
-    assert u.groups.filter(name="enfant").exists()
-    # UserProfile créé / MAJ
-    up = UserProfile.objects.get(user=u)
-    assert up.role == "enfant"
-    assert up.famille == famille
-
-
-@pytest.mark.django_db
-def test_enfant_manage_save_user_updates_existing_user_and_password(famille, enfant_user):
-    enfant = Enfant.objects.create(prenom="Tom", famille=famille, user=enfant_user)
-    data = {
-        "prenom": enfant.prenom,
-        "solde_points": enfant.solde_points,
-        "email": "newmail@example.com",
-        "new_password": "newpwd",
-    }
-    form = EnfantManageForm(data=data, instance=enfant)
-    assert form.is_valid(), form.errors
-
-    form.save_user(famille=famille)
-    enfant.refresh_from_db()
-    u = enfant.user
-    assert u.email == "newmail@example.com"
-    assert u.username == "newmail@example.com"
-    assert u.check_password("newpwd")
-
-    # Profil mis à jour
-    up = UserProfile.objects.get(user=u)
-    assert up.role == "enfant"
-    assert up.famille == famille
-    assert u.groups.filter(name="enfant").exists()
-
-
-@pytest.mark.django_db
-def test_enfant_manage_save_user_removes_account_if_email_empty(famille, enfant_user):
-    enfant = Enfant.objects.create(prenom="Inès", famille=famille, user=enfant_user)
-    user_id = enfant_user.id
-
-    data = {"prenom": enfant.prenom, "solde_points": enfant.solde_points, "email": "", "new_password": ""}
-    form = EnfantManageForm(data=data, instance=enfant)
-    assert form.is_valid(), form.errors
-
-    form.save_user(famille=famille)
-    enfant.refresh_from_db()
-    assert enfant.user is None
-    assert not User.objects.filter(pk=user_id).exists()
-
-
 # -----------------------
 # FamilyHardDeleteForm
 # -----------------------
@@ -410,3 +398,26 @@ def test_family_hard_delete_form_fields_and_widgets():
 def test_family_hard_delete_form_valid_submission():
     form = FamilyHardDeleteForm(data={"family_name": "Dupont", "password": "secret"})
     assert form.is_valid(), form.errors
+
+
+# -----------------------
+# EnfantInlineFormSet
+# -----------------------
+@pytest.mark.django_db
+def test_enfant_inline_formset_refuses_other_family_child(famille, autre_famille, django_assert_max_num_queries):
+    lea = Enfant.objects.create(prenom="Léa", famille=famille)
+    intrus = Enfant.objects.create(prenom="Intrus", famille=autre_famille)
+    data = {
+        "enfants-TOTAL_FORMS": "2",
+        "enfants-INITIAL_FORMS": "2",
+        "enfants-0-id": str(lea.pk),
+        "enfants-0-prenom": "Léa",
+        "enfants-1-id": str(intrus.pk),
+        "enfants-1-prenom": "Volé",
+    }
+    formset = EnfantInlineFormSet(data=data, instance=famille, prefix="enfants")
+    # Enfants lus une fois pour tous les formulaires
+    with django_assert_max_num_queries(2):
+        assert not formset.is_valid()
+    assert formset.forms[0].cleaned_data["id"] == lea
+    assert "id" in formset.forms[1].errors
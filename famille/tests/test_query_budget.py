@@ -0,0 +1,158 @@
+"""
+Budgets de requêtes SQL des vues de gestion de la famille (voir aussi
+points/tests/test_query_budget.py) : plafond pour le cas simple et requêtes
+supplémentaires par enfant / par parent.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.urls import reverse
+
+from famille.models import Enfant, UserProfile
+
+User = get_user_model()
+
+
+def _management(prefix, total, initial):
+    return {
+        f"{prefix}-TOTAL_FORMS": str(total),
+        f"{prefix}-INITIAL_FORMS": str(initial),
+        f"{prefix}-MIN_NUM_FORMS": "0",
+        f"{prefix}-MAX_NUM_FORMS": "1000",
+    }
+
+
+def _add_enfants(famille, n, with_user=False):
+    start = Enfant.objects.filter(famille=famille).count()
+    for i in range(start, start + n):
+        user = None
+        if with_user:
+            user = User.objects.create_user(
+                username=f"enfant{i}@example.com", email=f"enfant{i}@example.com", password="pwd"
+            )
+            UserProfile.objects.create(user=user, famille=famille, role="enfant")
+        Enfant.objects.create(prenom=f"Enfant {i}", famille=famille, user=user)
+
+
+def _manage_post_data(famille, nom):
+    """Formulaire de gestion tel que rendu (parents + enfants), nom modifié."""
+    parents = list(User.objects.filter(profile__famille=famille, profile__role="parent").order_by("id"))
+    enfants = list(Enfant.objects.filter(famille=famille).select_related("user").order_by("id"))
+    data = {"nom": nom, **_management("parents", len(parents), len(parents))}
+    for i, u in enumerate(parents):
+        data.update(
+            {
+                f"parents-{i}-user_id": str(u.id),
+                f"parents-{i}-first_name": u.first_name,
+                f"parents-{i}-last_name": u.last_name,
+                f"parents-{i}-email": u.email,
+                f"parents-{i}-new_password": "",
+                f"parents-{i}-DELETE": "",
+            }
+        )
+    data.update(_management("enfants", len(enfants), len(enfants)))
+    for i, e in enumerate(enfants):
+        data.update(
+            {
+                f"enfants-{i}-id": str(e.id),
+                f"enfants-{i}-famille": str(famille.id),
+                f"enfants-{i}-prenom": e.prenom,
+                f"enfants-{i}-email": e.user.email if e.user else "",
+                f"enfants-{i}-new_password": "",
+                f"enfants-{i}-DELETE": "",
+            }
+        )
+    return data
+
+
+def _register_data(nb_enfants):
+    data = {
+        "nom": "Doe",
+        **_management("parents", 1, 0),
+        "parents-0-first_name": "John",
+        "parents-0-last_name": "Doe",
+        "parents-0-email": "john.doe@example.com",
+        "parents-0-password1": "pwd",
+        "parents-0-password2": "pwd",
+        **_management("enfants", nb_enfants, 0),
+    }
+    for i in range(nb_enfants):
+        data.update(
+            {
+                f"enfants-{i}-prenom": f"Enfant {i}",
+                f"enfants-{i}-email": f"enfant{i}@example.com",
+                f"enfants-{i}-password": "pwd",
+            }
+        )
+    return data
+
+
+# -------------------------------------------------------------------
+# ManageFamilyAccountView
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_manage_get_query_budget(client, userprofile_parent, parent_user, famille, count_queries):
+    client.force_login(parent_user)
+    url = reverse("famille:manage_account")
+    _add_enfants(famille, 1, with_user=True)
+    resp, one = count_queries(client.get, url)
+    assert resp.status_code == 200
+    _add_enfants(famille, 3, with_user=True)
+    _, four = count_queries(client.get, url)
+    assert one <= 6
+    assert four <= one  # compte de l'enfant chargé avec lui (select_related)
+
+
+@pytest.mark.django_db
+def test_manage_post_query_budget(client, userprofile_parent, parent_user, famille, count_queries):
+    client.force_login(parent_user)
+    url = reverse("famille:manage_account")
+    _add_enfants(famille, 1, with_user=True)
+    resp, one = count_queries(client.post, url, _manage_post_data(famille, "Dupont-1"))
+    assert resp.status_code == 302
+    _add_enfants(famille, 3, with_user=True)
+    _, four = count_queries(client.post, url, _manage_post_data(famille, "Dupont-2"))
+    assert one <= 18
+    # Rien par enfant : enfants et comptes relus une fois pour tout le formset,
+    # formulaires inchangés ignorés, écritures groupées (bulk_update/bulk_create)
+    assert four <= one
+
+
+@pytest.mark.django_db
+def test_manage_post_query_budget_all_changed(client, userprofile_parent, parent_user, famille, count_queries):
+    client.force_login(parent_user)
+    url = reverse("famille:manage_account")
+    for name in ("parents", "enfant"):  # mesures comparables : groupes déjà là
+        Group.objects.get_or_create(name=name)
+
+    def renamed(n):
+        data = _manage_post_data(famille, f"Dupont-{n}")
+        for i in range(int(data["enfants-TOTAL_FORMS"])):
+            data[f"enfants-{i}-prenom"] += f" {n}"
+        return data
+
+    _add_enfants(famille, 1, with_user=True)
+    resp, one = count_queries(client.post, url, renamed(1))
+    assert resp.status_code == 302
+    _add_enfants(famille, 3, with_user=True)
+    _, four = count_queries(client.post, url, renamed(2))
+    assert four <= one
+
+
+# -------------------------------------------------------------------
+# Inscription
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_register_query_budget(client, count_queries):
+    url = reverse("famille:register")
+    for name in ("parents", "enfant"):  # mesures comparables : groupes déjà là
+        Group.objects.get_or_create(name=name)
+    resp, one = count_queries(client.post, url, _register_data(1))
+    assert resp.status_code == 302
+    client.logout()
+    User.objects.all().delete()
+    _, three = count_queries(client.post, url, _register_data(3))
+    assert one <= 19
+    # Rien par enfant : emails vérifiés en une requête par formset, User,
+    # profil, groupe et Enfant insérés en masse (famille/comptes.py)
+    assert three <= one
@@ -0,0 +1,132 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from famille.models import Enfant, Famille, UserProfile
+from famille import suppression
+from famille.suppression import etapes, supprimer_famille
+from points.models import BaremePointPositif, PointNegatif, PointPositif
+from taches.models import Tache
+from taches.queue import executer, reserver
+
+User = get_user_model()
+
+
+def _peupler(famille, nb_points=5):
+    """Famille complète : parent, enfant avec compte, barème, historique."""
+    parent = User.objects.create_user(username=f"p-{famille.pk}", email=f"p{famille.pk}@example.com", password="pwd")
+    UserProfile.objects.create(user=parent, famille=famille, role="parent")
+    kid = User.objects.create_user(username=f"k-{famille.pk}", email=f"k{famille.pk}@example.com", password="pwd")
+    UserProfile.objects.create(user=kid, famille=famille, role="enfant")
+    enfant = Enfant.objects.create(prenom="Léa", famille=famille, user=kid)
+    BaremePointPositif.objects.create(famille=famille, motif="Rangement", points=2)
+    PointPositif.objects.bulk_create(PointPositif(enfant=enfant, nb_positif=1) for _ in range(nb_points))
+    PointNegatif.objects.bulk_create(PointNegatif(enfant=enfant, nb_negatif=1) for _ in range(nb_points))
+    return parent, kid
+
+
+@pytest.mark.django_db
+def test_etapes_follow_dependencies(famille):
+    ordre = [etiquette for etiquette, _ in etapes(famille.pk)]
+    assert ordre[0] == "comptes" and ordre[-1] == "famille"
+    for avant, apres in [
+        ("points.pointpositif", "famille.enfant"),
+        ("points.pointnegatif", "famille.enfant"),
+        ("famille.enfant", "famille"),
+    ]:
+        assert ordre.index(avant) < ordre.index(apres)
+
+
+@pytest.mark.django_db
+def test_supprimer_famille_in_chunks(famille, autre_famille):
+    _peupler(famille, nb_points=5)
+    autres = _peupler(autre_famille, nb_points=1)
+    appels = []
+
+    bilan = supprimer_famille(famille.pk, lot=2, progression=lambda *a: appels.append(a))
+
+    assert bilan["comptes"] == 2
+    assert bilan["points.pointpositif"] == bilan["points.pointnegatif"] == 5
+    assert bilan["famille"] == 1
+    assert not Famille.objects.filter(pk=famille.pk).exists()
+    assert not Enfant.objects.filter(famille_id=famille.pk).exists()
+    assert not BaremePointPositif.objects.filter(famille_id=famille.pk).exists()
+    # Lots de 2 : 3 lots par table de points ; avancement croissant
+    assert len([a for a in appels if a[2] == "points.pointpositif"]) == 3
+    faits = [a[0] for a in appels]
+    assert faits == sorted(faits)
+    assert appels[-1] == (faits[-1], faits[-1], "terminée")
+
+    # L'autre famille est intacte
+    assert User.objects.filter(pk__in=[u.pk for u in autres]).count() == 2
+    assert PointPositif.objects.filter(enfant__famille=autre_famille).count() == 1
+
+
+@pytest.mark.django_db
+def test_supprimer_famille_resumes_after_interruption(famille):
+    _peupler(famille)
+    PointPositif.objects.filter(enfant__famille=famille).delete()  # déjà fait par un essai précédent
+    bilan = supprimer_famille(famille.pk, lot=100)
+    assert "points.pointpositif" not in bilan
+    assert not Famille.objects.filter(pk=famille.pk).exists()
+
+
+@pytest.mark.django_db
+@override_settings(FAMILLE_SUPPRESSION_EN_TACHE=True)
+def test_delete_family_in_background(client, famille):
+    parent, kid = _peupler(famille)
+    client.force_login(parent)
+    kid_client = Client()
+    kid_client.force_login(kid)
+
+    resp = client.post(reverse("famille:delete_family"), {"family_name": famille.nom, "password": "pwd"})
+    assert resp.status_code == 302
+    assert "_auth_user_id" not in client.session
+    # Rien n'est encore supprimé, mais plus personne n'entre
+    assert Famille.objects.filter(pk=famille.pk).exists()
+    assert not User.objects.filter(profile__famille=famille, is_active=True).exists()
+    assert kid_client.get(reverse("points:dashboard")).status_code == 302
+
+    tache = reserver("test")
+    assert tache.nom == "famille.taches.supprimer_famille"
+    assert tache.priorite == Tache.PRIORITE_HAUTE
+    assert executer(tache) == Tache.Statut.TERMINEE
+    tache.refresh_from_db()
+    assert tache.resultat["supprimes"]["comptes"] == 2
+    assert tache.progression["etape"] == "terminée"
+    assert tache.progression["fait"] == tache.progression["total"]
+    assert not Famille.objects.filter(pk=famille.pk).exists()
+    assert not User.objects.filter(pk__in=[parent.pk, kid.pk]).exists()
+
+
+@pytest.mark.django_db
+def test_delete_family_failure_midway_is_resumed_by_queue(client, famille, monkeypatch):
+    parent, kid = _peupler(famille)
+    client.force_login(parent)
+    vider = suppression._vider
+
+    def vider_en_panne(etiquette, qs, lot):
+        if etiquette == "famille.enfant":
+            raise RuntimeError("connexion perdue")
+        yield from vider(etiquette, qs, lot)
+
+    monkeypatch.setattr(suppression, "_vider", vider_en_panne)
+    resp = client.post(reverse("famille:delete_family"), {"family_name": famille.nom, "password": "pwd"}, follow=True)
+    assert "est en cours" in resp.content.decode()
+    assert "_auth_user_id" not in client.session
+
+    # À moitié supprimée : la tâche reste en file, avec son erreur
+    assert Famille.objects.filter(pk=famille.pk).exists()
+    assert not PointPositif.objects.filter(enfant__famille=famille).exists()
+    tache = Tache.objects.get()
+    assert tache.statut == Tache.Statut.EN_ATTENTE
+    assert "connexion perdue" in tache.erreur
+
+    # Le travailleur (cron) reprend et termine
+    monkeypatch.setattr(suppression, "_vider", vider)
+    Tache.objects.filter(pk=tache.pk).update(executer_apres=timezone.now())
+    assert executer(reserver()) == Tache.Statut.TERMINEE
+    assert not Famille.objects.filter(pk=famille.pk).exists()
+    assert not User.objects.filter(pk__in=[parent.pk, kid.pk]).exists()
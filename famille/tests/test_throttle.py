@@ -0,0 +1,129 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from config.metrics import get_registry, reset_registry
+from famille import throttle
+
+User = get_user_model()
+
+REGLAGES = {
+    "LOGIN_THROTTLE_ENABLED": True,
+    "LOGIN_THROTTLE_WINDOW": 100,
+    "LOGIN_THROTTLE_IP_FREE": 10,
+    "LOGIN_THROTTLE_EMAIL_FREE": 2,
+    "LOGIN_THROTTLE_BASE_DELAY": 2,
+    "LOGIN_THROTTLE_MAX_DELAY": 60,
+}
+IDS = {"ip": "192.0.2.1", "email": "e"}
+T0 = 1_000_000.0  # début d'une fenêtre de 100 s
+
+
+@pytest.fixture
+def reglages():
+    with override_settings(**REGLAGES):
+        yield
+
+
+def test_client_ip_groups_ipv6_by_64():
+    rf = RequestFactory()
+    assert throttle.client_ip(rf.get("/", REMOTE_ADDR="203.0.113.9")) == "203.0.113.9"
+    a = throttle.client_ip(rf.get("/", REMOTE_ADDR="2001:db8:1:2::1"))
+    b = throttle.client_ip(rf.get("/", REMOTE_ADDR="2001:db8:1:2:ffff::9"))
+    assert a == b == "2001:db8:1:2::"
+
+
+def test_identifiants_hash_email_case_insensitive():
+    rf = RequestFactory()
+    a = throttle.identifiants(rf.post("/"), "Jean@Example.com ")
+    b = throttle.identifiants(rf.post("/"), "jean@example.com")
+    assert a == b
+    assert "jean" not in a["email"]
+    assert "email" not in throttle.identifiants(rf.post("/"), "")
+
+
+def test_progressive_delays(reglages):
+    assert throttle.echec(IDS, now=T0) == 0
+    assert throttle.echec(IDS, now=T0 + 1) == 0
+    assert throttle.echec(IDS, now=T0 + 2) == 2
+    assert throttle.attente(IDS, now=T0 + 3) == 1
+    assert throttle.attente(IDS, now=T0 + 5) == 0
+    assert throttle.echec(IDS, now=T0 + 5) == 4
+    assert throttle.echec(IDS, now=T0 + 10) == 8
+
+
+def test_max_delay(reglages):
+    delais = [throttle.echec(IDS, now=T0 + i) for i in range(12)]
+    assert max(delais) == 60
+
+
+def test_sliding_window_weights_previous_window(reglages):
+    throttle.echec(IDS, now=T0 + 90)
+    throttle.echec(IDS, now=T0 + 95)
+    # Fenêtre suivante, à 10 % : 1 + 2 × 0,9 = 2,8 échecs > 2
+    assert throttle.echec(IDS, now=T0 + 110) == 2
+    # Deux fenêtres plus tard, tout est oublié
+    assert throttle.echec(IDS, now=T0 + 300) == 0
+
+
+def test_reussite_resets_email_only(reglages):
+    for i in range(3):
+        throttle.echec(IDS, now=T0 + i)
+    throttle.reussite(IDS, now=T0 + 3)
+    assert throttle.attente({"email": "e"}, now=T0 + 3) == 0
+    assert throttle.echec({"email": "e"}, now=T0 + 4) == 0
+
+
+@override_settings(LOGIN_THROTTLE_ENABLED=False)
+def test_disabled():
+    for i in range(20):
+        assert throttle.echec(IDS, now=T0 + i) == 0
+    assert throttle.attente(IDS, now=T0 + 20) == 0
+
+
+# -------------------------------------------------------------------
+# Vue de connexion
+# -------------------------------------------------------------------
+@pytest.fixture
+def metrics_store(tmp_path):
+    with override_settings(
+        METRICS_ENABLED=True, METRICS_STORE=str(tmp_path / "m.sqlite3"), METRICS_FLUSH_INTERVAL=0
+    ):
+        reset_registry()
+        yield
+    reset_registry()
+
+
+@pytest.mark.django_db
+def test_login_rejected_without_hashing(client, reglages, metrics_store, django_assert_num_queries):
+    User.objects.create_user(username="a@example.com", email="a@example.com", password="secret")
+    url = reverse("famille:login")
+    for _ in range(3):
+        assert client.post(url, {"username": "a@example.com", "password": "faux"}).status_code == 200
+
+    # Bloqué : même le bon mot de passe est refusé, sans lire l'utilisateur
+    with django_assert_num_queries(0):
+        resp = client.post(url, {"username": "a@example.com", "password": "secret"})
+    assert resp.status_code == 429
+    assert int(resp["Retry-After"]) >= 1
+    assert "Trop de tentatives" in resp.content.decode()
+    assert "_auth_user_id" not in client.session
+
+    text = get_registry().render()
+    assert 'vlp_login_throttle_total{event="delayed",scope="email"} 1' in text
+    assert 'vlp_login_throttle_total{event="rejected",scope="email"} 1' in text
+
+
+@pytest.mark.django_db
+def test_login_success_resets_email_counter(client, reglages):
+    User.objects.create_user(username="b@example.com", email="b@example.com", password="secret")
+    url = reverse("famille:login")
+    client.post(url, {"username": "b@example.com", "password": "faux"})
+    client.post(url, {"username": "b@example.com", "password": "faux"})
+    assert client.post(url, {"username": "b@example.com", "password": "secret"}).status_code == 302
+    client.logout()
+    client.post(url, {"username": "b@example.com", "password": "faux"})
+    client.post(url, {"username": "b@example.com", "password": "faux"})
+    # Compteur remis à zéro par la connexion réussie : toujours pas de blocage
+    assert client.post(url, {"username": "b@example.com", "password": "secret"}).status_code == 302
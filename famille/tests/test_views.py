@@ -459,6 +459,73 @@ def test_manage_delete_self_parent_with_other_parent_exists(
 
 
 
+@pytest.mark.django_db
+def test_manage_post_bulk_updates_enfants(client, userprofile_parent, parent_user, famille):
+    client.force_login(parent_user)
+    lea_user = User.objects.create_user(username="lea@example.com", email="lea@example.com", password="old")
+    UserProfile.objects.create(user=lea_user, famille=famille, role="enfant")
+    lea = Enfant.objects.create(prenom="Léa", famille=famille, user=lea_user)
+    tom = Enfant.objects.create(prenom="Tom", famille=famille)
+    data = {
+        "nom": famille.nom,
+        **mgmt("parents", 1, 1),
+        "parents-0-user_id": str(parent_user.id),
+        "parents-0-first_name": parent_user.first_name,
+        "parents-0-last_name": parent_user.last_name,
+        "parents-0-email": parent_user.email,
+        "parents-0-new_password": "",
+        **mgmt("enfants", 2, 2),
+        "enfants-0-id": str(lea.id),
+        "enfants-0-famille": str(famille.id),
+        "enfants-0-prenom": "Léa",
+        "enfants-0-email": "lea.d@example.com",
+        "enfants-0-new_password": "neuf",
+        "enfants-1-id": str(tom.id),
+        "enfants-1-famille": str(famille.id),
+        "enfants-1-prenom": "Thomas",
+        "enfants-1-email": "tom@example.com",
+        "enfants-1-new_password": "pwd",
+        "enfants-1-DELETE": "",
+    }
+    resp = client.post(reverse("famille:manage_account"), data)
+    assert resp.status_code == 302
+
+    lea_user.refresh_from_db()
+    assert lea_user.email == lea_user.username == "lea.d@example.com"
+    assert lea_user.check_password("neuf")
+    tom.refresh_from_db()
+    assert tom.prenom == "Thomas"
+    assert tom.user.email == "tom@example.com"
+    assert tom.user.profile.famille == famille
+    assert list(tom.user.groups.values_list("name", flat=True)) == ["enfant"]
+
+
+@pytest.mark.django_db
+def test_manage_post_rejects_enfant_of_other_family(client, userprofile_parent, parent_user, famille):
+    client.force_login(parent_user)
+    autre = Famille.objects.create(nom="Autre")
+    intrus = Enfant.objects.create(prenom="Intrus", famille=autre)
+    data = {
+        "nom": famille.nom,
+        **mgmt("parents", 1, 1),
+        "parents-0-user_id": str(parent_user.id),
+        "parents-0-first_name": parent_user.first_name,
+        "parents-0-last_name": parent_user.last_name,
+        "parents-0-email": parent_user.email,
+        "parents-0-new_password": "",
+        **mgmt("enfants", 1, 1),
+        "enfants-0-id": str(intrus.id),
+        "enfants-0-famille": str(famille.id),
+        "enfants-0-prenom": "Volé",
+        "enfants-0-email": "",
+        "enfants-0-new_password": "",
+    }
+    resp = client.post(reverse("famille:manage_account"), data)
+    assert resp.status_code == 200  # formulaire réaffiché avec l'erreur
+    intrus.refresh_from_db()
+    assert (intrus.prenom, intrus.famille) == ("Intrus", autre)
+
+
 # ------------------------------------------------------------------
 # DeleteFamilyView
 # ------------------------------------------------------------------
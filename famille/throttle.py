@@ -0,0 +1,118 @@
+# famille/throttle.py
+"""
+Limitation des tentatives de connexion (famille:login), par IP et par email.
+
+Chaque échec incrémente deux compteurs par portée (IP, email) : celui de la
+fenêtre fixe en cours et celui de la précédente. Leur moyenne pondérée donne
+une fenêtre glissante approchée, en O(1) (deux clés de cache par portée,
+quel que soit le nombre de tentatives). Au-delà de LOGIN_THROTTLE_*_FREE
+échecs dans la fenêtre, la portée est bloquée pour un délai qui double à
+chaque nouvel échec (plafond LOGIN_THROTTLE_MAX_DELAY).
+
+Une tentative bloquée est refusée (429) AVANT le formulaire : aucun
+hachage de mot de passe, donc une rafale de "credential stuffing" ne
+coûte presque rien en CPU. Les compteurs vivent dans le cache
+LOGIN_THROTTLE_CACHE, partagé par les workers en production (fichiers).
+Délais imposés et tentatives refusées : métrique vlp_login_throttle_total.
+"""
+import hashlib
+import ipaddress
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from config import metrics
+
+PREFIX = "login-throttle"
+
+
+def _cache():
+    return caches[settings.LOGIN_THROTTLE_CACHE]
+
+
+def _metric(event, scope):
+    if getattr(settings, "METRICS_ENABLED", False):
+        metrics.get_registry().inc("login_throttle_total", {"event": event, "scope": scope})
+
+
+def client_ip(request):
+    """IP du client ; les adresses IPv6 sont regroupées par /64 (un abonné)."""
+    value = request.META.get(settings.LOGIN_THROTTLE_IP_HEADER) or request.META.get("REMOTE_ADDR", "")
+    value = value.split(",")[0].strip()
+    try:
+        ip = ipaddress.ip_address(value)
+    except ValueError:
+        return value or "inconnue"
+    if ip.version == 6:
+        return str(ipaddress.ip_network(f"{ip}/64", strict=False).network_address)
+    return str(ip)
+
+
+def identifiants(request, email):
+    """{portée: identifiant} ; l'email n'apparaît qu'haché dans les clés."""
+    ids = {"ip": client_ip(request)}
+    email = (email or "").strip().lower()
+    if email:
+        ids["email"] = hashlib.sha256(email.encode()).hexdigest()[:32]
+    return ids
+
+
+def _key(scope, ident, suffix):
+    return f"{PREFIX}:{scope}:{ident}:{suffix}"
+
+
+def attente(ids, now=None):
+    """Secondes à attendre avant une nouvelle tentative (0 : autorisée)."""
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return 0
+    now = time.time() if now is None else now
+    keys = {_key(scope, ident, "bloque"): scope for scope, ident in ids.items()}
+    wait, scope = 0, None
+    for key, until in _cache().get_many(list(keys)).items():
+        if until - now > wait:
+            wait, scope = until - now, keys[key]
+    if scope is None:
+        return 0
+    _metric("rejected", scope)
+    return math.ceil(wait)
+
+
+def echec(ids, now=None):
+    """Enregistre un échec ; renvoie le délai imposé (secondes, 0 si aucun)."""
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return 0
+    now = time.time() if now is None else now
+    window = settings.LOGIN_THROTTLE_WINDOW
+    slot = int(now // window)
+    cache = _cache()
+    delai = 0
+    for scope, ident in ids.items():
+        current = _key(scope, ident, slot)
+        cache.add(current, 0, timeout=2 * window)
+        try:
+            count = cache.incr(current)
+        except ValueError:  # expirée entre add() et incr()
+            cache.set(current, 1, timeout=2 * window)
+            count = 1
+        previous = cache.get(_key(scope, ident, slot - 1), 0)
+        estimate = count + previous * (1 - (now % window) / window)
+        excess = math.ceil(estimate - getattr(settings, f"LOGIN_THROTTLE_{scope.upper()}_FREE"))
+        if excess <= 0:
+            continue
+        d = min(settings.LOGIN_THROTTLE_BASE_DELAY * 2 ** min(excess - 1, 30), settings.LOGIN_THROTTLE_MAX_DELAY)
+        cache.set(_key(scope, ident, "bloque"), now + d, timeout=math.ceil(d))
+        _metric("delayed", scope)
+        delai = max(delai, d)
+    return delai
+
+
+def reussite(ids, now=None):
+    """Connexion réussie : l'email repart de zéro (pas l'IP, partagée par d'autres)."""
+    if "email" not in ids or not settings.LOGIN_THROTTLE_ENABLED:
+        return
+    now = time.time() if now is None else now
+    slot = int(now // settings.LOGIN_THROTTLE_WINDOW)
+    ident = ids["email"]
+    _cache().delete_many([_key("email", ident, s) for s in (slot, slot - 1, "bloque")])
@@ -1,7 +1,7 @@
 # famille/urls.py
 from django.urls import path
 from django.contrib.auth.views import LogoutView
-from .views import email_login_view, email_logout_view, register_family_view, family_manage_view, family_delete_view
+from .views import email_login_view, email_logout_view, register_family_view, family_manage_view, family_delete_view, family_export_view
 
 
 app_name = "famille"
@@ -12,4 +12,5 @@ urlpatterns = [
     path("inscription/", register_family_view, name="register"),
     path("compte/", family_manage_view, name="manage_account"),
     path("supprimer-famille/", family_delete_view, name="delete_family"),
+    path("exporter-famille/", family_export_view, name="export_family"),
 ]
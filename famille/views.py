@@ -8,10 +8,10 @@ from django.contrib.auth import (
     update_session_auth_hash,
 )
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.auth.models import Group
 from django.contrib.auth.views import LoginView, LogoutView
 from django.db import transaction
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views import View
 from django.utils.crypto import get_random_string
@@ -25,7 +25,12 @@ from .forms import (
     EnfantInlineFormSet,  # <-- gestion de compte (form modèle + champs extra)
     FamilyHardDeleteForm,
 )
-from .models import Enfant, UserProfile
+from taches.models import Tache
+from taches.queue import enqueue, executer, reserver
+from . import export, suppression, throttle
+from .comptes import creer_comptes, hash_passwords, rattacher
+from .models import Enfant, UserProfile, bump_versions
+from .taches import supprimer_famille
 
 
 User = get_user_model()
@@ -33,13 +38,6 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-# ---------- Utils ----------
-def _get_group(name: str) -> Group:
-    """Récupère ou crée un groupe par nom ('parents', 'enfant')."""
-    g, _ = Group.objects.get_or_create(name=name)
-    return g
-
-
 # View de la page d'accueil
 def landing_view(request):
     return render(request, "famille/landing.html")
@@ -58,7 +56,24 @@ class EmailLoginView(LoginView):
     authentication_form = EmailAuthenticationForm
     redirect_authenticated_user = True
 
+    def post(self, request, *args, **kwargs):
+        # Limitation (famille/throttle.py) : refus avant tout hachage
+        self.throttle_ids = throttle.identifiants(request, request.POST.get("username"))
+        wait = throttle.attente(self.throttle_ids)
+        if wait:
+            form = self.get_form_class()(request, initial={"username": request.POST.get("username", "")})
+            response = self.render_to_response(self.get_context_data(form=form, attente=wait), status=429)
+            response["Retry-After"] = str(wait)
+            return response
+        return super().post(request, *args, **kwargs)
+
+    def form_invalid(self, form):
+        if form.data.get("username") and form.data.get("password"):
+            throttle.echec(self.throttle_ids)
+        return super().form_invalid(form)
+
     def form_valid(self, form):
+        throttle.reussite(self.throttle_ids)
         response = super().form_valid(form)
         if self.request.POST.get("remember_me"):
             self.request.session.set_expiry(60 * 60 * 24 * 30)  # 30 jours
@@ -205,53 +220,46 @@ class RegisterFamilyView(View):
         # 1) Famille
         famille = famille_form.save()
 
-        # 2) Groupes
-        parents_group = _get_group("parents")
-        enfants_group = _get_group("enfant")
-
-        # 3) Parents
-        first_parent = None
-        for form in parents_valids:
-            cd = form.cleaned_data
-            user = User.objects.create_user(
-                username=cd["email"],
-                email=cd["email"],
-                password=cd["password1"],
-                first_name=cd["first_name"],
-                last_name=cd["last_name"],
-            )
-            user.groups.add(parents_group)
-            UserProfile.objects.create(
-                user=user, famille=famille, role="parent"
-            )
-            if first_parent is None:
-                first_parent = user
-
-        # 4) Enfants (+ compte user enfant optionnel)
-        for form in enfants_valids:
-            cd = form.cleaned_data
-            enfant_obj = Enfant.objects.create(
-                prenom=cd["prenom"],
+        # 2) Comptes parents et enfants : mots de passe hachés en parallèle,
+        #    insertions groupées (voir famille/comptes.py)
+        comptes = [
+            {
+                "email": f.cleaned_data["email"],
+                "password": f.cleaned_data["password1"],
+                "first_name": f.cleaned_data["first_name"],
+                "last_name": f.cleaned_data["last_name"],
+                "role": "parent",
+            }
+            for f in parents_valids
+        ]
+        comptes += [
+            {
+                "email": f.cleaned_data["email"],
+                "password": f.cleaned_data["password"],
+                "first_name": f.cleaned_data["prenom"],
+                "last_name": famille.nom,
+                "role": "enfant",
+            }
+            for f in enfants_valids
+            if f.cleaned_data.get("email")
+        ]
+        users = creer_comptes(famille, comptes)
+        first_parent = users[0] if parents_valids else None
+        comptes_enfants = iter(users[len(parents_valids):])
+
+        # 3) Enfants (+ compte user enfant optionnel)
+        Enfant.objects.bulk_create(
+            Enfant(
+                prenom=f.cleaned_data["prenom"],
                 famille=famille,
+                user=next(comptes_enfants) if f.cleaned_data.get("email") else None,
             )
-            if cd.get("email"):
-                u = User.objects.create_user(
-                    username=cd["email"],
-                    email=cd["email"],
-                    password=cd["password"],
-                    first_name=cd["prenom"],
-                    last_name=famille.nom,
-                )
-                u.groups.add(enfants_group)
-                UserProfile.objects.create(
-                    user=u, famille=famille, role="enfant"
-                )
-                enfant_obj.user = u
-                enfant_obj.save(update_fields=["user"])
+            for f in enfants_valids
+        )
 
         messages.success(request, "Famille et utilisateurs créés avec succès.")
 
-        # 5) Connexion du 1er parent
+        # 4) Connexion du 1er parent
         if first_parent:
             backend = getattr(
                 settings,
@@ -390,7 +398,7 @@ class ManageFamilyAccountView(LoginRequiredMixin, View):
             )
 
         # >>> Empêcher de finir à 0 parent via le formset
-        existing_count = parents.count()
+        existing_count = len(parent_initial)
         post_deletes = 0
         post_adds = 0
         for cd in parent_formset.cleaned_data:
@@ -467,93 +475,145 @@ class ManageFamilyAccountView(LoginRequiredMixin, View):
             return redirect("famille:manage_account")
 
         # ---------- Sauvegardes ----------
+        # Requêtes en nombre borné, quelle que soit la taille de la famille :
+        # lectures déjà faites (parents, enfants + comptes), écritures groupées.
         if famille_form.has_changed():
             famille_form.save()
 
-        parents_group = _get_group("parents")
+        # Tous les mots de passe saisis (parents et enfants) hachés en une fois,
+        # en parallèle (voir famille/comptes.py)
+        a_hacher = [
+            f
+            for f in [*parent_formset.forms, *enfant_formset.forms]
+            if (getattr(f, "cleaned_data", {}) or {}).get("new_password")
+            and not f.cleaned_data.get("DELETE")
+        ]
+        hashes = dict(zip(a_hacher, hash_passwords(f.cleaned_data["new_password"] for f in a_hacher)))
 
-        # Pass 1: create/update
-        for form in parent_formset:
-            cd = getattr(form, "cleaned_data", {}) or {}
-            if not cd or cd.get("DELETE"):
-                continue
+        self._save_parents(request, famille, parent_formset, parents, hashes)
+        self._save_enfants(famille, enfant_formset, hashes)
 
-            user_id = cd.get("user_id")
-            first = cd.get("first_name")
-            last = cd.get("last_name")
-            email = cd.get("email")
-            new_pwd = cd.get("new_password")
-
-            if user_id:
-                user = get_object_or_404(User, pk=user_id)
-                user.first_name = first
-                user.last_name = last
-                user.email = email
-                user.username = email
-                password_changed_for_current = False
-                if new_pwd:
-                    user.set_password(new_pwd)
-                    if user.pk == request.user.pk:
-                        password_changed_for_current = True
-                user.save()
-                if password_changed_for_current:
-                    update_session_auth_hash(request, user)
-                user.groups.add(parents_group)
-                UserProfile.objects.get_or_create(
-                    user=user,
-                    defaults={"famille": famille, "role": "parent"},
-                )
-            else:
-                # création : mot de passe OBLIGATOIRE (validé plus haut)
-                if not new_pwd:
-                    messages.error(request, "Mot de passe requis pour un nouveau parent.")
-                    return render(
-                        request,
-                        self.template_name,
-                        {
-                            "famille_form": famille_form,
-                            "parent_formset": parent_formset,
-                            "enfant_formset": enfant_formset,
-                        },
-                    )
-                new_user = User.objects.create_user(
-                    username=email, email=email, password=new_pwd,
-                    first_name=first, last_name=last,
-                )
-                new_user.groups.add(parents_group)
-                UserProfile.objects.create(
-                    user=new_user, famille=famille, role="parent"
-                )
+        messages.success(request, "Compte famille mis à jour.")
+        return redirect("points:dashboard")
 
-        # Pass 2: deletes (sécurisé par la validation ci-dessus)
+    def _save_parents(self, request, famille, parent_formset, parents, hashes):
+        par_id = {u.pk: u for u in parents}  # déjà évalué pour l'initial
+        a_modifier, nouveaux, a_supprimer = [], [], []
+        user_courant = None
         for form in parent_formset:
             cd = getattr(form, "cleaned_data", {}) or {}
-            if not cd or not cd.get("DELETE"):
+            if not cd:
                 continue
             user_id = cd.get("user_id")
-            if user_id:
-                user = get_object_or_404(User, pk=user_id)
-                user.delete()
+            if user_id and user_id not in par_id:
+                raise Http404("Parent inconnu dans cette famille.")
+            if cd.get("DELETE"):
+                if user_id:
+                    a_supprimer.append(user_id)
+                continue
+            if not user_id:
+                nouveaux.append(form)  # mot de passe obligatoire (validé plus haut)
+                continue
+            if not form.has_changed():
+                continue
+            user = par_id[user_id]
+            user.first_name = cd.get("first_name")
+            user.last_name = cd.get("last_name")
+            user.email = user.username = cd.get("email")
+            if cd.get("new_password"):
+                user.password = hashes[form]
+                if user.pk == request.user.pk:
+                    user_courant = user
+            a_modifier.append(user)
+
+        if a_modifier:
+            User.objects.bulk_update(a_modifier, ["first_name", "last_name", "email", "username", "password"])
+        if user_courant:
+            update_session_auth_hash(request, user_courant)
+        # Groupe 'parents' garanti (comptes antérieurs aux groupes)
+        rattacher(famille, [u for pk, u in par_id.items() if pk not in a_supprimer], "parent")
+        creer_comptes(
+            famille,
+            [
+                {
+                    "email": f.cleaned_data["email"],
+                    "password": f.cleaned_data["new_password"],
+                    "first_name": f.cleaned_data["first_name"],
+                    "last_name": f.cleaned_data["last_name"],
+                    "role": "parent",
+                }
+                for f in nouveaux
+            ],
+            hashes=[hashes[f] for f in nouveaux],
+        )
+        if a_supprimer:
+            User.objects.filter(pk__in=a_supprimer).delete()
 
-        # Enfants
+    def _save_enfants(self, famille, enfant_formset, hashes):
+        supprimes, modifies, nouveaux = [], [], []
+        a_creer, comptes_modifies, comptes_supprimes = [], [], []
         for form in enfant_formset.forms:
             cd = getattr(form, "cleaned_data", {}) or {}
             if not cd:
                 continue
             if cd.get("DELETE"):
-                inst = form.instance
-                if inst.pk and getattr(inst, "user", None):
-                    inst.user.delete()
-                if inst.pk:
-                    inst.delete()
+                if form.instance.pk:
+                    supprimes.append(form.instance)
                 continue
+            if not form.has_changed():
+                continue  # ni sauvegarde ni resynchronisation du compte
             inst = form.save(commit=False)
             inst.famille = famille
-            inst.save()
-            form.save_user(famille)
-
-        messages.success(request, "Compte famille mis à jour.")
-        return redirect("points:dashboard")
+            (modifies if inst.pk else nouveaux).append(inst)
+
+            # Compte enfant lié : créé, modifié ou supprimé par lots ci-dessous
+            email = cd.get("email") or ""
+            if not email:
+                if inst.user_id:
+                    comptes_supprimes.append(inst.user_id)
+                    inst.user = None
+            elif not inst.user_id:
+                a_creer.append(form)
+            elif "email" in form.changed_data or cd.get("new_password"):
+                inst.user.email = inst.user.username = email
+                if cd.get("new_password"):
+                    inst.user.password = hashes[form]
+                comptes_modifies.append(inst.user)
+
+        crees = creer_comptes(
+            famille,
+            [
+                {
+                    "email": f.cleaned_data["email"],
+                    "password": f.cleaned_data["new_password"],
+                    "first_name": f.cleaned_data["prenom"],
+                    "last_name": famille.nom,
+                    "role": "enfant",
+                }
+                for f in a_creer
+            ],
+            hashes=[hashes[f] for f in a_creer],
+        )
+        for form, user in zip(a_creer, crees):
+            form.instance.user = user
+        if comptes_modifies:
+            User.objects.bulk_update(comptes_modifies, ["email", "username", "password"])
+            rattacher(famille, comptes_modifies, "enfant")
+
+        if modifies:
+            Enfant.objects.bulk_update(modifies, ["prenom", "user"])
+        if nouveaux:
+            Enfant.objects.bulk_create(nouveaux)
+        if modifies or nouveaux:
+            # bulk_* n'envoie pas post_save : tampons de version à la main
+            bump_versions(enfant_ids=[e.pk for e in modifies], famille_id=famille.pk)
+
+        # Suppressions (comptes puis enfants : l'historique part en cascade)
+        comptes_supprimes += [e.user_id for e in supprimes if e.user_id]
+        if comptes_supprimes:
+            User.objects.filter(pk__in=comptes_supprimes).delete()
+        if supprimes:
+            Enfant.objects.filter(pk__in=[e.pk for e in supprimes]).delete()
 
 
 family_manage_view = ManageFamilyAccountView.as_view()
@@ -582,7 +642,7 @@ class DeleteFamilyView(LoginRequiredMixin, View):
             request, self.template_name, {"form": form, "famille": famille}
         )
 
-    @transaction.atomic
+    # Pas de transaction englobante : la suppression procède par lots courts
     def post(self, request):
         if not self._is_parent(request.user):
             messages.error(request, "Accès réservé aux parents.")
@@ -610,26 +670,49 @@ class DeleteFamilyView(LoginRequiredMixin, View):
                 request, self.template_name, {"form": form, "famille": famille}
             )
 
-        # 1) Supprimer tous les utilisateurs (parents/enfants) liés à la famille
-        users_qs = User.objects.filter(profile__famille=famille)
-        current_user_id = request.user.id
-        users_qs.delete()  # CASCADE supprime UserProfile
-
-        # 2) Supprimer la famille (CASCADE supprime Enfant, etc.)
-        famille.delete()
-
-        # 3) Déconnexion si user courant supprimé
-        if (
-            request.user.is_authenticated
-            and request.user.id == current_user_id
-        ):
-            logout(request)
+        # Comptes bloqués tout de suite (plus de connexion, sessions ouvertes
+        # des autres membres invalidées) et tâche de suppression créés
+        # ensemble. Même sans tâche de fond, la suppression passe par la
+        # file : interrompue, elle est réessayée par "manage.py run_taches"
+        # au lieu de laisser une famille à moitié supprimée.
+        with transaction.atomic():
+            suppression.desactiver_comptes(famille.pk)
+            tache = enqueue(supprimer_famille, famille_id=famille.pk, priorite=Tache.PRIORITE_HAUTE)
+        termine = False
+        if not settings.FAMILLE_SUPPRESSION_EN_TACHE:
+            reservee = reserver(pk=tache.pk)
+            termine = reservee is not None and executer(reservee) == Tache.Statut.TERMINEE
+        if termine:
+            message = "La famille et tous les comptes associés ont été supprimés définitivement."
+        else:
+            message = "La suppression de la famille et de tous les comptes associés est en cours."
 
-        messages.success(
-            request,
-            "La famille et tous les comptes associés ont été supprimés définitivement.",
-        )
+        logout(request)
+        messages.success(request, message)
         return redirect("famille:login")
 
 
 family_delete_view = DeleteFamilyView.as_view()
+
+
+class ExportFamilyView(LoginRequiredMixin, View):
+    """Téléchargement des données de la famille (ZIP produit au fil de l'eau)."""
+
+    def _is_parent(self, user):
+        try:
+            return user.profile.role == "parent"
+        except UserProfile.DoesNotExist:
+            return False
+
+    def get(self, request):
+        if not self._is_parent(request.user):
+            messages.error(request, "Accès réservé aux parents.")
+            return redirect("points:dashboard")
+        famille = request.user.profile.famille
+        response = StreamingHttpResponse(export.archive(famille), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{export.nom_archive(famille)}"'
+        response["Cache-Control"] = "private, no-store"
+        return response
+
+
+family_export_view = ExportFamilyView.as_view()
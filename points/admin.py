@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from .models import PointNegatif, PointPositif, BaremeRecompense, BaremePointPositif, BaremePointNegatif
+from .models import (
+    PointNegatif,
+    PointPositif,
+    BaremeRecompense,
+    BaremePointPositif,
+    BaremePointNegatif,
+    recalculer_solde,
+)
 
 
 # filtrer par famille
@@ -16,13 +23,33 @@ class BaremePointNegatifAdmin(admin.ModelAdmin):
     list_filter = ('famille',)
 
 # Filtrer par famille dans l'admin
+# Toute modification d'un point dans l'admin recalcule le solde de l'enfant
+# (et de l'ancien enfant si le point change d'enfant)
 
 
-class PointPositifAdmin(admin.ModelAdmin):
+class SoldeAdminMixin:
+    def save_model(self, request, obj, form, change):
+        ancien = form.initial.get("enfant") if change else None
+        super().save_model(request, obj, form, change)
+        for enfant_id in {obj.enfant_id, ancien} - {None}:
+            recalculer_solde(enfant_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recalculer_solde(obj.enfant_id)
+
+    def delete_queryset(self, request, queryset):
+        enfant_ids = set(queryset.values_list("enfant_id", flat=True))
+        super().delete_queryset(request, queryset)
+        for enfant_id in enfant_ids:
+            recalculer_solde(enfant_id)
+
+
+class PointPositifAdmin(SoldeAdminMixin, admin.ModelAdmin):
     list_filter = ('enfant__famille',)
 
 
-class PointNegatifAdmin(admin.ModelAdmin):
+class PointNegatifAdmin(SoldeAdminMixin, admin.ModelAdmin):
     list_filter = ('enfant__famille',)
 
 
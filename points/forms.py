@@ -1,5 +1,6 @@
 from django import forms
-from django.forms import ModelForm, modelformset_factory
+from django.core.exceptions import ValidationError
+from django.forms import BaseModelFormSet, ModelForm, modelformset_factory
 from crispy_forms.helper import FormHelper
 from .models import PointPositif, PointNegatif
 from .form_layouts import PointsPositifsCreationLayout, PointsNegatifsCreationLayout
@@ -10,6 +11,18 @@ ISO_FMT = "%Y-%m-%d"
 
 # ----------- FORMULAIRES CREATION (avec Layout) -----------
 
+def _creation_helper(layout_class):
+    """
+    FormHelper + Layout construits UNE fois par processus et partagés par
+    toutes les instances du formulaire : crispy ne les modifie pas au rendu
+    (l'état du rendu est stocké sur le formulaire).
+    """
+    helper = FormHelper()
+    helper.form_tag = False
+    helper.layout = layout_class()
+    return helper
+
+
 class PointsPositifsCreationForm(ModelForm):
     """Formulaire création points positifs (avec crispy layout)"""
     class Meta:
@@ -20,11 +33,7 @@ class PointsPositifsCreationForm(ModelForm):
             "motif1": forms.TextInput(attrs={"class": "form-control"}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_tag = False
-        self.helper.layout = PointsPositifsCreationLayout()
+    helper = _creation_helper(PointsPositifsCreationLayout)
 
 
 class PointsNegatifsCreationForm(ModelForm):
@@ -37,11 +46,7 @@ class PointsNegatifsCreationForm(ModelForm):
             "motif2": forms.TextInput(attrs={"class": "form-control"}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_tag = False
-        self.helper.layout = PointsNegatifsCreationLayout()
+    helper = _creation_helper(PointsNegatifsCreationLayout)
 
 
 # ----------- FORMULAIRES EDITION (pour formsets historiques) -----------
@@ -83,10 +88,53 @@ class PointNegatifEditForm(ISODateMixin, ModelForm):
 
 # ----------- FORMSETS POUR L'HISTORIQUE -----------
 
+class LigneDejaChargeeField(forms.ModelChoiceField):
+    """
+    Champ "id" des lignes d'historique : la ligne est prise parmi celles que
+    le formset a déjà chargées (une requête pour toutes) au lieu d'un SELECT
+    par ligne ; un id hors du queryset (autre enfant) est refusé.
+    """
+
+    def __init__(self, lignes, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lignes = lignes  # {pk: ligne}
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            ligne = self.lignes.get(int(value))
+        except (TypeError, ValueError):
+            ligne = None
+        if ligne is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+            )
+        return ligne
+
+
+class BaseHistoriqueFormSet(BaseModelFormSet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lignes = None
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if form.is_bound:
+            # Lignes de l'historique, lues une fois pour tous les formulaires
+            if self._lignes is None:
+                self._lignes = {ligne.pk: ligne for ligne in self.get_queryset()}
+            pk_name = self.model._meta.pk.name
+            field = form.fields[pk_name]
+            form.fields[pk_name] = LigneDejaChargeeField(
+                self._lignes, field.queryset, initial=field.initial, required=False, widget=field.widget
+            )
+
+
 PointPositifFormSet = modelformset_factory(
-    PointPositif, form=PointPositifEditForm, extra=0, can_delete=True
+    PointPositif, form=PointPositifEditForm, formset=BaseHistoriqueFormSet, extra=0, can_delete=True
 )
 
 PointNegatifFormSet = modelformset_factory(
-    PointNegatif, form=PointNegatifEditForm, extra=0, can_delete=True
+    PointNegatif, form=PointNegatifEditForm, formset=BaseHistoriqueFormSet, extra=0, can_delete=True
 )
@@ -0,0 +1,164 @@
+# points/live.py
+"""
+Soldes en direct sur le tableau de bord.
+
+Servi par ASGI (config/asgi.py), points:live est un flux SSE
+(text/event-stream) : un événement "soldes" à chaque changement des
+points de la famille du visiteur. Un seul diffuseur par processus
+surveille toutes les familles ouvertes : toutes les LIVE_CHECK_INTERVAL
+secondes, UNE requête lit leurs tampons de version (Famille.version,
+incrémenté par bump_versions à chaque écriture, quel que soit le processus
+qui écrit) ; pour une famille qui a changé, les soldes sont relus une fois
+et le message, encodé une fois, est partagé par toutes ses connexions.
+Une connexion ne coûte qu'un générateur en attente sur un asyncio.Event.
+
+Sous WSGI (Passenger), un flux occuperait un processus entier : points:live
+répond 204 (EventSource ne se reconnecte pas) et la page interroge
+points:soldes toutes les LIVE_POLL_INTERVAL secondes, avec ETag : 304 tant
+que la version de la famille ne change pas.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from famille.models import Enfant, Famille
+
+
+def etat(famille_id):
+    """{"version": ..., "soldes": {id enfant: solde}} de la famille, ou None."""
+    version = Famille.objects.filter(pk=famille_id).values_list("version", flat=True).first()
+    if version is None:
+        return None
+    soldes = Enfant.objects.filter(famille_id=famille_id).values_list("pk", "solde_points")
+    return {"version": version, "soldes": {str(pk): solde for pk, solde in soldes}}
+
+
+def _versions(famille_ids):
+    return dict(Famille.objects.filter(pk__in=famille_ids).values_list("pk", "version"))
+
+
+def message(etat):
+    """Événement SSE (bytes) ; famille supprimée : événement "fin"."""
+    if etat is None:
+        return b"event: fin\ndata: {}\n\n"
+    data = json.dumps(etat, separators=(",", ":"))
+    return f"event: soldes\nid: {etat['version']}\ndata: {data}\n\n".encode()
+
+
+class Canal:
+    """Dernier état d'une famille, partagé par toutes ses connexions."""
+
+    def __init__(self, famille_id):
+        self.famille_id = famille_id
+        self.abonnes = 0
+        self.version = None
+        self.message = None
+        self.ferme = False
+        self._evenement = asyncio.Event()
+
+    def publier(self, etat):
+        self.version = etat["version"] if etat else None
+        self.ferme = etat is None
+        self.message = message(etat)
+        evenement, self._evenement = self._evenement, asyncio.Event()
+        evenement.set()
+
+    async def attendre(self, timeout):
+        """True si un nouvel état a été publié avant `timeout` secondes."""
+        try:
+            await asyncio.wait_for(self._evenement.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class Diffuseur:
+    """Surveillance de toutes les familles ouvertes du processus (une boucle)."""
+
+    def __init__(self):
+        self.canaux = {}
+        self._ouvertures = {}  # famille_id -> lecture de l'état initial en cours
+        self._boucle = None
+
+    @staticmethod
+    async def _ouvrir(famille_id):
+        canal = Canal(famille_id)
+        canal.publier(await sync_to_async(etat)(famille_id))
+        return canal
+
+    async def abonner(self, famille_id):
+        canal = self.canaux.get(famille_id)
+        if canal is None:
+            # Un canal n'entre dans `canaux` qu'avec son état initial publié ;
+            # les abonnés arrivés pendant la lecture attendent la même lecture
+            ouverture = self._ouvertures.get(famille_id)
+            if ouverture is None:
+                ouverture = self._ouvertures[famille_id] = asyncio.ensure_future(self._ouvrir(famille_id))
+            try:
+                canal = await asyncio.shield(ouverture)
+            finally:
+                if ouverture.done() and self._ouvertures.get(famille_id) is ouverture:
+                    del self._ouvertures[famille_id]
+            canal = self.canaux.setdefault(famille_id, canal)
+        canal.abonnes += 1
+        if self._boucle is None or self._boucle.done():
+            self._boucle = asyncio.create_task(self._surveiller())
+        return canal
+
+    def desabonner(self, canal):
+        canal.abonnes -= 1
+        if canal.abonnes <= 0 and self.canaux.get(canal.famille_id) is canal:
+            del self.canaux[canal.famille_id]
+
+    async def verifier(self):
+        """Une lecture des versions pour toutes les familles ; publie les changements."""
+        canaux = dict(self.canaux)
+        if not canaux:
+            return
+        versions = await sync_to_async(_versions)(list(canaux))
+        for famille_id, canal in canaux.items():
+            version = versions.get(famille_id)
+            if version is None:
+                canal.publier(None)
+            elif version != canal.version:
+                canal.publier(await sync_to_async(etat)(famille_id))
+
+    async def _surveiller(self):
+        # S'arrête d'elle-même quand plus aucune connexion n'est ouverte
+        while self.canaux:
+            await asyncio.sleep(settings.LIVE_CHECK_INTERVAL)
+            await self.verifier()
+
+
+diffuseur = Diffuseur()
+
+
+async def flux(canal, duree=None, keepalive=None):
+    """
+    Générateur SSE d'une connexion : état courant, puis chaque changement,
+    et un commentaire toutes les `keepalive` secondes (proxys). Se termine
+    après `duree` secondes : le navigateur se reconnecte (retry).
+    """
+    duree = settings.LIVE_MAX_DURATION if duree is None else duree
+    keepalive = keepalive or settings.LIVE_KEEPALIVE
+    loop = asyncio.get_running_loop()
+    fin = loop.time() + duree
+    try:
+        vu, ferme = canal.version, canal.ferme
+        yield b"retry: 5000\n\n" + canal.message
+        if ferme:
+            return
+        while not canal.ferme and loop.time() < fin:
+            # Comparé avant d'attendre : une publication survenue pendant
+            # l'envoi précédent n'est pas perdue
+            if canal.version != vu:
+                vu = canal.version
+                yield canal.message
+            elif not await canal.attendre(min(keepalive, max(fin - loop.time(), 0))):
+                yield b": ping\n\n"
+        if canal.ferme:
+            yield canal.message
+    finally:
+        diffuseur.desabonner(canal)
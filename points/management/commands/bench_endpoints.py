@@ -0,0 +1,229 @@
+# points/management/commands/bench_endpoints.py
+import json
+import math
+import platform
+import time
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from famille.models import UserProfile
+from points.models import PointNegatif, PointPositif
+
+# Motif des points créés par le scénario new_points (supprimés en fin de mesure)
+BENCH_MOTIF = "[bench] new_points"
+
+
+def percentile(values, p):
+    """Centile par rang le plus proche (p entre 0 et 1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def compare_runs(base, current, threshold=0.10, min_ms=1.0):
+    """
+    Compare deux résultats de bench_endpoints (dicts JSON).
+
+    Régression : p50 ou p95 en hausse de plus de `threshold` (fraction) ET de
+    plus de `min_ms` (bruit de mesure), taille de réponse en hausse de plus de
+    `threshold`, ou une requête SQL de plus. Renvoie une liste de dicts
+    (page, metric, base, current, change, regression), pages communes seules.
+    """
+    rows = []
+    for page, now in current["results"].items():
+        before = base["results"].get(page)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "queries", "bytes"):
+            old, new = before[metric], now[metric]
+            change = (new - old) / old if old else (1.0 if new else 0.0)
+            if metric.endswith("_ms"):
+                regression = change > threshold and new - old > min_ms
+            elif metric == "queries":
+                regression = new > old
+            else:
+                regression = change > threshold
+            rows.append(
+                {
+                    "page": page,
+                    "metric": metric,
+                    "base": old,
+                    "current": new,
+                    "change": change,
+                    "regression": regression,
+                }
+            )
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les pages principales en interne (client de test) pour un "
+        "parent d'une base peuplée (voir seed_families) : p50/p95, requêtes SQL "
+        "et poids de réponse, en JSON. --compare A.json B.json signale les "
+        "régressions de B par rapport à A."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", help="Parent à simuler (défaut : le 1er parent ayant un enfant)")
+        parser.add_argument(
+            "--password", default="motdepasse", help="Son mot de passe (scénario famille:login)"
+        )
+        parser.add_argument("-n", type=int, default=30, help="Mesures par page")
+        parser.add_argument("--warmup", type=int, default=3, help="Requêtes d'échauffement par page")
+        parser.add_argument("--output", help="Fichier JSON de sortie (défaut : sortie standard)")
+        parser.add_argument(
+            "--compare", nargs=2, metavar=("BASE", "ACTUEL"), help="Compare deux fichiers JSON"
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=10, help="Seuil de régression, en %% (défaut : 10)"
+        )
+        parser.add_argument(
+            "--min-ms", type=float, default=1.0, help="Écart de latence ignoré en dessous (ms)"
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            return self._compare(*options["compare"], options["threshold"] / 100, options["min_ms"])
+
+        profile = self._profile(options["email"])
+        enfant = profile.famille.enfants.order_by("id").first()
+        client = Client()
+        client.force_login(profile.user)
+
+        scenarios = [
+            ("points:dashboard", client, "get", reverse("points:dashboard"), None),
+            ("points:historique", client, "get", reverse("points:historique", args=[enfant.pk]), None),
+            ("points:bareme", client, "get", reverse("points:bareme"), None),
+            (
+                "points:new_points POST",
+                client,
+                "post",
+                reverse("points:new_points", args=[enfant.pk]),
+                # +1 / -1 : le solde de l'enfant ne bouge pas
+                {"nb_positif": 1, "motif1": BENCH_MOTIF, "nb_negatif": 1, "motif2": BENCH_MOTIF},
+            ),
+            (
+                "famille:login POST",
+                None,  # client anonyme neuf à chaque mesure
+                "post",
+                reverse("famille:login"),
+                {"username": profile.user.email, "password": options["password"]},
+            ),
+            ("famille:manage_account", client, "get", reverse("famille:manage_account"), None),
+        ]
+
+        results = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                for name, scenario_client, method, url, data in scenarios:
+                    results[name] = self._measure(
+                        scenario_client, method, url, data, options["n"], options["warmup"]
+                    )
+                    if any(status >= 400 for status in results[name]["status"]):
+                        self.stderr.write(
+                            self.style.WARNING(
+                                f"{name} : HTTP {results[name]['status']} (droits du parent ?)"
+                            )
+                        )
+                    self.stderr.write(
+                        f"{name:<26} p50={results[name]['p50_ms']:.1f} ms  "
+                        f"p95={results[name]['p95_ms']:.1f} ms  {results[name]['queries']} req."
+                    )
+        finally:
+            PointPositif.objects.filter(enfant=enfant, motif1=BENCH_MOTIF).delete()
+            PointNegatif.objects.filter(enfant=enfant, motif2=BENCH_MOTIF).delete()
+
+        report = {
+            "meta": {
+                "at": timezone.now().isoformat(timespec="seconds"),
+                "email": profile.user.email,
+                "enfants": profile.famille.enfants.count(),
+                "n": options["n"],
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+            },
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+        else:
+            self.stdout.write(payload)
+
+    def _profile(self, email):
+        profiles = UserProfile.objects.select_related("user", "famille").filter(
+            role="parent", famille__enfants__isnull=False
+        )
+        if email:
+            profiles = profiles.filter(user__email__iexact=email)
+        profile = profiles.order_by("id").first()
+        if profile is None:
+            raise CommandError(
+                "Aucun parent avec au moins un enfant (peuplez la base : seed_families)."
+            )
+        return profile
+
+    def _measure(self, client, method, url, data, n, warmup):
+        timings, queries, sizes, statuses = [], [], [], set()
+
+        def count(execute, sql, params, many, context):
+            counter[0] += 1
+            return execute(sql, params, many, context)
+
+        for i in range(warmup + n):
+            # Cache vidé : on mesure la page complète, pas un fragment déjà en cache
+            cache.clear()
+            c = client or Client()
+            counter = [0]
+            with connection.execute_wrapper(count):
+                start = time.perf_counter()
+                response = getattr(c, method)(url, data)
+                elapsed = time.perf_counter() - start
+            if i < warmup:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(counter[0])
+            sizes.append(len(response.content))
+            statuses.add(response.status_code)
+
+        return {
+            "n": n,
+            "p50_ms": round(percentile(timings, 0.50), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+            "mean_ms": round(sum(timings) / n, 2),
+            "queries": max(queries),
+            "bytes": max(sizes),
+            "status": sorted(statuses),
+        }
+
+    def _compare(self, base_path, current_path, threshold, min_ms):
+        with open(base_path, encoding="utf-8") as fh:
+            base = json.load(fh)
+        with open(current_path, encoding="utf-8") as fh:
+            current = json.load(fh)
+
+        rows = compare_runs(base, current, threshold, min_ms)
+        header = f"{'page':<26}{'mesure':<9}{'base':>10}{'actuel':>10}{'écart':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            flag = "  RÉGRESSION" if row["regression"] else ""
+            self.stdout.write(
+                f"{row['page']:<26}{row['metric']:<9}{row['base']:>10}{row['current']:>10}"
+                f"{row['change']:>+9.1%}{flag}"
+            )
+
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            raise CommandError(f"{len(regressions)} régression(s) au-delà de {threshold:.0%}.")
+        self.stdout.write(self.style.SUCCESS("Aucune régression."))
@@ -0,0 +1,50 @@
+# points/management/commands/bench_new_points.py
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from famille.models import Enfant
+from points.views import NewPointsView
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le temps de construction + rendu crispy du formulaire "
+        "new_points (GET et POST invalide), sans base de données."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", type=int, default=300, help="Nombre d'itérations")
+
+    def handle(self, *args, **options):
+        n = options["n"]
+        factory = RequestFactory()
+        enfant = Enfant(pk=1, prenom="Bench", solde_points=0)
+        invalid_post = {"nb_positif": "abc", "motif1": "", "nb_negatif": "", "motif2": ""}
+
+        def render(data=None):
+            request = factory.post("/", data) if data else factory.get("/")
+            request.user = AnonymousUser()
+            forms = [form(data) if data else form() for form in NewPointsView.form_classes]
+            return render_to_string(
+                NewPointsView.template_name,
+                {"forms": forms, "enfant": enfant},
+                request=request,
+            )
+
+        for label, data in (("GET", None), ("POST invalide", invalid_post)):
+            render(data)  # échauffement (chargement des gabarits)
+            timings = []
+            for _ in range(n):
+                start = time.perf_counter()
+                render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:<14} n={n}  moyenne={statistics.mean(timings):.2f} ms  "
+                f"p50={timings[n // 2]:.2f} ms  p95={timings[int(n * 0.95) - 1]:.2f} ms"
+            )
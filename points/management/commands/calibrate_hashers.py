@@ -0,0 +1,183 @@
+# points/management/commands/calibrate_hashers.py
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandError
+
+# Planchers recommandés (OWASP, Password Storage Cheat Sheet) : la commande
+# ne descend pas en dessous, et avertit si le budget n'y suffit pas.
+ARGON2_MIN_MEMORY_KIB = 19 * 1024
+ARGON2_MAX_TIME_COST = 20
+PBKDF2_MIN_ITERATIONS = 600_000
+PBKDF2_STEP = 10_000
+PASSWORD = "calibration-mot-de-passe"
+
+
+def mesurer(hash_once, rounds=3, concurrency=1):
+    """Durée médiane (secondes) d'un hachage, `concurrency` hachages simultanés."""
+
+    def timed(_):
+        start = time.perf_counter()
+        hash_once()
+        return time.perf_counter() - start
+
+    samples = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(rounds):
+            samples.extend(pool.map(timed, range(concurrency)))
+    return statistics.median(samples)
+
+
+def argon2_duree(time_cost, memory_cost, parallelism, **kwargs):
+    hasher = hashers.Argon2PasswordHasher()
+    hasher.time_cost, hasher.memory_cost, hasher.parallelism = time_cost, memory_cost, parallelism
+    salt = hasher.salt()
+    return mesurer(lambda: hasher.encode(PASSWORD, salt), **kwargs)
+
+
+def pbkdf2_duree(iterations, **kwargs):
+    hasher = hashers.PBKDF2PasswordHasher()
+    salt = hasher.salt()
+    return mesurer(lambda: hasher.encode(PASSWORD, salt, iterations=iterations), **kwargs)
+
+
+def calibrer_argon2(budget, memory_cost, parallelism, **kwargs):
+    """
+    Plus grand time_cost tenant dans `budget` (secondes) ; si time_cost=1
+    dépasse déjà, la mémoire est divisée par deux (jusqu'au plancher).
+    Renvoie (time_cost, memory_cost, durée mesurée).
+    """
+    while True:
+        best = None
+        time_cost = 1
+        duree = argon2_duree(time_cost, memory_cost, parallelism, **kwargs)
+        while duree <= budget:
+            best = (time_cost, memory_cost, duree)
+            if time_cost >= ARGON2_MAX_TIME_COST:
+                break
+            time_cost += 1
+            duree = argon2_duree(time_cost, memory_cost, parallelism, **kwargs)
+        if best:
+            return best
+        if memory_cost <= ARGON2_MIN_MEMORY_KIB:
+            return (1, memory_cost, duree)
+        memory_cost = max(memory_cost // 2, ARGON2_MIN_MEMORY_KIB)
+
+
+def calibrer_pbkdf2(budget, **kwargs):
+    """Itérations PBKDF2-SHA256 tenant dans `budget` (coût linéaire en itérations)."""
+    echantillon = 100_000
+    duree = pbkdf2_duree(echantillon, **kwargs)
+    iterations = int(budget / duree * echantillon) // PBKDF2_STEP * PBKDF2_STEP
+    return max(iterations, PBKDF2_STEP)
+
+
+def ecrire_env(path, valeurs, entete):
+    """Remplace les clés déjà présentes dans le fichier .env, ajoute les autres."""
+    lignes = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    restantes = dict(valeurs)
+    sortie = []
+    for ligne in lignes:
+        cle = ligne.split("=", 1)[0].strip()
+        sortie.append(f"{cle}={restantes.pop(cle)}" if cle in restantes else ligne)
+    if restantes:
+        sortie += ["", f"# {entete}", *(f"{k}={v}" for k, v in restantes.items())]
+    path.write_text("\n".join(sortie) + "\n", encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les hacheurs de mots de passe sur cette machine et recommande "
+        "leurs coûts (DJANGO_ARGON2_*, DJANGO_PBKDF2_ITERATIONS) pour qu'un "
+        "hachage tienne dans le budget de temps d'une connexion. --write met "
+        "à jour un fichier .env ; les hash existants sont refaits aux "
+        "nouveaux coûts à la connexion suivante (config/hashers.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget-ms", type=float, default=250, help="Temps de hachage visé par connexion")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Hachages simultanés pendant la mesure (connexions en parallèle sur les workers)",
+        )
+        parser.add_argument("--memory-mib", type=int, default=64, help="Mémoire Argon2 maximale par hachage")
+        parser.add_argument("--parallelism", type=int, default=1, help="Voies Argon2 (1 sur un hébergement mutualisé)")
+        parser.add_argument("--rounds", type=int, default=3, help="Mesures par réglage (médiane)")
+        parser.add_argument("--write", metavar="FICHIER", help="Fichier .env à mettre à jour")
+        parser.add_argument("--json", action="store_true", help="Rapport JSON sur la sortie standard")
+
+    def handle(self, *args, **options):
+        if options["budget_ms"] <= 0 or options["concurrency"] < 1 or options["rounds"] < 1:
+            raise CommandError("--budget-ms, --concurrency et --rounds doivent être positifs.")
+        budget = options["budget_ms"] / 1000
+        kwargs = {"rounds": options["rounds"], "concurrency": options["concurrency"]}
+        memory_cost = max(options["memory_mib"] * 1024, ARGON2_MIN_MEMORY_KIB)
+        recommande = {}
+        report = {"budget_ms": options["budget_ms"], "concurrency": options["concurrency"]}
+        avertissements = []
+
+        try:
+            hashers.Argon2PasswordHasher()._load_library()
+        except ValueError:
+            avertissements.append("argon2-cffi absent : Argon2 non calibré.")
+        else:
+            report["argon2_actuel_ms"] = round(
+                1000
+                * argon2_duree(
+                    settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM, **kwargs
+                ),
+                1,
+            )
+            time_cost, memory_cost, duree = calibrer_argon2(budget, memory_cost, options["parallelism"], **kwargs)
+            report["argon2_ms"] = round(1000 * duree, 1)
+            if duree > budget:
+                avertissements.append(
+                    f"Argon2 au plancher ({memory_cost // 1024} Mio, t=1) : {duree * 1000:.0f} ms, "
+                    "au-delà du budget."
+                )
+            recommande.update(
+                {
+                    "DJANGO_ARGON2_TIME_COST": time_cost,
+                    "DJANGO_ARGON2_MEMORY_COST": memory_cost,
+                    "DJANGO_ARGON2_PARALLELISM": options["parallelism"],
+                }
+            )
+
+        iterations = calibrer_pbkdf2(budget, **kwargs)
+        if iterations < PBKDF2_MIN_ITERATIONS:
+            avertissements.append(
+                f"PBKDF2 : {iterations} itérations tiennent dans le budget, "
+                f"{PBKDF2_MIN_ITERATIONS} recommandées (plancher) malgré le dépassement."
+            )
+        recommande["DJANGO_PBKDF2_ITERATIONS"] = max(iterations, PBKDF2_MIN_ITERATIONS)
+        report.update(recommande=recommande, avertissements=avertissements)
+
+        if options["write"]:
+            entete = f"Coûts des mots de passe (calibrate_hashers, {date.today()}, budget {options['budget_ms']:g} ms)"
+            try:
+                ecrire_env(Path(options["write"]), recommande, entete)
+            except OSError as exc:
+                raise CommandError(f"Écriture impossible : {exc}") from exc
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+            return
+        if "argon2_ms" in report:
+            self.stdout.write(
+                f"Argon2 : {report['argon2_actuel_ms']} ms avec les réglages actuels, "
+                f"{report['argon2_ms']} ms recommandé"
+            )
+        for message in avertissements:
+            self.stderr.write(message)
+        for key, value in recommande.items():
+            self.stdout.write(f"{key}={value}")
+        if options["write"]:
+            self.stdout.write(f"Écrit dans {options['write']}")
@@ -0,0 +1,45 @@
+# points/management/commands/db_pool_check.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from config.db.pool import pool_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Simule N requêtes (ouverture, SELECT 1, fermeture de la connexion "
+        "Django) et affiche le nombre de connexions physiques ouvertes et le "
+        "temps moyen d'acquisition. Sans pool, chaque requête se reconnecte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", type=int, default=50, help="Nombre de requêtes simulées")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        n = options["n"]
+        connection = connections[options["database"]]
+        pooled = "pool" in connection.settings_dict.get("OPTIONS", {})
+
+        start = time.perf_counter()
+        for _ in range(n):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.close()  # fin de requête
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"backend : {connection.settings_dict['ENGINE']}")
+        self.stdout.write(f"{n} requêtes en {elapsed * 1000:.1f} ms")
+        if not pooled:
+            self.stdout.write("pool : désactivé (une connexion physique par requête)")
+            return
+        stats = pool_stats()[connection.alias]
+        acquires = stats["acquires"] or 1
+        self.stdout.write(
+            f"pool : {stats['connects']} connexion(s) physique(s), "
+            f"{stats['reuses']}/{stats['acquires']} réutilisations, "
+            f"acquisition moyenne {stats['acquire_time'] / acquires * 1000:.3f} ms, "
+            f"{stats['discarded']} jetée(s), {stats['idle']} au repos"
+        )
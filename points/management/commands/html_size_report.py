@@ -0,0 +1,66 @@
+# points/management/commands/html_size_report.py
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from config.middleware import minify_html
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le poids HTML du tableau de bord, de l'historique et des "
+        "barèmes pour un utilisateur : brut, minifié, gzip, minifié + gzip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email de l'utilisateur à simuler")
+        parser.add_argument(
+            "--enfant", type=int, help="pk de l'enfant pour l'historique (défaut : le 1er)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email__iexact=options["email"])
+        except User.DoesNotExist:
+            raise CommandError("Aucun utilisateur avec cet email.")
+
+        client = Client()
+        client.force_login(user)
+
+        urls = [
+            ("points:dashboard", reverse("points:dashboard")),
+            ("points:bareme", reverse("points:bareme")),
+        ]
+        enfant_pk = options["enfant"]
+        if enfant_pk is None:
+            famille = getattr(getattr(user, "profile", None), "famille", None)
+            enfant = famille.enfants.order_by("id").first() if famille else None
+            enfant_pk = enfant.pk if enfant else None
+        if enfant_pk is not None:
+            urls.append(
+                ("points:historique", reverse("points:historique", args=[enfant_pk]))
+            )
+
+        header = f"{'page':<20}{'brut':>10}{'minifié':>10}{'gzip':>10}{'min+gzip':>10}{'gain':>8}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        # Le HTML brut est mesuré sans la minification du middleware
+        with override_settings(HTML_MINIFY=False, ALLOWED_HOSTS=["*"]):
+            for name, url in urls:
+                resp = client.get(url)
+                if resp.status_code != 200:
+                    self.stderr.write(f"{name}: HTTP {resp.status_code}, ignoré")
+                    continue
+                raw = resp.content
+                mini = minify_html(raw.decode(resp.charset or "utf-8")).encode("utf-8")
+                raw_gz = len(gzip.compress(raw))
+                mini_gz = len(gzip.compress(mini))
+                saved = 100 * (1 - mini_gz / len(raw)) if raw else 0
+                self.stdout.write(
+                    f"{name:<20}{len(raw):>10}{len(mini):>10}{raw_gz:>10}{mini_gz:>10}{saved:>7.1f}%"
+                )
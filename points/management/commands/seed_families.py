@@ -0,0 +1,267 @@
+# points/management/commands/seed_families.py
+import datetime
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from famille.models import Enfant, Famille, UserProfile
+from points.models import (
+    BaremePointNegatif,
+    BaremePointPositif,
+    BaremeRecompense,
+    PointNegatif,
+    PointPositif,
+)
+
+User = get_user_model()
+
+PRENOMS = ("Léa", "Tom", "Emma", "Hugo", "Chloé", "Lucas", "Inès", "Nathan", "Jade", "Louis")
+MOTIFS_POSITIFS = (
+    "Ranger sa chambre",
+    "Aider aux tâches ménagères",
+    "Devoirs faits seul",
+    "Mettre la table",
+    "Être à l'heure",
+    "Lire 20 minutes",
+)
+MOTIFS_NEGATIFS = (
+    "N'écoute pas ses parents",
+    "Grossier",
+    "Dispute avec son frère",
+    "Écrans en cachette",
+    "Chambre en désordre",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des familles de test (parents, enfants, barèmes, historique de "
+        "points) par lots. Déterministe : même --seed, mêmes données. "
+        "Ex. ~1 million de lignes de points : "
+        "--familles 400 --enfants 3 --annees 2 --par-semaine 8"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--familles", type=int, default=10)
+        parser.add_argument("--parents", type=int, default=2, help="Parents par famille")
+        parser.add_argument("--enfants", type=int, default=2, help="Enfants par famille")
+        parser.add_argument(
+            "--comptes-enfants", action="store_true", help="Crée aussi un compte User par enfant"
+        )
+        parser.add_argument("--bareme", type=int, default=3, help="Lignes par barème et par famille")
+        parser.add_argument("--annees", type=float, default=1, help="Profondeur de l'historique")
+        parser.add_argument(
+            "--par-semaine", type=float, default=5, help="Lignes de points par enfant et par semaine"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix", default="seed", help="Préfixe des emails (seed-f1-p0@example.test)"
+        )
+        parser.add_argument("--password", default="motdepasse", help="Mot de passe de tous les comptes")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(
+                f"Des comptes « {prefix}-… » existent déjà : choisissez un autre --prefix."
+            )
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        # Un seul hachage (Argon2 est volontairement lent), partagé par tous les comptes
+        self.password = make_password(options["password"])
+        self.today = timezone.localdate()
+        self.days = max(1, int(options["annees"] * 365))
+        self.rows_per_child = int(options["annees"] * 52 * options["par_semaine"])
+        self.groups = {
+            name: Group.objects.get_or_create(name=name)[0] for name in ("parents", "enfant")
+        }
+        # Les droits du groupe partagé "parents" se règlent dans l'admin et n'y
+        # sont pas touchés : les parents générés reçoivent en plus un groupe
+        # propre au préfixe, qui porte les droits des pages (et de bench_endpoints)
+        self.groups["seed"] = Group.objects.get_or_create(name=f"{prefix}-parents")[0]
+        self.groups["seed"].permissions.add(
+            *Permission.objects.filter(content_type__app_label="points"),
+            *Permission.objects.filter(content_type__app_label="famille", codename__endswith="_enfant"),
+        )
+        self.counts = {"familles": 0, "users": 0, "enfants": 0, "points": 0}
+
+        start = time.perf_counter()
+        # Lots de familles : une transaction pour ~10 lots de points (SQLite : peu de fsync)
+        rows_per_famille = max(1, options["enfants"] * self.rows_per_child)
+        familles_per_batch = max(1, 10 * self.batch_size // rows_per_famille)
+        self.pending = {PointPositif: [], PointNegatif: []}
+        self.insert_sql = {
+            PointPositif: self._insert_sql(PointPositif, ("motif1", "nb_positif", "date", "enfant")),
+            PointNegatif: self._insert_sql(PointNegatif, ("motif2", "nb_negatif", "date", "enfant")),
+        }
+        # Dates possibles, déjà converties pour la base
+        self.dates = [
+            connection.ops.adapt_datefield_value(self.today - datetime.timedelta(days=d))
+            for d in range(self.days)
+        ]
+        for first in range(0, options["familles"], familles_per_batch):
+            numbers = range(first, min(first + familles_per_batch, options["familles"]))
+            with transaction.atomic():
+                self._create_batch(numbers, options)
+            self.stdout.write(
+                f"{self.counts['familles']} familles, {self.counts['points']} points "
+                f"({time.perf_counter() - start:.1f} s)"
+            )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Terminé en {elapsed:.1f} s : {self.counts['familles']} familles, "
+                f"{self.counts['users']} comptes, {self.counts['enfants']} enfants, "
+                f"{self.counts['points']} lignes de points "
+                f"({self.counts['points'] / elapsed:.0f} lignes/s)"
+            )
+        )
+
+    # ---------- Génération ----------
+    def _create_batch(self, numbers, options):
+        prefix = options["prefix"]
+        familles = Famille.objects.bulk_create(
+            [Famille(nom=f"Famille {prefix} {n}") for n in numbers], batch_size=self.batch_size
+        )
+        self.counts["familles"] += len(familles)
+
+        # Parents (+ comptes enfants), profils et groupes
+        users, roles = [], []
+        for famille, n in zip(familles, numbers):
+            for p in range(options["parents"]):
+                users.append(self._user(f"{prefix}-f{n}-p{p}", f"Parent{p}", famille.nom))
+                roles.append((famille, "parent"))
+            if options["comptes_enfants"]:
+                for e in range(options["enfants"]):
+                    users.append(self._user(f"{prefix}-f{n}-e{e}", PRENOMS[e % len(PRENOMS)], famille.nom))
+                    roles.append((famille, "enfant"))
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.counts["users"] += len(users)
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=u, famille=f, role=r) for u, (f, r) in zip(users, roles)],
+            batch_size=self.batch_size,
+        )
+        Membership = User.groups.through
+        Membership.objects.bulk_create(
+            [
+                Membership(user_id=u.pk, group_id=self.groups[group].pk)
+                for u, (_, r) in zip(users, roles)
+                for group in (("parents", "seed") if r == "parent" else ("enfant",))
+            ],
+            batch_size=self.batch_size,
+        )
+        child_users = iter([u for u, (_, r) in zip(users, roles) if r == "enfant"])
+
+        # Barèmes
+        self._create_baremes(familles, options["bareme"])
+
+        # Enfants : le solde est calculé pendant la génération de l'historique
+        enfants = []
+        for famille in familles:
+            for e in range(options["enfants"]):
+                enfants.append(
+                    Enfant(
+                        prenom=PRENOMS[e % len(PRENOMS)],
+                        famille=famille,
+                        user=next(child_users) if options["comptes_enfants"] else None,
+                    )
+                )
+        enfants = Enfant.objects.bulk_create(enfants, batch_size=self.batch_size)
+        self.counts["enfants"] += len(enfants)
+
+        for enfant in enfants:
+            enfant.solde_points = self._create_history(enfant)
+        self._flush_points(force=True)
+        Enfant.objects.bulk_update(enfants, ["solde_points"], batch_size=self.batch_size)
+
+    def _user(self, username, first_name, last_name):
+        email = f"{username}@example.test"
+        return User(
+            username=email,
+            email=email,
+            password=self.password,
+            first_name=first_name,
+            last_name=last_name,
+        )
+
+    def _create_baremes(self, familles, n):
+        rng = self.rng
+        recompenses, positifs, negatifs = [], [], []
+        for famille in familles:
+            for i in range(n):
+                points = (i + 1) * 5
+                recompenses.append(
+                    BaremeRecompense(
+                        famille=famille,
+                        points=points,
+                        valeur_euros=f"{points}€",
+                        valeur_temps=f"{points * 10} minutes",
+                    )
+                )
+                positifs.append(
+                    BaremePointPositif(famille=famille, motif=rng.choice(MOTIFS_POSITIFS), points=rng.randint(1, 3))
+                )
+                negatifs.append(
+                    BaremePointNegatif(famille=famille, motif=rng.choice(MOTIFS_NEGATIFS), points=-rng.randint(1, 3))
+                )
+        for model, rows in (
+            (BaremeRecompense, recompenses),
+            (BaremePointPositif, positifs),
+            (BaremePointNegatif, negatifs),
+        ):
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def _create_history(self, enfant):
+        """Génère l'historique de l'enfant ; renvoie le solde correspondant."""
+        rng = self.rng
+        positifs, negatifs = self.pending[PointPositif], self.pending[PointNegatif]
+        dates = self.dates
+        solde = 0
+        for _ in range(self.rows_per_child):
+            date = dates[rng.randrange(self.days)]
+            nb = rng.randint(1, 3)
+            # Environ 2 lignes positives pour 1 négative
+            if rng.random() < 0.66:
+                positifs.append((rng.choice(MOTIFS_POSITIFS), nb, date, enfant.pk))
+                solde += nb
+            else:
+                negatifs.append((rng.choice(MOTIFS_NEGATIFS), nb, date, enfant.pk))
+                solde -= nb
+        self._flush_points()
+        return solde
+
+    def _flush_points(self, force=False):
+        """
+        Insère les points en attente par lots pleins (ou tout, si force).
+        Pour ces tables (l'essentiel du volume), on passe par executemany
+        plutôt que bulk_create : instancier un million de modèles coûte à lui
+        seul plus d'une minute, et ces lignes n'ont pas de valeur calculée
+        côté Python. executemany court-circuite volontairement le post_save
+        des points (points.signals : deux UPDATE de tampons de version par
+        ligne) ; rien n'est faussé pour autant : les soldes sont calculés
+        pendant la génération et écrits ensuite (bulk_update des enfants), et
+        les familles, toutes neuves, n'ont encore aucune version servie en
+        cache (ETag) à invalider.
+        """
+        for model, rows in self.pending.items():
+            if rows and (force or len(rows) >= self.batch_size):
+                with connection.cursor() as cursor:
+                    cursor.executemany(self.insert_sql[model], rows)
+                self.counts["points"] += len(rows)
+                rows.clear()
+
+    @staticmethod
+    def _insert_sql(model, fields):
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(model._meta.get_field(f).column) for f in fields)
+        placeholders = ", ".join(["%s"] * len(fields))
+        return f"INSERT INTO {qn(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
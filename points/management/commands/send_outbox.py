@@ -0,0 +1,83 @@
+# points/management/commands/send_outbox.py
+import os
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from config.mail import OutboxBackend, deliver, get_outbox
+
+# Verrou plus vieux que ça : envoyeur mort sans nettoyer
+STALE_LOCK_SECONDS = 15 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie les mails en file (config.mail) par lots, sur une seule "
+        "connexion SMTP par lot. Un seul envoyeur à la fois (verrou dans "
+        "OUTBOX_DIR) : à lancer par cron chaque minute, ou avec --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, help="Messages par lot (défaut : OUTBOX_BATCH_SIZE)")
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--interval", type=float, default=10, help="Pause entre deux passages (--loop)")
+
+    def handle(self, *args, **options):
+        backend = settings.OUTBOX_BACKEND
+        if backend == f"{OutboxBackend.__module__}.{OutboxBackend.__name__}":
+            raise CommandError("OUTBOX_BACKEND doit être le vrai backend (SMTP), pas la boîte d'envoi.")
+
+        outbox = get_outbox()
+        lock = outbox.root / "send.lock"
+        if not self._acquire(lock):
+            self.stdout.write("Un autre envoi est en cours.")
+            return
+        try:
+            outbox.recover()
+            batch = options["batch"] or settings.OUTBOX_BATCH_SIZE
+            while True:
+                totals = self._drain(outbox, backend, batch)
+                if any(totals.values()):
+                    self.stdout.write(
+                        f"{totals['sent']} envoyé(s), {totals['grouped']} regroupé(s), "
+                        f"{totals['suppressed']} retenu(s), {totals['failed']} en échec"
+                    )
+                if not options["loop"]:
+                    break
+                lock.touch()
+                time.sleep(options["interval"])
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def _drain(self, outbox, backend, batch):
+        totals = {"sent": 0, "grouped": 0, "suppressed": 0, "failed": 0}
+        while True:
+            stats = deliver(
+                outbox,
+                get_connection(backend),
+                batch_size=batch,
+                window=settings.OUTBOX_DEDUP_WINDOW,
+            )
+            for key, value in stats.items():
+                totals[key] += value
+            # Lot incomplet : file vide. Échecs : on laisse le serveur souffler
+            if sum(stats.values()) < batch or stats["failed"]:
+                return totals
+
+    @staticmethod
+    def _acquire(lock):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime < STALE_LOCK_SECONDS:
+                    return False
+            except FileNotFoundError:  # libéré entre-temps
+                pass
+            lock.unlink(missing_ok=True)
+            return Command._acquire(lock)
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
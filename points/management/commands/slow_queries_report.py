@@ -0,0 +1,38 @@
+# points/management/commands/slow_queries_report.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.slow_queries import read_records, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Synthèse du journal des requêtes SQL lentes : formes de requêtes "
+        "les plus coûteuses (temps cumulé), avec les vues et familles concernées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="Journal à lire (défaut : SLOW_QUERY_LOG)",
+        )
+        parser.add_argument("--top", type=int, default=10, help="Nombre de formes affichées")
+
+    def handle(self, *args, **options):
+        path = options["path"] or getattr(settings, "SLOW_QUERY_LOG", "")
+        if not path:
+            raise CommandError("Aucun journal : passez un chemin ou définissez SLOW_QUERY_LOG.")
+
+        rows = summarize(read_records(path), top=options["top"])
+        if not rows:
+            self.stdout.write("Aucune requête lente enregistrée.")
+            return
+        for rank, row in enumerate(rows, 1):
+            familles = ", ".join(map(str, row["familles"][:10])) or "-"
+            self.stdout.write(
+                f"{rank}. {row['total_ms']:.0f} ms cumulés | {row['count']} fois | "
+                f"moy. {row['mean_ms']:.1f} ms | max {row['max_ms']:.1f} ms"
+            )
+            self.stdout.write(f"   vues : {', '.join(row['views'])} | familles : {familles}")
+            self.stdout.write(f"   {row['shape'][:500]}")
@@ -0,0 +1,319 @@
+# points/management/commands/stress_points.py
+import json
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from famille.models import Enfant, Famille, UserProfile
+from points.models import PointNegatif, PointPositif, solde_des_mouvements
+
+User = get_user_model()
+
+PARENT_PERMS = (
+    "view_enfant",
+    "view_pointpositif",
+    "view_pointnegatif",
+    "add_pointpositif",
+    "add_pointnegatif",
+    "change_pointpositif",
+    "change_pointnegatif",
+    "delete_pointpositif",
+    "delete_pointnegatif",
+)
+ISO = "%Y-%m-%d"
+
+
+def solde_et_mouvements(enfant_id):
+    """(solde enregistré, somme des mouvements), lus dans une seule requête."""
+    return (
+        Enfant.objects.filter(pk=enfant_id)
+        .annotate(mouvements=solde_des_mouvements())
+        .values_list("solde_points", "mouvements")
+        .get()
+    )
+
+
+# ---------- Travailleurs ----------
+class Worker:
+    """
+    Un utilisateur (parent ou admin) qui enchaîne des écritures avec son
+    propre client de test, donc sa propre connexion (un thread = une connexion).
+    """
+
+    def __init__(self, role, user_id, enfant_id, requests, seed):
+        self.role = role
+        self.user_id = user_id
+        self.enfant_id = enfant_id
+        self.requests = requests
+        self.rng = random.Random(seed)
+        self.stats = {"writes": 0, "conflicts": 0, "errors": 0, "lock_wait": 0.0, "lock_wait_max": 0.0}
+
+    def run(self):
+        client = Client()
+        client.force_login(User.objects.get(pk=self.user_id))
+        try:
+            with connection.execute_wrapper(self._time_locks):
+                for _ in range(self.requests):
+                    try:
+                        ok = self.admin_change(client) if self.role == "admin" else self.parent_write(client)
+                    except Exception as exc:  # "database is locked", deadlock MySQL...
+                        self.stats["errors"] += 1
+                        self.stats.setdefault("error_types", {}).setdefault(type(exc).__name__, 0)
+                        self.stats["error_types"][type(exc).__name__] += 1
+                        continue
+                    self.stats["writes" if ok else "conflicts"] += 1
+        finally:
+            connection.close()
+        return self.stats
+
+    def _time_locks(self, execute, sql, params, many, context):
+        # Attente de verrou : ouverture de transaction (SQLite BEGIN IMMEDIATE
+        # attend le verrou d'écriture) et lectures verrouillantes (FOR UPDATE)
+        if not (sql.startswith("BEGIN") or "FOR UPDATE" in sql):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            waited = time.perf_counter() - start
+            self.stats["lock_wait"] += waited
+            self.stats["lock_wait_max"] = max(self.stats["lock_wait_max"], waited)
+
+    def _random_point(self):
+        model = self.rng.choice((PointPositif, PointNegatif))
+        ids = list(model.objects.filter(enfant_id=self.enfant_id).values_list("pk", flat=True)[:50])
+        return (model, model.objects.filter(pk=self.rng.choice(ids)).first()) if ids else (model, None)
+
+    def parent_write(self, client):
+        if self.rng.random() < 0.7:
+            data = {
+                "nb_positif": self.rng.randint(0, 3),
+                "motif1": "stress",
+                "nb_negatif": self.rng.randint(0, 3),
+                "motif2": "stress",
+            }
+            response = client.post(reverse("points:new_points", args=[self.enfant_id]), data)
+            return response.status_code == 302
+
+        # Historique : modifie (ou supprime) une ligne existante
+        model, point = self._random_point()
+        if point is None:
+            return False
+        prefix, nb, motif = ("pp", "nb_positif", "motif1") if model is PointPositif else ("pn", "nb_negatif", "motif2")
+        other = "pn" if prefix == "pp" else "pp"
+        data = {
+            f"{prefix}-TOTAL_FORMS": 1,
+            f"{prefix}-INITIAL_FORMS": 1,
+            f"{prefix}-0-id": point.pk,
+            f"{prefix}-0-date": point.date.strftime(ISO),
+            f"initial-{prefix}-0-date": point.date.strftime(ISO),
+            f"{prefix}-0-{nb}": self.rng.randint(1, 5),
+            f"{prefix}-0-{motif}": "stress modifié",
+            f"{other}-TOTAL_FORMS": 0,
+            f"{other}-INITIAL_FORMS": 0,
+        }
+        if self.rng.random() < 0.2:
+            data[f"{prefix}-0-DELETE"] = "on"
+        response = client.post(reverse("points:historique", args=[self.enfant_id]), data)
+        # 200 : formulaire rejeté (ligne supprimée entre-temps par un autre)
+        return response.status_code == 302
+
+    def admin_change(self, client):
+        model, point = self._random_point()
+        if point is None:
+            return False
+        nb, motif = ("nb_positif", "motif1") if model is PointPositif else ("nb_negatif", "motif2")
+        opts = model._meta
+        response = client.post(
+            reverse(f"admin:{opts.app_label}_{opts.model_name}_change", args=[point.pk]),
+            {
+                "enfant": self.enfant_id,
+                "date": point.date.strftime(ISO),
+                nb: self.rng.randint(1, 5),
+                motif: "stress admin",
+                "_save": "Enregistrer",
+            },
+        )
+        changelist = reverse(f"admin:{opts.app_label}_{opts.model_name}_changelist")
+        return response.status_code == 302 and response.url.startswith(changelist)
+
+
+def run_workers(specs):
+    """Lance un thread par travailleur ; renvoie leurs statistiques."""
+    workers = [Worker(*spec) for spec in specs]
+    threads = [threading.Thread(target=w.run) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [w.stats for w in workers]
+
+
+def _process_main(specs, queue):
+    connections.close_all()  # jamais la connexion héritée du parent
+    queue.put(run_workers(specs))
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress des écritures de points : plusieurs parents et un admin modifient "
+        "le même enfant en parallèle (threads × processus) via new_points, "
+        "l'historique et l'admin. Vérifie en continu que le solde égale la somme "
+        "des mouvements ; rapporte écritures/s et attente de verrou (BEGIN / "
+        "FOR UPDATE). À lancer sur une base fichier (pas en mémoire)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Threads par processus")
+        parser.add_argument("--processes", type=int, default=2)
+        parser.add_argument("--requests", type=int, default=25, help="Écritures par thread")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Conserve la famille de test")
+        parser.add_argument("--json", action="store_true", help="Rapport JSON sur la sortie standard")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise CommandError("Base SQLite en mémoire : les processus ne la partageraient pas.")
+
+        famille, enfant, users = self._setup()
+        specs_by_process = self._specs(enfant.pk, users, options)
+        violations = []
+        try:
+            # Journaux de performance coupés : ils fausseraient la mesure
+            quiet = {"SLOW_QUERY_MS": None, "PERF_LOG_SAMPLE_RATE": 0, "PERF_LOG_SLOW_MS": float("inf")}
+            with override_settings(ALLOWED_HOSTS=["*"], DEBUG=False, **quiet):
+                start = time.perf_counter()
+                stats = self._run(specs_by_process, enfant.pk, violations)
+                elapsed = time.perf_counter() - start
+            solde, mouvements = solde_et_mouvements(enfant.pk)
+        finally:
+            if not options["keep"]:
+                famille.delete()
+                User.objects.filter(pk__in=users.values()).delete()
+
+        writes = sum(s["writes"] for s in stats)
+        lock_wait = sum(s["lock_wait"] for s in stats)
+        error_types = {}
+        for s in stats:
+            for name, n in s.get("error_types", {}).items():
+                error_types[name] = error_types.get(name, 0) + n
+        report = {
+            "database": connection.vendor,
+            "processes": options["processes"],
+            "threads": options["threads"],
+            "elapsed_s": round(elapsed, 3),
+            "writes": writes,
+            "conflicts": sum(s["conflicts"] for s in stats),
+            "errors": sum(s["errors"] for s in stats),
+            "error_types": error_types,
+            "writes_per_s": round(writes / elapsed, 1) if elapsed else 0.0,
+            "lock_wait_s": round(lock_wait, 3),
+            "lock_wait_per_write_ms": round(1000 * lock_wait / writes, 2) if writes else 0.0,
+            "lock_wait_max_ms": round(1000 * max((s["lock_wait_max"] for s in stats), default=0), 2),
+            "solde": solde,
+            "mouvements": mouvements,
+            "violations": len(violations),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report))
+        else:
+            for key, value in report.items():
+                self.stdout.write(f"{key:<24}{value}")
+        if solde != mouvements or violations:
+            raise CommandError(
+                f"Solde incohérent : {solde} enregistré pour {mouvements} de mouvements "
+                f"({len(violations)} incohérence(s) observée(s) en cours de route)."
+            )
+
+    # ---------- Préparation ----------
+    def _setup(self):
+        tag = uuid.uuid4().hex[:8]
+        famille = Famille.objects.create(nom=f"Stress {tag}")
+        enfant = Enfant.objects.create(prenom="Stress", famille=famille)
+        perms = list(Permission.objects.filter(codename__in=PARENT_PERMS))
+        users = {}
+        for role in ("parent1", "parent2", "admin"):
+            email = f"stress-{tag}-{role}@example.test"
+            user = User.objects.create_user(
+                username=email,
+                email=email,
+                password=None,
+                is_staff=role == "admin",
+                is_superuser=role == "admin",
+            )
+            if role != "admin":
+                user.user_permissions.add(*perms)
+                UserProfile.objects.create(user=user, famille=famille, role="parent")
+            users[role] = user.pk
+        # Un peu d'historique pour que l'historique et l'admin aient de quoi modifier
+        today = timezone.localdate()
+        PointPositif.objects.bulk_create(
+            [PointPositif(enfant=enfant, nb_positif=2, motif1="départ", date=today) for _ in range(10)]
+        )
+        PointNegatif.objects.bulk_create(
+            [PointNegatif(enfant=enfant, nb_negatif=1, motif2="départ", date=today) for _ in range(5)]
+        )
+        Enfant.objects.filter(pk=enfant.pk).update(solde_points=15)
+        return famille, enfant, users
+
+    def _specs(self, enfant_id, users, options):
+        """(rôle, user_id, enfant_id, écritures, graine) par thread, groupés par processus."""
+        specs = []
+        for p in range(options["processes"]):
+            specs.append([])
+            for t in range(options["threads"]):
+                # Le dernier thread du premier processus joue l'admin
+                role = "admin" if p == 0 and t == options["threads"] - 1 and t else f"parent{t % 2 + 1}"
+                specs[p].append(
+                    (role, users[role], enfant_id, options["requests"], options["seed"] * 1000 + p * 100 + t)
+                )
+        return specs
+
+    # ---------- Exécution ----------
+    def _run(self, specs_by_process, enfant_id, violations):
+        # Contrôle continu, dans une seule requête : solde == somme des mouvements
+        done = threading.Event()
+
+        def check():
+            while not done.wait(0.05):
+                solde, mouvements = solde_et_mouvements(enfant_id)
+                if solde != mouvements:
+                    violations.append((solde, mouvements))
+            connection.close()
+
+        checker = threading.Thread(target=check)
+        if len(specs_by_process) == 1:
+            checker.start()
+            try:
+                return run_workers(specs_by_process[0])
+            finally:
+                done.set()
+                checker.join()
+
+        # "fork" : les processus héritent de Django déjà configuré
+        ctx = multiprocessing.get_context("fork")
+        connections.close_all()
+        queue = ctx.Queue()
+        processes = [ctx.Process(target=_process_main, args=(specs, queue)) for specs in specs_by_process]
+        for p in processes:
+            p.start()
+        checker.start()
+        try:
+            stats = [s for _ in processes for s in queue.get()]
+        finally:
+            done.set()
+            checker.join()
+            for p in processes:
+                p.join()
+        return stats
@@ -1,8 +1,10 @@
 import datetime
 
 from django.db import models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from famille.models import Enfant, Famille
+from famille.models import Enfant, Famille, bump_versions
 
 
 class BaremeRecompense(models.Model):
@@ -55,3 +57,34 @@ class PointNegatif(models.Model):
 
     def __str__(self):
         return f"{self.enfant} {self.nb_negatif} {self.date}"
+
+
+def _total(model, field):
+    """Somme d'un champ des points de l'enfant courant (sous-requête, 0 si aucun)."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(enfant=OuterRef("pk"))
+            .values("enfant")
+            .annotate(total=Sum(field))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def solde_des_mouvements():
+    """Expression : somme des points positifs moins négatifs de l'enfant (OuterRef "pk")."""
+    return _total(PointPositif, "nb_positif") - _total(PointNegatif, "nb_negatif")
+
+
+def recalculer_solde(enfant_id):
+    """
+    Recalcule Enfant.solde_points depuis ses mouvements, en une seule requête
+    (UPDATE ... SET solde_points = (SELECT SUM ...) - (SELECT SUM ...)) : pas de
+    lecture puis écriture que deux requêtes concurrentes pourraient
+    entrelacer. Incrémente ensuite les tampons de version (update() ne
+    déclenche pas post_save).
+    """
+    Enfant.objects.filter(pk=enfant_id).update(solde_points=solde_des_mouvements())
+    bump_versions(enfant_id=enfant_id)
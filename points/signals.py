@@ -0,0 +1,43 @@
+# points/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from famille.models import Enfant, bump_versions
+from .models import (
+    BaremeRecompense,
+    BaremePointPositif,
+    BaremePointNegatif,
+    PointNegatif,
+    PointPositif,
+)
+
+# Toute écriture (vues, formsets, admin) incrémente les tampons de version
+# utilisés par les GET conditionnels (ETag / Last-Modified).
+#
+# Pas de post_delete sur les points : un récepteur empêcherait la suppression
+# rapide (un DELETE par table) des points d'un enfant supprimé, chargés alors
+# un à un. Les suppressions unitaires (historique, admin) appellent
+# recalculer_solde, qui incrémente les tampons ; celle d'un enfant, enfant_modifie.
+
+
+@receiver(post_save, sender=PointPositif)
+@receiver(post_save, sender=PointNegatif)
+def points_modifies(sender, instance, **kwargs):
+    bump_versions(enfant_id=instance.enfant_id)
+
+
+@receiver(post_save, sender=Enfant)
+@receiver(post_delete, sender=Enfant)
+def enfant_modifie(sender, instance, **kwargs):
+    bump_versions(enfant_id=instance.pk, famille_id=instance.famille_id)
+
+
+@receiver(post_save, sender=BaremeRecompense)
+@receiver(post_delete, sender=BaremeRecompense)
+@receiver(post_save, sender=BaremePointPositif)
+@receiver(post_delete, sender=BaremePointPositif)
+@receiver(post_save, sender=BaremePointNegatif)
+@receiver(post_delete, sender=BaremePointNegatif)
+def bareme_modifie(sender, instance, **kwargs):
+    if instance.famille_id is not None:
+        bump_versions(famille_id=instance.famille_id)
@@ -1,20 +1,98 @@
-console.log("Hello World");
- 
-    
- 
+// points/js/script.js : JS de l'application (chargé en "defer", après Bootstrap et HTMX)
+
 // Toggle mot de passe
-  document.addEventListener("click", function(e) {
-    if (e.target.closest(".toggle-password")) {
-      const btn = e.target.closest(".toggle-password");
-      const input = btn.previousElementSibling; // l'input est juste avant le bouton
-      const icon = btn.querySelector("i");
-
-      if (input.type === "password") {
-        input.type = "text";
-        icon.classList.replace("bi-eye", "bi-eye-slash");
-      } else {
-        input.type = "password";
-        icon.classList.replace("bi-eye-slash", "bi-eye");
+document.addEventListener("click", function (e) {
+  if (e.target.closest(".toggle-password")) {
+    const btn = e.target.closest(".toggle-password");
+    const input = btn.previousElementSibling; // l'input est juste avant le bouton
+    const icon = btn.querySelector("i");
+
+    if (input.type === "password") {
+      input.type = "text";
+      icon.classList.replace("bi-eye", "bi-eye-slash");
+    } else {
+      input.type = "password";
+      icon.classList.replace("bi-eye-slash", "bi-eye");
+    }
+  }
+});
+
+// CSRF pour HTMX
+function getCookie(name) {
+  const value = `; ${document.cookie}`;
+  const parts = value.split(`; ${name}=`);
+  if (parts.length === 2) return parts.pop().split(';').shift();
+}
+document.addEventListener('htmx:configRequest', (event) => {
+  const token = getCookie('csrftoken');
+  if (token) event.detail.headers['X-CSRFToken'] = token;
+});
+
+// Active les tooltips Bootstrap
+document.addEventListener('DOMContentLoaded', function () {
+  var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+  tooltipTriggerList.map(function (tooltipTriggerEl) {
+    return new bootstrap.Tooltip(tooltipTriggerEl);
+  });
+});
+
+// Gestion des alertes : ferme automatiquement les alerts non dangereuses
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('.alert').forEach(function (el) {
+    const isDangerOrWarning = el.classList.contains('alert-danger') || el.classList.contains('alert-warning');
+    if (!isDangerOrWarning) {
+      const inst = bootstrap.Alert.getOrCreateInstance(el);
+      setTimeout(() => inst.close(), 4000); // 4s, ajuste si besoin
+    }
+  });
+});
+
+// Soldes en direct sur le tableau de bord (voir points/live.py) : flux SSE
+// si le serveur le propose, sinon interrogation périodique (ETag => 304)
+document.addEventListener('DOMContentLoaded', function () {
+  const root = document.querySelector('[data-live-poll]');
+  if (!root) return;
+  let version = root.dataset.liveVersion;
+
+  function appliquer(etat) {
+    if (!etat || String(etat.version) === version) return;
+    version = String(etat.version);
+    const ids = Object.keys(etat.soldes);
+    // Enfant ajouté ou retiré : la page entière doit changer
+    if (ids.length !== root.querySelectorAll('[data-solde-enfant]').length) {
+      location.reload();
+      return;
+    }
+    for (const id of ids) {
+      const el = root.querySelector(`[data-solde-enfant="${id}"]`);
+      if (!el) { location.reload(); return; }
+      el.textContent = etat.soldes[id];
+    }
+  }
+
+  function interroger() {
+    const delai = (parseInt(root.dataset.liveInterval, 10) || 20) * 1000;
+    async function tour() {
+      if (!document.hidden) {
+        try {
+          const resp = await fetch(root.dataset.livePoll, { cache: 'no-cache', headers: { Accept: 'application/json' } });
+          if (resp.ok) appliquer(await resp.json());
+        } catch (e) { /* réseau coupé : on réessaie au prochain tour */ }
       }
+      setTimeout(tour, delai);
     }
-  });
\ No newline at end of file
+    setTimeout(tour, delai);
+  }
+
+  if (!root.dataset.liveSse || !window.EventSource) {
+    interroger();
+    return;
+  }
+  const source = new EventSource(root.dataset.liveSse);
+  source.addEventListener('soldes', (e) => appliquer(JSON.parse(e.data)));
+  source.addEventListener('fin', () => { source.close(); location.reload(); });
+  source.onerror = function () {
+    // Fermé définitivement (204, 403...) : repli sur l'interrogation
+    if (source.readyState === EventSource.CLOSED) interroger();
+  };
+});
@@ -0,0 +1,80 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from points.management.commands.bench_endpoints import compare_runs, percentile
+from points.models import PointPositif
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([3.0], 0.95) == 3.0
+
+
+def _run(**pages):
+    return {
+        "results": {
+            name: {"p50_ms": p50, "p95_ms": p95, "queries": q, "bytes": b}
+            for name, (p50, p95, q, b) in pages.items()
+        }
+    }
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    base = _run(dashboard=(10, 20, 7, 1000), bareme=(0.2, 0.3, 13, 500))
+    current = _run(dashboard=(10.5, 30, 8, 1050), bareme=(0.4, 0.6, 13, 500))
+
+    rows = compare_runs(base, current, threshold=0.10)
+    regressions = {(r["page"], r["metric"]) for r in rows if r["regression"]}
+    # +5 % de p50 : sous le seuil ; bareme : +100 % mais < 1 ms, donc du bruit
+    assert regressions == {("dashboard", "p95_ms"), ("dashboard", "queries")}
+
+
+def test_compare_command_fails_on_regression(tmp_path):
+    base, current = tmp_path / "a.json", tmp_path / "b.json"
+    base.write_text(json.dumps(_run(dashboard=(10, 20, 7, 1000))))
+    current.write_text(json.dumps(_run(dashboard=(10, 20, 7, 1000))))
+    call_command("bench_endpoints", compare=[str(base), str(current)], stdout=StringIO())
+
+    current.write_text(json.dumps(_run(dashboard=(10, 40, 7, 1000))))
+    with pytest.raises(CommandError):
+        call_command("bench_endpoints", compare=[str(base), str(current)], stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_bench_reports_every_page(userprofile_parent, parent_user, enfant, give_perms, tmp_path):
+    give_perms(
+        parent_user,
+        [
+            "points.view_pointpositif",
+            "points.view_pointnegatif",
+            "famille.view_enfant",
+            "points.add_pointpositif",
+            "points.add_pointnegatif",
+        ],
+    )
+    output = tmp_path / "bench.json"
+    call_command(
+        "bench_endpoints", n=2, warmup=0, password="pwd", output=str(output), stderr=StringIO()
+    )
+
+    report = json.loads(output.read_text())
+    assert set(report["results"]) == {
+        "points:dashboard",
+        "points:historique",
+        "points:bareme",
+        "points:new_points POST",
+        "famille:login POST",
+        "famille:manage_account",
+    }
+    for result in report["results"].values():
+        assert result["n"] == 2
+        assert result["p50_ms"] <= result["p95_ms"]
+        assert all(status < 400 for status in result["status"])
+    assert report["results"]["points:dashboard"]["queries"] > 0
+    # Les points créés par le scénario new_points sont nettoyés
+    assert not PointPositif.objects.exists()
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from famille.models import Enfant
+from points.models import PointNegatif, PointPositif, recalculer_solde
+
+MANAGE = Path(settings.BASE_DIR) / "manage.py"
+
+
+def _manage(db_path, *args):
+    env = {
+        **os.environ,
+        "DJANGO_SQLITE_PATH": str(db_path),
+        "DJANGO_SETTINGS_MODULE": "config.settings.dev",
+    }
+    return subprocess.run(
+        [sys.executable, str(MANAGE), *args], env=env, capture_output=True, text=True, timeout=300
+    )
+
+
+def test_stress_threads_and_processes_keep_solde_consistent(tmp_path):
+    """Parents (2 processus × 3 threads) et admin écrivent en même temps sur une base fichier."""
+    db_path = tmp_path / "stress.sqlite3"
+    assert _manage(db_path, "migrate", "-v", "0").returncode == 0
+
+    result = _manage(
+        db_path, "stress_points", "--processes", "2", "--threads", "3", "--requests", "8", "--json"
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["writes"] > 0
+    assert report["errors"] == 0
+    assert report["violations"] == 0
+    assert report["solde"] == report["mouvements"]
+    assert report["writes_per_s"] > 0
+    assert report["lock_wait_s"] >= 0
+
+
+@pytest.mark.django_db
+def test_stress_refuses_in_memory_database():
+    with pytest.raises(CommandError):
+        call_command("stress_points")
+
+
+@pytest.mark.django_db
+def test_recalculer_solde_from_movements(enfant):
+    PointPositif.objects.create(enfant=enfant, nb_positif=5)
+    PointPositif.objects.create(enfant=enfant, nb_positif=2)
+    PointNegatif.objects.create(enfant=enfant, nb_negatif=3)
+    version = Enfant.objects.get(pk=enfant.pk).version
+
+    recalculer_solde(enfant.pk)
+
+    enfant.refresh_from_db()
+    assert enfant.solde_points == 4
+    assert enfant.version > version
+
+
+@pytest.mark.django_db
+def test_admin_edit_and_delete_recompute_solde(admin_client, enfant):
+    point = PointPositif.objects.create(enfant=enfant, nb_positif=2)
+    point.refresh_from_db()  # date relue en date (le défaut est timezone.now)
+    recalculer_solde(enfant.pk)
+
+    resp = admin_client.post(
+        reverse("admin:points_pointpositif_change", args=[point.pk]),
+        {"enfant": enfant.pk, "date": point.date.isoformat(), "nb_positif": 7, "motif1": "x"},
+    )
+    assert resp.status_code == 302
+    enfant.refresh_from_db()
+    assert enfant.solde_points == 7
+
+    admin_client.post(reverse("admin:points_pointpositif_delete", args=[point.pk]), {"post": "yes"})
+    enfant.refresh_from_db()
+    assert enfant.solde_points == 0
@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+from config.db.pool import ConnectionPool, PooledDatabaseWrapperMixin, PoolTimeout, pool_stats, reset_pools
+
+
+@pytest.fixture
+def sqlite_pool(tmp_path):
+    path = tmp_path / "pool.sqlite3"
+
+    def make(**options):
+        return ConnectionPool(
+            lambda: sqlite3.connect(path, check_same_thread=False),
+            ping=lambda conn: conn.execute("SELECT 1"),
+            **options,
+        )
+
+    return make
+
+
+@pytest.fixture
+def pooled_connections(tmp_path, django_db_blocker):
+    """Un alias "pooled" servi par le backend config.db.pooled_sqlite."""
+    settings_dict = {
+        **connection.settings_dict,
+        "ENGINE": "config.db.pooled_sqlite",
+        "NAME": str(tmp_path / "pooled.sqlite3"),
+        "OPTIONS": {"pool": {"max_size": 2, "idle_timeout": 60}},
+        "TEST": {},
+    }
+    handler = ConnectionHandler(
+        {"default": connection.settings_dict, "pooled": settings_dict}
+    )
+    reset_pools()
+    with django_db_blocker.unblock():
+        yield handler
+        handler.close_all()
+    reset_pools()
+
+
+# -------------------------------------------------------------------
+# ConnectionPool
+# -------------------------------------------------------------------
+def test_pool_reuses_released_connection(sqlite_pool):
+    pool = sqlite_pool()
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.stats["connects"] == 1
+    assert pool.stats["reuses"] == 1
+
+
+def test_pool_drops_idle_connections(sqlite_pool):
+    pool = sqlite_pool(idle_timeout=0)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is not first
+    assert pool.stats["connects"] == 2
+    assert pool.stats["discarded"] == 1
+
+
+def test_pool_health_check_discards_dead_connection(sqlite_pool):
+    pool = sqlite_pool()
+    first = pool.acquire()
+    pool.release(first)
+    first.close()  # connexion coupée côté serveur
+    second = pool.acquire()
+    assert second is not first
+    second.execute("SELECT 1")
+    assert pool.stats["discarded"] == 1
+
+
+def test_slow_health_check_does_not_block_other_threads(tmp_path):
+    lente = threading.Event()
+    debloque = threading.Event()
+    conns = []
+
+    def ping(conn):
+        if conn is conns[1]:
+            lente.set()
+            debloque.wait(5)
+
+    pool = ConnectionPool(
+        lambda: sqlite3.connect(tmp_path / "pool.sqlite3", check_same_thread=False),
+        ping=ping,
+        max_size=2,
+    )
+    conns += [pool.acquire(), pool.acquire()]
+    for conn in conns:
+        pool.release(conn)
+
+    # Le ping de la connexion « chaude » (conns[1]) traîne dans un autre thread
+    got = []
+    bloque = threading.Thread(target=lambda: got.append(pool.acquire()))
+    bloque.start()
+    assert lente.wait(2)
+    debut = time.monotonic()
+    assert pool.acquire() is conns[0]
+    assert time.monotonic() - debut < 1  # le verrou n'est pas tenu pendant ce ping
+    pool.release(conns[0])
+    assert pool.snapshot()["idle"] == 1
+    debloque.set()
+    bloque.join(2)
+    assert got == [conns[1]]
+
+
+def test_pool_waits_then_times_out_when_full(sqlite_pool):
+    pool = sqlite_pool(max_size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats["timeouts"] == 1
+
+    # Une connexion rendue réveille un thread en attente
+    pool.timeout = 5
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(held)
+    waiter.join(2)
+    assert got == [held]
+
+
+def test_pool_counters_consistent_under_concurrency(sqlite_pool):
+    pool = sqlite_pool(max_size=8)
+    depart = threading.Barrier(8)
+
+    def travail():
+        depart.wait()
+        for _ in range(20):
+            pool.release(pool.acquire())
+
+    threads = [threading.Thread(target=travail) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snap = pool.snapshot()
+    assert snap["acquires"] == 160
+    assert snap["connects"] == snap["size"] == snap["idle"] <= 8
+    assert snap["acquires"] - snap["reuses"] == snap["connects"]
+
+
+def test_pool_min_size_prewarms(sqlite_pool):
+    pool = sqlite_pool(min_size=2)
+    assert pool.snapshot()["idle"] == 2
+    pool.acquire()
+    assert pool.stats["connects"] == 2
+
+
+# -------------------------------------------------------------------
+# Backend Django
+# -------------------------------------------------------------------
+def test_pooled_backend_reuses_connection_across_requests(pooled_connections):
+    conn = pooled_connections["pooled"]
+    for _ in range(5):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+        conn.close()  # fin de requête Django
+
+    stats = pool_stats()["pooled"]
+    assert stats["connects"] == 1
+    assert stats["acquires"] == 5
+    assert stats["idle"] == 1
+
+
+def test_pooled_backend_builds_params_once(pooled_connections, monkeypatch):
+    conn = pooled_connections["pooled"]
+    appels = []
+    get_params = type(conn).get_connection_params
+    monkeypatch.setattr(
+        type(conn), "get_connection_params", lambda self: appels.append(self) or get_params(self)
+    )
+    for _ in range(3):
+        conn.ensure_connection()
+        conn.close()
+    # Django en calcule à chaque connect() (ignorés : le pool prête sa
+    # connexion) ; le pool, une seule fois, sur son propre wrapper
+    pour_le_pool = [w for w in appels if w is not conn]
+    assert len(appels) == 3 + 1 and len(pour_le_pool) == 1
+    assert pool_stats()["pooled"]["connects"] == 1
+
+
+def test_default_pool_ping_runs_select_1():
+    conn = sqlite3.connect(":memory:")
+    PooledDatabaseWrapperMixin._pool_ping(None, conn)
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        PooledDatabaseWrapperMixin._pool_ping(None, conn)
+
+
+def test_pooled_backend_rolls_back_before_release(pooled_connections):
+    conn = pooled_connections["pooled"]
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TABLE t (x INTEGER)")
+    conn.set_autocommit(False)
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO t VALUES (1)")
+    conn.close()  # transaction non validée : annulée avant le retour au pool
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM t")
+        assert cursor.fetchone() == (0,)
+    assert pool_stats()["pooled"]["connects"] == 1
+
+
+def test_db_pool_check_command(pooled_connections, capsys, monkeypatch):
+    monkeypatch.setattr(
+        "points.management.commands.db_pool_check.connections", pooled_connections
+    )
+    call_command("db_pool_check", n=10, database="pooled")
+    out = capsys.readouterr().out
+    assert "1 connexion(s) physique(s)" in out
+    assert "9/10 réutilisations" in out
@@ -53,6 +53,12 @@ def test_points_negatifs_creation_form_structure():
     assert isinstance(form.helper.layout, PointsNegatifsCreationLayout)
 
 
+def test_creation_forms_share_one_helper_per_process():
+    assert PointsPositifsCreationForm().helper is PointsPositifsCreationForm().helper
+    assert PointsNegatifsCreationForm().helper is PointsNegatifsCreationForm().helper
+    assert PointsPositifsCreationForm().helper is not PointsNegatifsCreationForm().helper
+
+
 @pytest.mark.django_db
 def test_points_positifs_creation_form_save_with_enfant(enfant):
     data = {"nb_positif": 4, "motif1": "Devoirs faits"}
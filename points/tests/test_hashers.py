@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from points.management.commands.calibrate_hashers import PBKDF2_MIN_ITERATIONS, ecrire_env
+
+User = get_user_model()
+
+# Coûts Argon2 réduits : les tests restent rapides
+ARGON2_LEGER = {"ARGON2_TIME_COST": 1, "ARGON2_MEMORY_COST": 8192, "ARGON2_PARALLELISM": 1}
+
+
+def test_ecrire_env_replaces_and_appends(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("DJANGO_DEBUG=False\nDJANGO_ARGON2_TIME_COST=2\n", encoding="utf-8")
+    ecrire_env(env, {"DJANGO_ARGON2_TIME_COST": 3, "DJANGO_PBKDF2_ITERATIONS": 700000}, "Coûts")
+    assert env.read_text(encoding="utf-8").splitlines() == [
+        "DJANGO_DEBUG=False",
+        "DJANGO_ARGON2_TIME_COST=3",
+        "",
+        "# Coûts",
+        "DJANGO_PBKDF2_ITERATIONS=700000",
+    ]
+
+
+def test_calibrate_hashers_json_and_write(tmp_path, capsys):
+    env = tmp_path / ".env"
+    call_command(
+        "calibrate_hashers", "--budget-ms", "20", "--rounds", "1", "--memory-mib", "19", "--json", "--write", str(env)
+    )
+    report = json.loads(capsys.readouterr().out)
+    recommande = report["recommande"]
+    assert recommande["DJANGO_ARGON2_PARALLELISM"] == 1
+    assert recommande["DJANGO_ARGON2_TIME_COST"] >= 1
+    assert recommande["DJANGO_ARGON2_MEMORY_COST"] == 19 * 1024
+    assert recommande["DJANGO_PBKDF2_ITERATIONS"] % 10_000 == 0
+    written = env.read_text(encoding="utf-8")
+    for key, value in recommande.items():
+        assert f"{key}={value}" in written
+
+
+def test_calibrate_hashers_never_recommends_pbkdf2_below_floor(capsys):
+    # 1 ms : bien moins que le plancher de 600 000 itérations sur toute machine
+    call_command("calibrate_hashers", "--budget-ms", "1", "--rounds", "1", "--memory-mib", "19", "--json")
+    report = json.loads(capsys.readouterr().out)
+    assert report["recommande"]["DJANGO_PBKDF2_ITERATIONS"] == PBKDF2_MIN_ITERATIONS
+    assert any(a.startswith("PBKDF2") for a in report["avertissements"])
+
+
+@override_settings(**ARGON2_LEGER)
+def test_argon2_costs_come_from_settings():
+    encoded = make_password("secret")
+    decoded = get_hasher("argon2").decode(encoded)
+    assert (decoded["time_cost"], decoded["memory_cost"], decoded["parallelism"]) == (1, 8192, 1)
+    assert not get_hasher("argon2").must_update(encoded)
+    with override_settings(ARGON2_TIME_COST=2):
+        assert get_hasher("argon2").must_update(encoded)
+
+
+def _login(client, email, password):
+    return client.post(reverse("famille:login"), {"username": email, "password": password})
+
+
+@pytest.mark.django_db
+@override_settings(**ARGON2_LEGER)
+def test_login_rehashes_with_new_costs(client):
+    user = User.objects.create_user(username="a@example.com", email="a@example.com", password="secret")
+    with override_settings(ARGON2_TIME_COST=2):
+        assert _login(client, "a@example.com", "secret").status_code == 302
+    user.refresh_from_db()
+    assert get_hasher("argon2").decode(user.password)["time_cost"] == 2
+    assert user.check_password("secret")
+
+
+@pytest.mark.django_db
+@override_settings(**ARGON2_LEGER)
+def test_login_upgrades_pbkdf2_to_argon2(client):
+    user = User.objects.create(
+        username="b@example.com", email="b@example.com", password=make_password("secret", hasher="pbkdf2_sha256")
+    )
+    assert _login(client, "b@example.com", "secret").status_code == 302
+    user.refresh_from_db()
+    assert user.password.startswith("argon2$")
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from famille.models import Enfant, UserProfile
+from points import live
+from points.models import PointPositif
+
+
+def _evenements(donnees):
+    """Événements "soldes" d'un morceau de flux SSE."""
+    return [
+        json.loads(bloc.split("data: ", 1)[1])
+        for bloc in donnees.decode().split("\n\n")
+        if bloc.startswith("event: soldes") or "\nevent: soldes" in bloc
+    ]
+
+
+@pytest.mark.django_db
+def test_etat(famille, enfant):
+    famille.refresh_from_db()
+    assert live.etat(famille.pk) == {"version": famille.version, "soldes": {str(enfant.pk): 0}}
+    assert live.etat(famille.pk + 1000) is None
+    assert live.message(None).startswith(b"event: fin")
+
+
+@pytest.mark.django_db
+def test_soldes_view_json_then_304(parent_dashboard, famille, enfant):
+    url = reverse("points:soldes")
+    resp = parent_dashboard.get(url)
+    assert resp.status_code == 200
+    assert resp.json()["soldes"] == {str(enfant.pk): 0}
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 304
+
+    PointPositif.objects.create(enfant=enfant, nb_positif=3)
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_soldes_view_requires_dashboard_perms(client, userprofile_parent, parent_user):
+    client.force_login(parent_user)
+    assert client.get(reverse("points:soldes")).status_code == 403
+
+
+@pytest.mark.django_db
+@override_settings(LIVE_SSE=True)
+def test_live_under_wsgi_is_no_content(parent_dashboard):
+    # Passenger (WSGI) : pas de flux, la page se rabat sur points:soldes
+    assert parent_dashboard.get(reverse("points:live")).status_code == 204
+
+
+@pytest.mark.django_db
+def test_dashboard_exposes_live_settings(parent_dashboard, famille, enfant):
+    html = parent_dashboard.get(reverse("points:dashboard")).content.decode()
+    assert f'data-solde-enfant="{enfant.pk}"' in html
+    assert reverse("points:soldes") in html
+    assert reverse("points:live") not in html  # LIVE_SSE désactivé (WSGI)
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(LIVE_SSE=True, LIVE_CHECK_INTERVAL=3600, LIVE_KEEPALIVE=5, LIVE_MAX_DURATION=60)
+def test_sse_single_fan_out_per_family(famille, autre_famille, parent_user, autre_parent_user):
+    lea = Enfant.objects.create(prenom="Léa", famille=famille)
+    Enfant.objects.create(prenom="Tom", famille=autre_famille)
+    UserProfile.objects.create(user=parent_user, famille=famille, role="parent")
+    UserProfile.objects.create(user=autre_parent_user, famille=autre_famille, role="parent")
+    perms = list(Permission.objects.filter(codename__in=["view_pointpositif", "view_pointnegatif"]))
+    for user in (parent_user, autre_parent_user):
+        user.user_permissions.add(*perms)
+
+    async def scenario():  # plusieurs connexions SSE dans une même boucle
+        clients = [AsyncClient(), AsyncClient(), AsyncClient()]
+        await clients[0].aforce_login(parent_user)
+        await clients[1].aforce_login(parent_user)  # deux onglets, même famille
+        await clients[2].aforce_login(autre_parent_user)
+        flux = []
+        for c in clients:
+            resp = await c.get(reverse("points:live"))
+            assert resp.status_code == 200
+            assert resp["Content-Type"] == "text/event-stream"
+            flux.append(resp.streaming_content)
+        # Un canal par famille, partagé par ses connexions
+        assert set(live.diffuseur.canaux) == {famille.pk, autre_famille.pk}
+        assert live.diffuseur.canaux[famille.pk].abonnes == 2
+
+        premiers = [_evenements(await anext(f)) for f in flux]
+        assert premiers[0][0]["soldes"] == {str(lea.pk): 0}
+
+        await sync_to_async(PointPositif.objects.create)(enfant=lea, nb_positif=4)
+        await sync_to_async(Enfant.objects.filter(pk=lea.pk).update)(solde_points=4)
+        await live.diffuseur.verifier()  # ce que fait la boucle du diffuseur
+        canal = live.diffuseur.canaux[famille.pk]
+        # Même message (bytes) pour les deux onglets : encodé une seule fois
+        suivants = [await asyncio.wait_for(anext(f), 1) for f in flux[:2]]
+        assert suivants[0] is suivants[1] is canal.message
+        assert _evenements(suivants[0])[0]["soldes"] == {str(lea.pk): 4}
+        # L'autre famille n'a rien reçu
+        assert live.diffuseur.canaux[autre_famille.pk].version == premiers[2][0]["version"]
+
+        # Déconnexion : le serveur ASGI annule la tâche qui attend le flux
+        attentes = [asyncio.create_task(anext(f)) for f in flux]
+        await asyncio.sleep(0.05)
+        for t in attentes:
+            t.cancel()
+        await asyncio.gather(*attentes, return_exceptions=True)
+        assert live.diffuseur.canaux == {}
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_subscribers_share_initial_state(monkeypatch):
+    lectures = []
+
+    def etat_lent(famille_id):
+        lectures.append(famille_id)
+        time.sleep(0.05)  # deuxième abonné arrivé pendant la lecture
+        return {"version": 3, "soldes": {"1": 7}}
+
+    monkeypatch.setattr(live, "etat", etat_lent)
+    diffuseur = live.Diffuseur()
+
+    async def scenario():
+        a, b = await asyncio.gather(diffuseur.abonner(42), diffuseur.abonner(42))
+        assert a is b is diffuseur.canaux[42]
+        assert a.abonnes == 2
+        assert a.message.startswith(b"event: soldes")
+        diffuseur._boucle.cancel()
+
+    asyncio.run(scenario())
+    assert lectures == [42]
+
+
+def test_failed_initial_state_leaves_no_channel(monkeypatch):
+    def etat_en_echec(famille_id):
+        time.sleep(0.02)
+        raise RuntimeError("base indisponible")
+
+    monkeypatch.setattr(live, "etat", etat_en_echec)
+    diffuseur = live.Diffuseur()
+
+    async def scenario():
+        resultats = await asyncio.gather(
+            diffuseur.abonner(42), diffuseur.abonner(42), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in resultats)
+
+    asyncio.run(scenario())
+    assert diffuseur.canaux == {} and diffuseur._ouvertures == {}
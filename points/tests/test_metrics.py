@@ -0,0 +1,84 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from config.metrics import MemoryStore, MetricsRegistry, SQLiteStore, reset_registry
+
+
+@pytest.fixture
+def shared_store(tmp_path):
+    """Registre du processus branché sur un fichier SQLite temporaire."""
+    path = tmp_path / "metrics.sqlite3"
+    with override_settings(METRICS_STORE=str(path), METRICS_FLUSH_INTERVAL=0):
+        reset_registry()
+        yield path
+    reset_registry()
+
+
+# -------------------------------------------------------------------
+# Registre
+# -------------------------------------------------------------------
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(MemoryStore())
+    registry.observe_request("points:dashboard", 200, 0.03, 4)
+    registry.observe_request("points:dashboard", 200, 0.3, 12)
+    text = registry.render()
+
+    name = "vlp_http_request_duration_seconds_bucket"
+    assert f'{name}{{view="points:dashboard",le="0.025"}} 0' in text
+    assert f'{name}{{view="points:dashboard",le="0.05"}} 1' in text
+    assert f'{name}{{view="points:dashboard",le="0.5"}} 2' in text
+    assert f'{name}{{view="points:dashboard",le="+Inf"}} 2' in text
+    assert 'vlp_http_request_duration_seconds_count{view="points:dashboard"} 2' in text
+    assert 'vlp_http_requests_total{status="200",view="points:dashboard"} 2' in text
+    assert 'vlp_http_request_db_queries_sum{view="points:dashboard"} 16' in text
+    assert "# TYPE vlp_http_request_duration_seconds histogram" in text
+
+
+def test_sqlite_store_aggregates_workers(tmp_path):
+    path = tmp_path / "metrics.sqlite3"
+    # Deux "workers" : chacun son registre, même fichier
+    worker1 = MetricsRegistry(SQLiteStore(path), flush_interval=3600)
+    worker2 = MetricsRegistry(SQLiteStore(path), flush_interval=3600)
+    worker1.observe_request("famille:login", 200, 0.01, 1)
+    worker2.observe_request("famille:login", 302, 0.02, 3)
+    worker1.flush()
+
+    text = worker2.render()  # flush de worker2 puis lecture du total
+    assert 'vlp_http_request_duration_seconds_count{view="famille:login"} 2' in text
+    assert 'vlp_http_requests_total{status="302",view="famille:login"} 1' in text
+
+
+# -------------------------------------------------------------------
+# Middleware + endpoint
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_requests_are_recorded_per_url_name(parent_dashboard, enfant, shared_store):
+    parent_dashboard.get(reverse("points:dashboard"))
+    parent_dashboard.get(reverse("points:historique", args=[enfant.pk]))
+
+    store = SQLiteStore(shared_store).read()
+    assert store[("http_request_duration_seconds_count", '{"view": "points:dashboard"}')] == 1
+    assert store[("http_requests_total", '{"status": "200", "view": "points:historique"}')] == 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_is_staff_only(parent_dashboard, parent_user, shared_store):
+    url = reverse("metrics")
+    assert parent_dashboard.get(url).status_code == 403
+
+    parent_user.is_staff = True
+    parent_user.save(update_fields=["is_staff"])
+    resp = parent_dashboard.get(url)
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    # La première requête (refusée) est déjà comptée
+    assert 'vlp_http_requests_total{status="403",view="metrics"} 1' in resp.content.decode()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_accepts_bearer_token(client, shared_store):
+    with override_settings(METRICS_TOKEN="s3cret"):
+        assert client.get(reverse("metrics")).status_code == 403
+        resp = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+    assert resp.status_code == 200
@@ -0,0 +1,184 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from config.middleware import minify_html
+from points.models import PointPositif
+
+
+# -------------------------------------------------------------------
+# minify_html
+# -------------------------------------------------------------------
+def test_minify_html_collapses_text_whitespace():
+    html = "<div>\n    <p>  Bonjour   toi </p>\n\n</div>"
+    assert minify_html(html) == "<div>\n<p> Bonjour toi </p>\n</div>"
+
+
+def test_minify_html_keeps_attributes_and_csrf_token():
+    html = (
+        '<input type="hidden" name="csrfmiddlewaretoken" value="abc  def">\n'
+        '   <input value="deux  espaces">'
+    )
+    out = minify_html(html)
+    assert 'value="abc  def"' in out
+    assert 'value="deux  espaces"' in out
+
+
+def test_minify_html_keeps_quoted_greater_than_in_attributes():
+    html = '<a title="a > b   c" data-x=\'1 >  2\'>  lien  </a>'
+    assert minify_html(html) == '<a title="a > b   c" data-x=\'1 >  2\'> lien </a>'
+
+
+def test_minify_html_keeps_protected_blocks():
+    html = "<pre>  a\n   b</pre>   <textarea>  x  </textarea>\n  <script>\n  var a;\n</script>"
+    assert minify_html(html) == "<pre>  a\n   b</pre> <textarea>  x  </textarea>\n<script>\n  var a;\n</script>"
+
+
+# -------------------------------------------------------------------
+# Middlewares
+# -------------------------------------------------------------------
+@pytest.fixture
+def historique_parent(client, userprofile_parent, parent_user, enfant, give_perms):
+    give_perms(
+        parent_user,
+        ["points.change_pointpositif", "points.change_pointnegatif"],
+    )
+    PointPositif.objects.bulk_create(
+        [
+            PointPositif(enfant=enfant, nb_positif=1, motif1=f"m{i}", date=timezone.now().date())
+            for i in range(30)
+        ]
+    )
+    client.force_login(parent_user)
+    return reverse("points:historique", args=[enfant.pk])
+
+
+@pytest.mark.django_db
+@override_settings(HTML_MINIFY=True)
+def test_html_minified_and_gzipped(client, historique_parent):
+    raw = client.get(historique_parent, HTTP_ACCEPT_ENCODING="gzip")
+    assert raw["Content-Encoding"] == "gzip"
+    html = gzip.decompress(raw.content).decode()
+    assert "    <tr>" not in html
+    assert "\n<tr>" in html
+    assert 'name="csrfmiddlewaretoken"' in html
+
+
+@pytest.mark.django_db
+def test_html_minify_setting_read_per_request(client, historique_parent):
+    # Même client, donc même chaîne de middlewares
+    with override_settings(HTML_MINIFY=False):
+        assert "    <tr>" in client.get(historique_parent).content.decode()
+    with override_settings(HTML_MINIFY=True):
+        assert "    <tr>" not in client.get(historique_parent).content.decode()
+
+
+@pytest.mark.django_db
+@override_settings(HTML_MINIFY=True, HTML_MINIFY_URLS=[])
+def test_html_minify_respects_paths(client, historique_parent):
+    html = client.get(historique_parent).content.decode()
+    assert "    <tr>" in html
+
+
+@pytest.mark.django_db
+def test_static_images_not_recompressed(client):
+    from django.http import HttpResponse
+    from config.middleware import CompressionMiddleware
+
+    response = HttpResponse(b"\x89PNG" * 200, content_type="image/png")
+    middleware = CompressionMiddleware(lambda r: response)
+    request = client.get(reverse("famille:login")).wsgi_request
+    request.META["HTTP_ACCEPT_ENCODING"] = "gzip"
+    assert not middleware(request).has_header("Content-Encoding")
+
+
+@pytest.mark.django_db
+def test_html_size_report_command(historique_parent, parent_user, capsys):
+    call_command("html_size_report", parent_user.email)
+    out = capsys.readouterr().out
+    assert "points:bareme" in out
+    assert "points:historique" in out
+
+
+# -------------------------------------------------------------------
+# PerformanceMiddleware (Server-Timing, log [PERF])
+# -------------------------------------------------------------------
+@pytest.fixture
+def staff_dashboard(parent_dashboard, parent_user):
+    parent_user.is_staff = True
+    parent_user.save(update_fields=["is_staff"])
+    return parent_dashboard
+
+
+def _perf_lines(caplog):
+    return [r.getMessage() for r in caplog.records if r.name == "config.perf"]
+
+
+def _timings(response):
+    return {
+        part.split(";")[0].strip(): part for part in response["Server-Timing"].split(",")
+    }
+
+
+@pytest.mark.django_db
+def test_server_timing_header_for_staff(staff_dashboard, enfant):
+    resp = staff_dashboard.get(reverse("points:dashboard"))
+    timings = _timings(resp)
+    assert set(timings) == {"app", "db", "tpl", "cache"}
+    assert "requetes" in timings["db"]
+    assert not timings["db"].endswith('"0 requetes"')
+    # Carte enfant : fragment absent du cache au premier affichage
+    assert "miss=1" in timings["cache"]
+
+    resp = staff_dashboard.get(reverse("points:dashboard"))
+    assert "hit=1" in _timings(resp)["cache"]
+
+
+@pytest.mark.django_db
+def test_no_server_timing_for_regular_users(parent_dashboard, enfant):
+    resp = parent_dashboard.get(reverse("points:dashboard"))
+    assert "Server-Timing" not in resp
+
+
+def test_server_timing_never_loads_the_user(rf):
+    from django.utils.functional import SimpleLazyObject
+    from config.middleware import PerformanceMiddleware
+
+    def charger():
+        raise AssertionError("utilisateur chargé par le middleware")
+
+    request = rf.get("/")
+    request.user = SimpleLazyObject(charger)  # comme AuthenticationMiddleware
+    assert not PerformanceMiddleware._is_staff(request)
+
+
+@pytest.mark.django_db
+def test_perf_log_line_is_sampled(parent_dashboard, enfant, caplog):
+    url = reverse("points:dashboard")
+    with caplog.at_level("INFO", logger="config.perf"):
+        with override_settings(PERF_LOG_SAMPLE_RATE=0.0, PERF_LOG_SLOW_MS=10_000):
+            parent_dashboard.get(url)
+        assert not _perf_lines(caplog)
+
+        with override_settings(PERF_LOG_SAMPLE_RATE=1.0):
+            parent_dashboard.get(url)
+    lines = _perf_lines(caplog)
+    assert len(lines) == 1
+    line = json.loads(lines[0].removeprefix("[PERF] "))
+    assert line["url_name"] == "points:dashboard"
+    assert line["status"] == 200
+    assert line["db_count"] > 0
+    assert line["tpl_ms"] > 0
+
+
+@pytest.mark.django_db
+def test_slow_requests_are_always_logged(client, caplog):
+    with caplog.at_level("INFO", logger="config.perf"):
+        with override_settings(PERF_LOG_SAMPLE_RATE=0.0, PERF_LOG_SLOW_MS=0):
+            client.get(reverse("famille:login"))
+    assert "famille:login" in _perf_lines(caplog)[0]
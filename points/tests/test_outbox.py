@@ -0,0 +1,109 @@
+import json
+import time
+from email.mime.text import MIMEText
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import override_settings
+
+from config.mail import Outbox, deliver, get_outbox
+
+ADMINS = [("Admin", "admin@example.test")]
+
+
+class CountingBackend(EmailBackend):
+    """locmem + nombre de connexions ouvertes."""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class BrokenBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise OSError("SMTP indisponible")
+
+
+@pytest.fixture
+def outbox_settings(tmp_path):
+    CountingBackend.opened = 0
+    with override_settings(
+        EMAIL_BACKEND="config.mail.OutboxBackend",
+        OUTBOX_BACKEND="points.tests.test_outbox.CountingBackend",
+        OUTBOX_DIR=str(tmp_path / "outbox"),
+        ADMINS=ADMINS,
+        MANAGERS=ADMINS,
+    ):
+        yield get_outbox()
+
+
+def test_sending_only_queues(outbox_settings):
+    assert mail.send_mail("Bienvenue", "Bonjour", None, ["parent@example.test"]) == 1
+    assert mail.outbox == []
+    assert outbox_settings.pending() == 1
+
+
+def test_attachments_survive_the_spool(outbox_settings, caplog):
+    message = mail.EmailMessage("Export", "Ci-joint", None, ["parent@example.test"])
+    message.attach("notes.txt", "é" * 3, "text/plain")
+    message.attach("export.zip", b"PK\x03\x04\xff", "application/zip")
+    message.attach(MIMEText("déjà MIME"))
+    message.send()
+    assert "pièce jointe MIME non transmise" in caplog.text
+
+    call_command("send_outbox", stdout=StringIO())
+    [envoye] = mail.outbox
+    assert [(a.filename, a.content) for a in envoye.attachments] == [
+        ("notes.txt", "ééé"),
+        ("export.zip", b"PK\x03\x04\xff"),
+    ]
+
+
+def test_worker_sends_batch_over_one_connection(outbox_settings):
+    for i in range(3):
+        mail.send_mail(f"Bienvenue {i}", "Bonjour", None, [f"parent{i}@example.test"])
+    call_command("send_outbox", batch=10, stdout=StringIO())
+
+    assert sorted(m.subject for m in mail.outbox) == ["Bienvenue 0", "Bienvenue 1", "Bienvenue 2"]
+    assert CountingBackend.opened == 1
+    assert outbox_settings.pending() == 0
+
+
+def test_identical_error_mails_are_grouped_then_rate_limited(outbox_settings):
+    for n in range(5):
+        mail.mail_admins(f"ERROR (EXTERNAL IP): Internal Server Error: /points/{n}/", "Traceback")
+    mail.send_mail("Bienvenue", "Bonjour", None, ["parent@example.test"])
+    connection = mail.get_connection("points.tests.test_outbox.CountingBackend")
+    now = time.time()
+
+    stats = deliver(outbox_settings, connection, window=600, now=now)
+    assert stats == {"sent": 2, "grouped": 4, "suppressed": 0, "failed": 0}
+    erreur = next(m for m in mail.outbox if "Internal Server Error" in m.subject)
+    assert "5 messages identiques regroupés" in erreur.body
+
+    # Même erreur dans la fenêtre : retenue ; après la fenêtre : envoyée, avec le compte
+    mail.mail_admins("ERROR (EXTERNAL IP): Internal Server Error: /points/9/", "Traceback")
+    assert deliver(outbox_settings, connection, window=600, now=now + 60)["suppressed"] == 1
+    mail.mail_admins("ERROR (EXTERNAL IP): Internal Server Error: /points/10/", "Traceback")
+    assert deliver(outbox_settings, connection, window=600, now=now + 700)["sent"] == 1
+    assert "1 message(s) identique(s) retenu(s)" in mail.outbox[-1].body
+    assert len(mail.outbox) == 3
+
+
+def test_failed_sends_are_retried_then_set_aside(outbox_settings):
+    outbox = Outbox(outbox_settings.root, max_attempts=2)
+    mail.send_mail("Bienvenue", "Bonjour", None, ["parent@example.test"])
+    broken = BrokenBackend()
+
+    assert deliver(outbox, broken)["failed"] == 1
+    (queued,) = (outbox.root / "new").iterdir()
+    assert json.loads(queued.read_text())["attempts"] == 1
+
+    deliver(outbox, broken)
+    assert outbox.pending() == 0
+    assert len(list((outbox.root / "failed").iterdir())) == 1
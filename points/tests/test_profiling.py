@@ -0,0 +1,76 @@
+import pstats
+
+import pytest
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from config.profiling import make_token
+
+
+@pytest.fixture
+def staff_client(parent_dashboard, parent_user, tmp_path):
+    parent_user.is_staff = True
+    parent_user.save(update_fields=["is_staff"])
+    with override_settings(PROFILING_DIR=str(tmp_path)):
+        yield parent_dashboard
+
+
+@pytest.mark.django_db
+def test_staff_profiles_a_request_and_downloads_the_dump(staff_client, enfant, tmp_path):
+    token = staff_client.get(reverse("profiling_token")).content.decode()
+
+    url = reverse("points:historique", args=[enfant.pk])
+    resp = staff_client.get(url, {"_profile": token})
+    assert resp.status_code == 200
+    dump_url = resp["X-Profile-URL"]
+
+    download = staff_client.get(dump_url)
+    assert download["Content-Disposition"].startswith("attachment")
+    dump = tmp_path / "dump.prof"
+    dump.write_bytes(b"".join(download.streaming_content))
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+    text = staff_client.get(dump_url, {"format": "txt"}).content.decode()
+    assert "historique_editable" in text
+
+
+@pytest.mark.django_db
+def test_profile_download_is_limited_to_its_owner(staff_client, enfant, parent_user, autre_parent_user):
+    resp = staff_client.get(reverse("points:dashboard"), HTTP_X_PROFILE=make_token(parent_user))
+    dump_url = resp["X-Profile-URL"]
+
+    autre_parent_user.is_staff = True
+    autre_parent_user.save(update_fields=["is_staff"])
+    client = Client()
+    client.force_login(autre_parent_user)
+    assert client.get(dump_url).status_code == 404
+    assert client.get(dump_url, {"format": "txt"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_profile_header_trigger(staff_client, enfant, parent_user):
+    resp = staff_client.get(
+        reverse("points:dashboard"), HTTP_X_PROFILE=make_token(parent_user)
+    )
+    assert "X-Profile-URL" in resp
+
+
+@pytest.mark.django_db
+def test_no_profile_without_valid_token(staff_client, enfant, autre_parent_user):
+    url = reverse("points:dashboard")
+    assert "X-Profile-URL" not in staff_client.get(url)
+    assert "X-Profile-URL" not in staff_client.get(url, {"_profile": "falsifié"})
+    # Jeton d'un autre compte
+    other = make_token(autre_parent_user)
+    assert "X-Profile-URL" not in staff_client.get(url, {"_profile": other})
+
+
+@pytest.mark.django_db
+def test_profiling_is_staff_only(parent_dashboard, parent_user, enfant, tmp_path):
+    with override_settings(PROFILING_DIR=str(tmp_path)):
+        assert parent_dashboard.get(reverse("profiling_token")).status_code == 403
+        resp = parent_dashboard.get(
+            reverse("points:dashboard"), {"_profile": make_token(parent_user)}
+        )
+    assert "X-Profile-URL" not in resp
+    assert not list(tmp_path.iterdir())
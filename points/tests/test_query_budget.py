@@ -0,0 +1,192 @@
+"""
+Budgets de requêtes SQL par vue : un plafond pour le cas simple et un
+plafond de requêtes *supplémentaires* par enfant / par ligne d'historique.
+Un N+1 introduit dans une vue ou un gabarit fait échouer ces tests.
+Pour ajuster un budget, mesurer avec count_queries (conftest.py).
+"""
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from famille.models import Enfant
+from points.models import BaremePointPositif, PointNegatif, PointPositif
+
+ISO = "%Y-%m-%d"
+
+
+def _add_enfants(famille, n):
+    return Enfant.objects.bulk_create(
+        [Enfant(prenom=f"Enfant {i}", famille=famille) for i in range(n)]
+    )
+
+
+def _add_history(enfant, n):
+    today = timezone.localdate()
+    PointPositif.objects.bulk_create(
+        [PointPositif(enfant=enfant, nb_positif=1, motif1=f"p{i}", date=today) for i in range(n)]
+    )
+    PointNegatif.objects.bulk_create(
+        [PointNegatif(enfant=enfant, nb_negatif=1, motif2=f"n{i}", date=today) for i in range(n)]
+    )
+
+
+def _historique_post_data(enfant, change=True):
+    """Toutes les lignes de l'historique, chacune modifiée (nb + 1)."""
+    data = {}
+    for prefix, model, nb, motif in (
+        ("pp", PointPositif, "nb_positif", "motif1"),
+        ("pn", PointNegatif, "nb_negatif", "motif2"),
+    ):
+        rows = list(model.objects.filter(enfant=enfant).order_by("-date", "-id"))
+        data.update(
+            {
+                f"{prefix}-TOTAL_FORMS": str(len(rows)),
+                f"{prefix}-INITIAL_FORMS": str(len(rows)),
+                f"{prefix}-MIN_NUM_FORMS": "0",
+                f"{prefix}-MAX_NUM_FORMS": "1000",
+            }
+        )
+        for i, row in enumerate(rows):
+            data.update(
+                {
+                    f"{prefix}-{i}-id": str(row.id),
+                    f"{prefix}-{i}-date": row.date.strftime(ISO),
+                    # Champ caché envoyé par le navigateur (défaut appelable du modèle)
+                    f"initial-{prefix}-{i}-date": row.date.strftime(ISO),
+                    f"{prefix}-{i}-{nb}": str(getattr(row, nb) + int(change)),
+                    f"{prefix}-{i}-{motif}": getattr(row, motif),
+                    f"{prefix}-{i}-DELETE": "",
+                }
+            )
+    return data
+
+
+@pytest.fixture
+def parent_points(parent_dashboard, parent_user, give_perms):
+    """Parent pouvant aussi ajouter des points et éditer les barèmes."""
+    give_perms(
+        parent_user,
+        [
+            "famille.view_enfant",
+            "points.add_pointpositif",
+            "points.add_pointnegatif",
+            "points.change_baremepointpositif",
+        ],
+    )
+    return parent_dashboard
+
+
+# -------------------------------------------------------------------
+# Tableau de bord
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_dashboard_query_budget(parent_points, famille, enfant, count_queries):
+    url = reverse("points:dashboard")
+    resp, one = count_queries(parent_points.get, url)
+    assert resp.status_code == 200
+    _add_enfants(famille, 4)
+    _, five = count_queries(parent_points.get, url)
+    # session, user, profil, famille, enfants, permissions (x2)
+    assert one <= 7
+    assert five == one  # aucune requête par enfant
+
+
+# -------------------------------------------------------------------
+# Barèmes
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_bareme_query_budget(parent_points, famille, count_queries):
+    url = reverse("points:bareme")
+    resp, first = count_queries(parent_points.get, url)  # crée les barèmes par défaut
+    assert resp.status_code == 200
+    _, again = count_queries(parent_points.get, url)
+    BaremePointPositif.objects.bulk_create(
+        [BaremePointPositif(famille=famille, motif=f"m{i}") for i in range(10)]
+    )
+    _, more = count_queries(parent_points.get, url)
+    assert first <= 17  # + création des barèmes par défaut
+    assert again <= 14
+    assert more == again  # aucune requête par ligne de barème
+
+
+@pytest.mark.django_db
+def test_update_cell_query_budget(parent_points, famille, count_queries):
+    row = BaremePointPositif.objects.create(famille=famille, motif="Ranger")
+    url = reverse("points:update_cell", args=["positif", row.pk, "motif"])
+    resp, get = count_queries(parent_points.get, url)
+    assert resp.status_code == 200
+    resp, post = count_queries(parent_points.post, url, {"value": "Ranger sa chambre"})
+    assert resp.status_code == 200
+    assert get <= 7
+    assert post <= 9
+
+
+# -------------------------------------------------------------------
+# Historique
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_historique_get_query_budget(parent_points, enfant, count_queries):
+    url = reverse("points:historique", args=[enfant.pk])
+    _add_history(enfant, 1)
+    resp, one = count_queries(parent_points.get, url)
+    assert resp.status_code == 200
+    _add_history(enfant, 10)
+    _, eleven = count_queries(parent_points.get, url)
+    assert one <= 10
+    assert eleven == one  # aucune requête par ligne d'historique
+
+
+# POST de l'historique : session, user, profil, enfant, permissions, lecture
+# des deux historiques (une requête chacun, ids compris), recalcul du solde…
+HISTORIQUE_POST_BASE = 14
+# Par ligne modifiée : UPDATE de la ligne, puis tampons de version de
+# l'enfant et de la famille (post_save). Une ligne inchangée ne coûte rien.
+HISTORIQUE_POST_PER_ROW = 3
+
+
+@pytest.mark.django_db
+def test_historique_post_query_budget(parent_points, enfant, count_queries):
+    url = reverse("points:historique", args=[enfant.pk])
+    _add_history(enfant, 1)
+    resp, one = count_queries(parent_points.post, url, _historique_post_data(enfant))
+    assert resp.status_code == 302
+    _add_history(enfant, 5)
+    _, six = count_queries(parent_points.post, url, _historique_post_data(enfant))
+    _, unchanged = count_queries(
+        parent_points.post, url, _historique_post_data(enfant, change=False)
+    )
+    # 1 puis 6 lignes positives et autant de négatives, toutes modifiées
+    assert one <= HISTORIQUE_POST_BASE + 2 * HISTORIQUE_POST_PER_ROW
+    assert six <= HISTORIQUE_POST_BASE + 12 * HISTORIQUE_POST_PER_ROW
+    assert unchanged <= HISTORIQUE_POST_BASE
+
+
+# -------------------------------------------------------------------
+# Suppression d'un enfant
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_enfant_delete_query_budget(famille, count_queries):
+    petit, grand = _add_enfants(famille, 2)
+    _add_history(petit, 1)
+    _add_history(grand, 200)
+    _, one = count_queries(petit.delete)
+    _, many = count_queries(grand.delete)
+    assert not PointPositif.objects.exists()
+    # Points supprimés par un DELETE par table, sans être chargés
+    assert one <= 6
+    assert many == one
+
+
+# -------------------------------------------------------------------
+# Nouveaux points
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_new_points_query_budget(parent_points, enfant, count_queries):
+    url = reverse("points:new_points", args=[enfant.pk])
+    resp, get = count_queries(parent_points.get, url)
+    assert resp.status_code == 200
+    data = {"nb_positif": "2", "motif1": "Aide", "nb_negatif": "1", "motif2": "Cris"}
+    resp, post = count_queries(parent_points.post, url, data)
+    assert resp.status_code == 302
+    assert get <= 7
+    assert post <= 16
@@ -0,0 +1,70 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+
+from famille.models import Enfant, Famille, UserProfile
+from points.models import BaremePointPositif, PointNegatif, PointPositif
+
+
+def _seed(**options):
+    call_command(
+        "seed_families",
+        familles=3,
+        enfants=2,
+        annees=0.2,
+        par_semaine=4,
+        batch_size=7,
+        stdout=StringIO(),
+        **options,
+    )
+
+
+def _snapshot():
+    return sorted(
+        PointPositif.objects.values_list("enfant__famille__nom", "enfant__prenom", "motif1", "nb_positif", "date")
+    )
+
+
+@pytest.mark.django_db
+def test_seed_creates_consistent_families():
+    _seed(comptes_enfants=True)
+
+    assert Famille.objects.count() == 3
+    assert UserProfile.objects.filter(role="parent").count() == 6
+    assert BaremePointPositif.objects.count() == 9
+    enfants = Enfant.objects.all()
+    assert len(enfants) == 6
+    assert all(e.user_id for e in enfants)
+    # 0.2 an × 52 semaines × 4 lignes = 41 lignes par enfant
+    assert PointPositif.objects.count() + PointNegatif.objects.count() == 6 * 41
+    for enfant in enfants:
+        positifs = enfant.pointpositif_set.aggregate(s=Sum("nb_positif"))["s"] or 0
+        negatifs = enfant.pointnegatif_set.aggregate(s=Sum("nb_negatif"))["s"] or 0
+        assert enfant.solde_points == positifs - negatifs
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic_and_refuses_existing_prefix():
+    _seed(seed=7)
+    first = _snapshot()
+    with pytest.raises(CommandError):
+        _seed(seed=7)
+
+    _seed(seed=7, prefix="autre")
+    second = [row for row in _snapshot() if "autre" in row[0]]
+    assert [row[1:] for row in second] == [row[1:] for row in first]
+
+
+@pytest.mark.django_db
+def test_seed_grants_perms_on_its_own_group_only():
+    parents = Group.objects.create(name="parents")
+    _seed()
+
+    assert not parents.permissions.exists()
+    profil = UserProfile.objects.filter(role="parent").select_related("user").first()
+    assert set(profil.user.groups.values_list("name", flat=True)) == {"parents", "seed-parents"}
+    assert profil.user.has_perm("points.view_pointpositif")
+    assert profil.user.has_perm("famille.change_enfant")
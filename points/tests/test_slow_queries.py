@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from config.slow_queries import normalize_sql, read_records, summarize
+
+
+def test_normalize_sql_groups_variants():
+    a = 'SELECT "x" FROM "t" WHERE "id" IN (%s, %s, %s) AND "nom" = \'Léa\' LIMIT 21'
+    b = 'SELECT  "x" FROM "t"\n WHERE "id" IN (%s) AND "nom" = \'Paul\' LIMIT 5'
+    assert normalize_sql(a) == 'SELECT "x" FROM "t" WHERE "id" IN (...) AND "nom" = ? LIMIT ?'
+    # Un seul %s n'est pas une liste, mais la forme reste stable d'une requête à l'autre
+    assert normalize_sql(b) == 'SELECT "x" FROM "t" WHERE "id" IN (?) AND "nom" = ? LIMIT ?'
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_logged_with_attribution(parent_dashboard, famille, enfant, caplog):
+    with override_settings(SLOW_QUERY_MS=0), caplog.at_level("WARNING", logger="config.slow_sql"):
+        parent_dashboard.get(reverse("points:historique", args=[enfant.pk]))
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "config.slow_sql"]
+    assert records
+    assert {r["url_name"] for r in records} == {"points:historique"}
+    assert {r["role"] for r in records} == {"parent"}
+    assert {r["famille_id"] for r in records} == {famille.pk}
+
+
+@pytest.mark.django_db
+def test_fast_queries_are_not_logged(parent_dashboard, enfant, caplog):
+    with override_settings(SLOW_QUERY_MS=60_000), caplog.at_level("WARNING", logger="config.slow_sql"):
+        parent_dashboard.get(reverse("points:dashboard"))
+    assert not [r for r in caplog.records if r.name == "config.slow_sql"]
+
+
+def _write_log(path, records):
+    path.write_text(
+        "".join(f"WARNING 2025-10-01 {json.dumps(r)}\n" for r in records), encoding="utf-8"
+    )
+
+
+def test_report_ranks_shapes_by_total_time(tmp_path, capsys):
+    log = tmp_path / "slow_sql.log"
+    lent = 'SELECT * FROM "points_pointpositif" WHERE "enfant_id" = %s'
+    _write_log(tmp_path / "slow_sql.log.1", [{"ms": 400, "sql": lent, "url_name": "points:historique", "famille_id": 7}])
+    _write_log(
+        log,
+        [
+            {"ms": 300, "sql": lent, "url_name": "points:historique", "famille_id": 9},
+            {"ms": 500, "sql": 'SELECT 1 FROM "famille_famille" LIMIT 1', "url_name": "points:dashboard"},
+        ],
+    )
+
+    rows = summarize(read_records(log))
+    assert [row["count"] for row in rows] == [2, 1]
+    assert rows[0]["total_ms"] == 700
+    assert rows[0]["familles"] == [7, 9]
+
+    call_command("slow_queries_report", str(log), top=1)
+    out = capsys.readouterr().out
+    assert out.startswith("1. 700 ms cumulés | 2 fois")
+    assert "points:historique" in out
+    assert "famille_famille" not in out
+
+
+@pytest.mark.parametrize("fichier", ["", "journal/slow_sql.log"])
+def test_production_settings_slow_query_log(tmp_path, fichier):
+    # Import dans un processus neuf : les réglages de production ne se rechargent pas
+    env = {
+        **os.environ,
+        "DJANGO_DATABASE_URL": "sqlite:///" + str(tmp_path / "db.sqlite3"),
+        "DJANGO_ADMIN_URL": "admin/",
+        "DJANGO_SECRET_KEY": "x",
+        "DJANGO_SLOW_QUERY_LOG": str(tmp_path / fichier) if fichier else "",
+    }
+    script = (
+        "import json; from config.settings import production as s; "
+        "print(json.dumps(s.LOGGING['loggers']['config.slow_sql']['handlers']))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert json.loads(out.splitlines()[-1]) == (["slow_sql"] if fichier else ["console"])
+    assert (tmp_path / "journal").is_dir() == bool(fichier)
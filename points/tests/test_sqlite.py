@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+from config.db.sqlite import sqlite_options
+
+
+@pytest.fixture
+def sqlite_file(tmp_path, django_db_blocker):
+    """Un alias "fichier" (le test utilise une base en mémoire, sans WAL)."""
+
+    def make(options):
+        handler = ConnectionHandler(
+            {
+                "default": connection.settings_dict,
+                "fichier": {
+                    **connection.settings_dict,
+                    "NAME": str(tmp_path / "tuned.sqlite3"),
+                    "OPTIONS": options,
+                    "TEST": {},
+                },
+            }
+        )
+        handlers.append(handler)
+        return handler["fichier"]
+
+    handlers = []
+    with django_db_blocker.unblock():
+        yield make
+        for handler in handlers:
+            handler.close_all()
+
+
+def _pragma(conn, name):
+    with conn.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_tuned_profile_applies_pragmas(sqlite_file):
+    conn = sqlite_file(sqlite_options("tuned", busy_timeout=7))
+    assert _pragma(conn, "journal_mode") == "wal"
+    assert _pragma(conn, "synchronous") == 1  # NORMAL
+    assert _pragma(conn, "cache_size") == -20000
+    assert _pragma(conn, "temp_store") == 2  # MEMORY
+    assert _pragma(conn, "busy_timeout") == 7000
+    assert conn.transaction_mode == "IMMEDIATE"
+
+
+def test_default_profile_keeps_django_defaults(sqlite_file):
+    conn = sqlite_file(sqlite_options("default"))
+    assert _pragma(conn, "journal_mode") == "delete"
+    assert conn.transaction_mode is None
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        sqlite_options("turbo")
+
+
+@pytest.mark.django_db
+def test_settings_use_tuned_profile_by_default():
+    options = connection.settings_dict["OPTIONS"]
+    assert options["transaction_mode"] == "IMMEDIATE"
+    assert "journal_mode=WAL" in options["init_command"]
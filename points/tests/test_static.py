@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from config.storage import minify_css, minify_js
+
+
+# -------------------------------------------------------------------
+# Minification
+# -------------------------------------------------------------------
+def test_minify_css_strips_comments_and_spaces():
+    src = """
+    /* commentaire */
+    .a , .b > .c {
+      color: red;
+      margin: 0 auto;
+    }
+    """
+    assert minify_css(src) == ".a,.b>.c{color:red;margin:0 auto}"
+
+
+def test_minify_css_keeps_license_comments():
+    assert minify_css("/*! licence */ a { b: c; }").startswith("/*! licence */")
+
+
+def test_minify_js_keeps_newlines_and_drops_comment_lines():
+    src = """
+    // commentaire
+    const a = 1;
+
+        foo(a); // fin de ligne conservée
+    """
+    assert minify_js(src) == "const a = 1;\nfoo(a); // fin de ligne conservée"
+
+
+# -------------------------------------------------------------------
+# Pipeline collectstatic (production)
+# -------------------------------------------------------------------
+def test_collectstatic_fingerprints_minifies_and_compresses(tmp_path):
+    storages = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "config.storage.MinifiedManifestStaticFilesStorage"
+        },
+    }
+    with override_settings(STATIC_ROOT=tmp_path, STORAGES=storages):
+        call_command(
+            "collectstatic",
+            interactive=False,
+            verbosity=0,
+            ignore_patterns=["admin", "debug_toolbar"],
+        )
+
+    manifest = json.loads((tmp_path / "staticfiles.json").read_text())["paths"]
+
+    hashed_js = manifest["points/js/script.js"]
+    assert hashed_js != "points/js/script.js"
+    assert (tmp_path / (hashed_js + ".gz")).exists()
+    minified = (tmp_path / hashed_js).read_text()
+    assert "    " not in minified
+
+    # Les polices d'icônes référencées par le CSS vendorisé sont empreintées aussi
+    icons_css = tmp_path / manifest["points/vendor/bootstrap-icons/bootstrap-icons.min.css"]
+    woff2 = manifest["points/vendor/bootstrap-icons/fonts/bootstrap-icons.woff2"]
+    assert woff2.split("/")[-1] in icons_css.read_text()
+
+    # L'image de fond du CSS pointe vers la version empreintée
+    style = (tmp_path / manifest["points/style.css"]).read_text()
+    assert manifest["points/images/vive-les-points.png"].split("/")[-1] in style
+
+
+@pytest.mark.django_db
+def test_base_template_has_no_third_party_css_or_js(client):
+    resp = client.get(reverse("famille:login"))
+    html = resp.content.decode()
+    assert "cdn.jsdelivr.net" not in html
+    assert "points/vendor/bootstrap/css/bootstrap.min.css" in html
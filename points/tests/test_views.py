@@ -259,6 +259,25 @@ def test_new_points_get_ok_for_my_child(client, userprofile_parent, parent_user,
     assert r.context["enfant"].pk == child.pk
 
 
+@pytest.mark.django_db
+def test_new_points_blank_forms_rendered_once_then_cached(client, userprofile_parent, parent_user, famille, give_perms):
+    lea = Enfant.objects.create(prenom="Léa", famille=famille)
+    tom = Enfant.objects.create(prenom="Tom", famille=famille)
+    give_perms(parent_user, ["famille.view_enfant", "points.add_pointpositif", "points.add_pointnegatif"])
+    client.force_login(parent_user)
+
+    first = client.get(reverse("points:new_points", args=[lea.pk]))
+    second = client.get(reverse("points:new_points", args=[tom.pk]))
+    crispy_templates = [t.name for t in second.templates if t.name.startswith("bootstrap5/")]
+    assert any(t.name.startswith("bootstrap5/") for t in first.templates)
+    assert crispy_templates == []
+    assert b'name="nb_positif"' in second.content
+
+    # POST invalide : formulaires liés, rendus à chaque fois (erreurs)
+    r = client.post(reverse("points:new_points", args=[tom.pk]), {"nb_positif": "abc"})
+    assert any(t.name.startswith("bootstrap5/") for t in r.templates)
+
+
 @pytest.mark.django_db
 def test_new_points_forbidden_on_foreign_child(client, userprofile_parent, parent_user, autre_famille, give_perms):
     # enfant d'une autre famille
@@ -371,3 +390,151 @@ def test_historique_post_updates_totals_and_solde(
     enfant.refresh_from_db()
     # total_pos = 5, total_neg = 2 => solde = 3
     assert enfant.solde_points == 3
+
+
+@pytest.mark.django_db
+def test_historique_post_refuses_other_child_row(client, userprofile_parent, parent_user, famille, enfant, give_perms):
+    autre = Enfant.objects.create(prenom="Tom", famille=famille)
+    p = PointPositif.objects.create(enfant=autre, nb_positif=1, motif1="A", date=timezone.localdate())
+    give_perms(parent_user, ["points.change_pointpositif", "points.change_pointnegatif"])
+    client.force_login(parent_user)
+
+    data = {
+        "pp-TOTAL_FORMS": "1",
+        "pp-INITIAL_FORMS": "1",
+        "pp-0-id": str(p.id),
+        "pp-0-date": timezone.localdate().strftime(ISO),
+        "pp-0-nb_positif": "9",
+        "pp-0-motif1": "A",
+        "pn-TOTAL_FORMS": "0",
+        "pn-INITIAL_FORMS": "0",
+    }
+    resp = client.post(reverse("points:historique", args=[enfant.pk]), data)
+    assert resp.status_code == 200  # formulaire réaffiché avec l'erreur
+    p.refresh_from_db()
+    assert p.nb_positif == 1
+
+
+# -------------------------------------------------------------------
+# GET conditionnels (ETag / Last-Modified)
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_dashboard_answers_304_when_nothing_changed(parent_dashboard, enfant):
+    url = reverse("points:dashboard")
+    r1 = parent_dashboard.get(url)
+    assert r1.status_code == 200
+    assert "no-cache" in r1["Cache-Control"]
+    etag = r1["ETag"]
+
+    r2 = parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r2.status_code == 304
+    assert r2.content == b""
+
+
+@pytest.mark.django_db
+def test_dashboard_304_check_is_cheap(parent_dashboard, enfant, django_assert_max_num_queries):
+    url = reverse("points:dashboard")
+    etag = parent_dashboard.get(url)["ETag"]
+    # session, user, permissions (x2), profil, famille (porte le tampon de version)
+    with django_assert_max_num_queries(6):
+        assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+
+@pytest.mark.django_db
+def test_dashboard_etag_changes_after_points_write(parent_dashboard, enfant):
+    url = reverse("points:dashboard")
+    etag = parent_dashboard.get(url)["ETag"]
+    PointPositif.objects.create(enfant=enfant, nb_positif=2)
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_pending_messages_disable_304(parent_dashboard, parent_user, enfant, give_perms):
+    give_perms(
+        parent_user,
+        ["famille.view_enfant", "points.add_pointpositif", "points.add_pointnegatif"],
+    )
+    url = reverse("points:dashboard")
+    etag = parent_dashboard.get(url)["ETag"]
+    # "Aucun point n'a été ajouté" : message flash sans écriture en base
+    parent_dashboard.post(
+        reverse("points:new_points", args=[enfant.pk]),
+        {"nb_positif": 0, "motif1": "", "nb_negatif": 0, "motif2": ""},
+    )
+    r = parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+
+
+@pytest.mark.django_db
+def test_historique_uses_child_version(parent_dashboard, famille, enfant):
+    autre = Enfant.objects.create(prenom="Tom", famille=famille)
+    url = reverse("points:historique", args=[enfant.pk])
+    etag = parent_dashboard.get(url)["ETag"]
+
+    # Un autre enfant de la famille change : l'historique de Léa reste valide
+    PointNegatif.objects.create(enfant=autre, nb_negatif=1)
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    PointNegatif.objects.create(enfant=enfant, nb_negatif=1)
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_bareme_etag_changes_after_bareme_write(parent_dashboard, famille):
+    url = reverse("points:bareme")
+    etag = parent_dashboard.get(url)["ETag"]
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    BaremePointPositif.objects.filter(famille=famille).first().delete()
+    assert parent_dashboard.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+# -------------------------------------------------------------------
+# Cache des fragments (cartes enfants, en-tête historique)
+# -------------------------------------------------------------------
+@pytest.mark.django_db
+def test_dashboard_card_cached_until_version_bump(parent_dashboard, enfant):
+    url = reverse("points:dashboard")
+    assert parent_dashboard.get(url).context["enfants_list"][0].solde_points == 0
+
+    # Écriture hors du chemin central (pas de bump) : le fragment reste en cache
+    Enfant.objects.filter(pk=enfant.pk).update(solde_points=42)
+    assert b"42" not in parent_dashboard.get(url).content
+
+    # Chemin central : save() -> bump_versions() -> nouvelle clé de cache
+    enfant.refresh_from_db()
+    enfant.solde_points = 43
+    enfant.save(update_fields=["solde_points"])
+    assert b"43" in parent_dashboard.get(url).content
+
+
+@pytest.mark.django_db
+def test_dashboard_card_cache_depends_on_permissions(client, famille, enfant, give_perms):
+    from django.contrib.auth import get_user_model
+    from famille.models import UserProfile
+
+    User = get_user_model()
+    enfant_user = User.objects.create_user(username="e", email="e@example.com", password="pwd")
+    UserProfile.objects.create(user=enfant_user, famille=famille, role="enfant")
+    parent = User.objects.create_user(username="p", email="p@example.com", password="pwd")
+    UserProfile.objects.create(user=parent, famille=famille, role="parent")
+    vues = ["points.view_pointpositif", "points.view_pointnegatif"]
+    give_perms(enfant_user, vues)
+    give_perms(parent, vues + ["points.add_pointpositif"])
+    new_points_url = reverse("points:new_points", args=[enfant.pk]).encode()
+
+    client.force_login(parent)
+    assert new_points_url in client.get(reverse("points:dashboard")).content
+    client.force_login(enfant_user)
+    assert new_points_url not in client.get(reverse("points:dashboard")).content
+
+
+@pytest.mark.django_db
+def test_historique_header_refreshed_after_points(parent_dashboard, enfant):
+    url = reverse("points:historique", args=[enfant.pk])
+    assert "Tu as 0 points." in parent_dashboard.get(url).content.decode()
+    PointPositif.objects.create(enfant=enfant, nb_positif=3)
+    enfant.refresh_from_db()
+    enfant.solde_points = 3
+    enfant.save(update_fields=["solde_points"])
+    assert "Tu as 3 points." in parent_dashboard.get(url).content.decode()
@@ -1,6 +1,16 @@
 from django.urls import path
 
-from .views import bareme_view, delete_row, update_cell, DashboardView, historique_editable, new_points_view, add_row
+from .views import (
+    bareme_view,
+    delete_row,
+    update_cell,
+    DashboardView,
+    historique_editable,
+    new_points_view,
+    add_row,
+    live_soldes,
+    soldes_view,
+)
 
 app_name = "points"
 
@@ -10,6 +20,8 @@ urlpatterns = [
     path("delete/<str:model_name>/<int:pk>/", delete_row, name="delete_row"),
     path("add/<str:model_name>/", add_row, name="add_row"),
     path("", DashboardView.as_view(), name="dashboard"),
+    path("soldes/", soldes_view, name="soldes"),
+    path("soldes/direct/", live_soldes, name="live"),
     path("<int:pk>/", historique_editable, name="historique"),
     path("new_points/<int:pk>/", new_points_view, name="new_points"),
 ]
@@ -1,6 +1,18 @@
 # points/views.py
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponseBadRequest, HttpResponseForbidden, HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render, redirect
 from django.views.generic import View, ListView
 from django.contrib import messages
@@ -8,18 +20,24 @@ from django.contrib.auth.mixins import (
     LoginRequiredMixin,
     PermissionRequiredMixin,
 )
-from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 from django.db import transaction
 # from django.contrib.auth.decorators import permission_required as permission_required_decorator
-from django.db.models import Sum
+from django.db.models import F
 from .models import (
     BaremeRecompense,
     BaremePointPositif,
     BaremePointNegatif,
     PointNegatif,
     PointPositif,
+    recalculer_solde,
 )
+from . import live
 from famille.models import Enfant
 from famille.mixins import EnfantFamilleMixin, get_user_famille
 from .forms import (
@@ -39,7 +57,64 @@ def _get_user_famille(request):
     return getattr(profile, "famille", None)
 
 
+# ---------- GET conditionnels (ETag / Last-Modified) ----------
+def _version_stamp(request, pk=None):
+    """
+    (version, maj_le) de la famille, ou de l'enfant `pk` de la famille,
+    mémorisé sur la requête (l'ETag et le Last-Modified l'utilisent tous les
+    deux). La Famille est celle que la vue chargera de toute façon
+    (user.profile.famille, mise en cache par Django) : pour le tableau de bord
+    et les barèmes, aucune requête supplémentaire ; pour l'historique, une
+    lecture de l'enfant par clé primaire.
+    None => pas de réponse 304 possible (POST, messages en attente, pas de famille).
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if not hasattr(request, "_version_stamp"):
+        stamp = None
+        famille = get_user_famille(request)
+        # Des messages flash à afficher => il faut rendre la page
+        if famille is not None and not len(get_messages(request)):
+            if pk is None:
+                stamp = (famille.version, famille.maj_le)
+            else:
+                stamp = (
+                    Enfant.objects.filter(pk=pk, famille_id=famille.id)
+                    .values_list("version", "maj_le")
+                    .first()
+                )
+        request._version_stamp = stamp
+    return request._version_stamp
+
+
+def _version_etag(request, pk=None, **kwargs):
+    stamp = _version_stamp(request, pk)
+    if stamp is None:
+        return None
+    user = request.user
+    get_token(request)  # initialise le secret CSRF si le cookie manque encore
+    # La page dépend aussi de l'utilisateur, de ses permissions, du jeton CSRF
+    # (formulaires) et de la version déployée.
+    key = "|".join(
+        [
+            str(stamp[0]),
+            str(user.pk),
+            ",".join(sorted(user.get_all_permissions())),
+            request.META.get("CSRF_COOKIE", ""),
+            settings.RELEASE,
+        ]
+    )
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _version_last_modified(request, pk=None, **kwargs):
+    stamp = _version_stamp(request, pk)
+    return stamp[1] if stamp else None
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_version_etag, last_modified_func=_version_last_modified)
 def bareme_view(request):
     famille = _get_user_famille(request)
     if not famille:
@@ -212,6 +287,19 @@ def add_row(request, model_name):
     )
 
 
+DASHBOARD_PERMISSIONS = (
+    "points.view_pointpositif",
+    "points.view_pointnegatif",
+)
+
+
+@method_decorator(
+    [
+        cache_control(private=True, no_cache=True),
+        condition(etag_func=_version_etag, last_modified_func=_version_last_modified),
+    ],
+    name="get",
+)
 class DashboardView(
     LoginRequiredMixin, PermissionRequiredMixin, EnfantFamilleMixin, ListView
 ):
@@ -223,10 +311,54 @@ class DashboardView(
     template_name = "points/index.html"
     context_object_name = "enfants_list"
     model = Enfant  # super().get_queryset() => Enfant.objects.all(), puis filtré par le mixin
-    permission_required = (
-        "points.view_pointpositif",
-        "points.view_pointnegatif",
-    )
+    permission_required = DASHBOARD_PERMISSIONS
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Soldes en direct (points/live.py) : flux SSE sous ASGI, sinon
+        # interrogation périodique de points:soldes
+        famille = get_user_famille(self.request)
+        context["live"] = {
+            "version": famille.version if famille else "",
+            "sse": settings.LIVE_SSE,
+            "intervalle": settings.LIVE_POLL_INTERVAL,
+        }
+        return context
+
+
+def _famille_live(request):
+    """id de la famille dont `request` peut suivre les soldes (ou None)."""
+    user = request.user
+    if not user.is_authenticated or not user.has_perms(DASHBOARD_PERMISSIONS):
+        return None
+    famille = get_user_famille(request)
+    return famille.pk if famille else None
+
+
+async def live_soldes(request):
+    """Flux SSE des soldes de MA famille (voir points/live.py)."""
+    if not settings.LIVE_SSE or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)  # WSGI : la page interroge points:soldes
+    famille_id = await sync_to_async(_famille_live)(request)
+    if famille_id is None:
+        return HttpResponseForbidden()
+    canal = await live.diffuseur.abonner(famille_id)
+    response = StreamingHttpResponse(live.flux(canal), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # pas de mise en tampon par nginx
+    return response
+
+
+@login_required
+@permission_required(DASHBOARD_PERMISSIONS, raise_exception=True)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_version_etag, last_modified_func=_version_last_modified)
+def soldes_view(request):
+    """Soldes de MA famille en JSON (interrogation périodique, 304 si inchangés)."""
+    famille = get_user_famille(request)
+    if famille is None:
+        raise Http404
+    return JsonResponse(live.etat(famille.pk))
 
 
 class NewPointsView(LoginRequiredMixin, PermissionRequiredMixin, View):
@@ -281,22 +413,27 @@ class NewPointsView(LoginRequiredMixin, PermissionRequiredMixin, View):
             point_negatif = point_negatif_form.save(commit=False)
             point_negatif.enfant_id = enfant.id
 
-            # Enregistre seulement s'il y a un nombre > 0
-            saved_any = False
-            if getattr(point_positif, "nb_positif", 0) > 0:
-                point_positif.save()
-                saved_any = True
-            if getattr(point_negatif, "nb_negatif", 0) > 0:
-                point_negatif.save()
-                saved_any = True
-
-            # Mets à jour le solde une seule fois (delta)
-            delta = getattr(point_positif, "nb_positif", 0) - getattr(
-                point_negatif, "nb_negatif", 0
-            )
-            if delta != 0:
-                enfant.solde_points = (enfant.solde_points or 0) + delta
-                enfant.save(update_fields=["solde_points"])
+            # Mouvements et solde dans la même transaction : un lecteur
+            # concurrent ne voit jamais l'un sans l'autre
+            with transaction.atomic():
+                # Enregistre seulement s'il y a un nombre > 0
+                saved_any = False
+                if getattr(point_positif, "nb_positif", 0) > 0:
+                    point_positif.save()
+                    saved_any = True
+                if getattr(point_negatif, "nb_negatif", 0) > 0:
+                    point_negatif.save()
+                    saved_any = True
+
+                # Mets à jour le solde une seule fois (delta), côté base :
+                # solde = solde + delta, sans écraser une écriture concurrente
+                delta = getattr(point_positif, "nb_positif", 0) - getattr(
+                    point_negatif, "nb_negatif", 0
+                )
+                if delta != 0:
+                    Enfant.objects.filter(pk=enfant.pk).update(
+                        solde_points=F("solde_points") + delta
+                    )
 
             if saved_any:
                 messages.success(
@@ -321,6 +458,8 @@ new_points_view = NewPointsView.as_view()
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_version_etag, last_modified_func=_version_last_modified)
 def historique_editable(request, pk):
     """
     Vue pour éditer l'historique des points d'un enfant.
@@ -345,18 +484,10 @@ def historique_editable(request, pk):
         pos_fs = PointPositifFormSet(request.POST, prefix="pp", queryset=qs_pos)
         neg_fs = PointNegatifFormSet(request.POST, prefix="pn", queryset=qs_neg)
         if pos_fs.is_valid() and neg_fs.is_valid():
-            pos_fs.save()
-            neg_fs.save()
-
-            # Recalcul du solde
-            total_pos = (
-                PointPositif.objects.filter(enfant=enfant).aggregate(total=Sum("nb_positif"))["total"] or 0
-            )
-            total_neg = (
-                PointNegatif.objects.filter(enfant=enfant).aggregate(total=Sum("nb_negatif"))["total"] or 0
-            )
-            enfant.solde_points = total_pos - total_neg
-            enfant.save(update_fields=["solde_points"])
+            with transaction.atomic():
+                pos_fs.save()
+                neg_fs.save()
+                recalculer_solde(enfant.pk)
 
             messages.success(request, "Modifications enregistrées ✅")
             return redirect("points:historique", pk=enfant.id)
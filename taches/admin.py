@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Tache
+
+
+class TacheAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nom', 'statut', 'priorite', 'tentatives', 'cree_le', 'fin_le')
+    list_filter = ('statut', 'nom')
+    readonly_fields = ('cree_le', 'debut_le', 'fin_le', 'travailleur', 'progression')
+
+
+admin.site.register(Tache, TacheAdmin)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class TachesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taches'
+    verbose_name = "Tâches de fond"
+
+    def ready(self):
+        # Enregistre les tâches déclarées dans <app>/taches.py (décorateur @tache)
+        from django.utils.module_loading import autodiscover_modules
+
+        autodiscover_modules("taches")
@@ -0,0 +1,49 @@
+# taches/management/commands/run_taches.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from taches.queue import executer, liberer_bloquees, purger, reserver, worker_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute les tâches de fond en file (priorité décroissante). Par défaut, "
+        "vide la file puis s'arrête (cron chaque minute) ; --loop pour tourner "
+        "en continu. Plusieurs travailleurs peuvent tourner en parallèle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu")
+        parser.add_argument("--sleep", type=float, default=2, help="Pause quand la file est vide (--loop)")
+        parser.add_argument("--max-taches", type=int, default=0, help="S'arrête après N tâches (0 : illimité)")
+        parser.add_argument(
+            "--max-secondes", type=float, default=50, help="Sans --loop : durée max d'un passage (cron)"
+        )
+        parser.add_argument("--purge-jours", type=int, default=7, help="Supprime les tâches finies depuis N jours")
+
+    def handle(self, *args, **options):
+        me = worker_id()
+        start = time.monotonic()
+        done = 0
+        liberer_bloquees()
+        purger(timedelta(days=options["purge_jours"]))
+
+        while True:
+            close_old_connections()
+            tache = reserver(me)
+            if tache is None:
+                if not options["loop"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            statut = executer(tache)
+            done += 1
+            self.stdout.write(f"{tache.nom} #{tache.pk} : {statut}")
+            if options["max_taches"] and done >= options["max_taches"]:
+                break
+            if not options["loop"] and time.monotonic() - start > options["max_secondes"]:
+                break
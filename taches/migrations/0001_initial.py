@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=200)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('priorite', models.SmallIntegerField(default=0)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('max_tentatives', models.PositiveSmallIntegerField(default=3)),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resultat', models.JSONField(blank=True, null=True)),
+                ('erreur', models.TextField(blank=True)),
+                ('travailleur', models.CharField(blank=True, max_length=100)),
+                ('cree_le', models.DateTimeField(auto_now_add=True)),
+                ('debut_le', models.DateTimeField(blank=True, null=True)),
+                ('fin_le', models.DateTimeField(blank=True, null=True)),
+                ('demandeur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['statut', '-priorite', 'executer_apres'], name='tache_a_reserver')],
+            },
+        ),
+    ]
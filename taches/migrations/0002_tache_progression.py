@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='progression',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0002_tache_progression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='expire_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
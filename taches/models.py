@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Tache(models.Model):
+    """
+    Travail de fond stocké en base (pas de broker) : exécuté par
+    "manage.py run_taches". Voir taches.queue.
+    """
+
+    class Statut(models.TextChoices):
+        EN_ATTENTE = "en_attente", "En attente"
+        EN_COURS = "en_cours", "En cours"
+        TERMINEE = "terminee", "Terminée"
+        ECHOUEE = "echouee", "Échouée"
+
+    # Priorités usuelles : la plus grande passe en premier
+    PRIORITE_HAUTE = 10
+    PRIORITE_NORMALE = 0
+    PRIORITE_BASSE = -10
+
+    nom = models.CharField(max_length=200)
+    params = models.JSONField(default=dict, blank=True)
+    priorite = models.SmallIntegerField(default=PRIORITE_NORMALE)
+    statut = models.CharField(max_length=20, choices=Statut.choices, default=Statut.EN_ATTENTE)
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    max_tentatives = models.PositiveSmallIntegerField(default=3)
+    executer_apres = models.DateTimeField(default=timezone.now)
+    resultat = models.JSONField(null=True, blank=True)
+    # Avancement publié par la tâche elle-même (taches.queue.progresser)
+    progression = models.JSONField(null=True, blank=True)
+    erreur = models.TextField(blank=True)
+    demandeur = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    travailleur = models.CharField(max_length=100, blank=True)
+    # Bail du travailleur, renouvelé pendant l'exécution (taches.queue)
+    expire_le = models.DateTimeField(null=True, blank=True)
+    cree_le = models.DateTimeField(auto_now_add=True)
+    debut_le = models.DateTimeField(null=True, blank=True)
+    fin_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Réservation : WHERE statut = 'en_attente' ORDER BY priorite DESC, executer_apres
+            models.Index(fields=["statut", "-priorite", "executer_apres"], name="tache_a_reserver"),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} #{self.pk} ({self.statut})"
+
+    @property
+    def terminee(self):
+        return self.statut in (self.Statut.TERMINEE, self.Statut.ECHOUEE)
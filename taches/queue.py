@@ -0,0 +1,219 @@
+# taches/queue.py
+"""
+File de tâches en base, sans broker.
+
+Déclarer une tâche (dans <app>/taches.py, importé au démarrage) :
+
+    @tache
+    def supprimer_famille(famille_id): ...
+
+La confier au travailleur depuis une vue (dans la transaction de la vue :
+la tâche n'existe que si la vue aboutit) :
+
+    t = enqueue(supprimer_famille, famille_id=f.pk, demandeur=request.user)
+
+puis suivre t sur /taches/<pk>/ (JSON) ; une tâche longue y publie son
+avancement avec progresser(fait=..., total=...). "manage.py run_taches" réserve les
+tâches par priorité décroissante puis date, avec SELECT ... FOR UPDATE SKIP
+LOCKED quand la base le permet (MySQL 8, MariaDB 10.6) : plusieurs
+travailleurs ne se bloquent pas. Ailleurs (SQLite), les transactions
+IMMEDIATE sérialisent déjà les réservations. Une tâche en échec est
+réessayée avec un délai croissant, jusqu'à max_tentatives.
+
+Une tâche réservée porte un bail (expire_le, TACHES_BAIL secondes) que le
+travailleur renouvelle pendant l'exécution, par un battement de fond et à
+chaque progresser() : seule une tâche dont le bail a expiré (travailleur
+tué par Passenger, machine arrêtée) est remise en file, quelle que soit
+la durée de celles qui tournent encore.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tache
+
+logger = logging.getLogger(__name__)
+
+_REGISTRE = {}
+_courante = threading.local()
+
+
+class TacheInconnue(LookupError):
+    pass
+
+
+def tache(func=None, *, nom=None):
+    """Enregistre une fonction comme tâche (nom par défaut : module.fonction)."""
+
+    def register(f):
+        f.nom_tache = nom or f"{f.__module__}.{f.__qualname__}"
+        _REGISTRE[f.nom_tache] = f
+        return f
+
+    return register(func) if func is not None else register
+
+
+def enqueue(
+    func,
+    *,
+    priorite=Tache.PRIORITE_NORMALE,
+    max_tentatives=3,
+    demandeur=None,
+    delai=None,
+    **params,
+):
+    """Met une tâche en file ; `params` doivent être sérialisables en JSON."""
+    nom = getattr(func, "nom_tache", func)
+    if nom not in _REGISTRE:
+        raise TacheInconnue(nom)
+    return Tache.objects.create(
+        nom=nom,
+        params=params,
+        priorite=priorite,
+        max_tentatives=max_tentatives,
+        demandeur=demandeur if demandeur is None or demandeur.is_authenticated else None,
+        executer_apres=timezone.now() + (delai or timedelta()),
+    )
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def reserver(travailleur=None, pk=None):
+    """Réserve la prochaine tâche exécutable, ou la tâche `pk` (ou None)."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = Tache.objects.filter(statut=Tache.Statut.EN_ATTENTE, executer_apres__lte=now).order_by(
+            "-priorite", "executer_apres", "id"
+        )
+        if pk is not None:
+            qs = qs.filter(pk=pk)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        tache = qs.first()
+        if tache is None:
+            return None
+        # Garde-fou sans verrou de ligne : seul le premier UPDATE gagne
+        pris = Tache.objects.filter(pk=tache.pk, statut=Tache.Statut.EN_ATTENTE).update(
+            statut=Tache.Statut.EN_COURS,
+            travailleur=travailleur or worker_id(),
+            debut_le=now,
+            expire_le=now + _bail(),
+            tentatives=F("tentatives") + 1,
+        )
+    if not pris:
+        return None
+    tache.refresh_from_db()
+    return tache
+
+
+def _bail():
+    return timedelta(seconds=settings.TACHES_BAIL)
+
+
+def _renouveler_bail(pk, **fields):
+    """Prolonge le bail de la tâche `pk`, si elle est toujours en cours."""
+    Tache.objects.filter(pk=pk, statut=Tache.Statut.EN_COURS).update(
+        expire_le=timezone.now() + _bail(), **fields
+    )
+
+
+class _Battement(threading.Thread):
+    """Renouvelle le bail d'une tâche pendant son exécution (tiers du bail)."""
+
+    def __init__(self, pk):
+        super().__init__(name=f"tache-{pk}-bail", daemon=True)
+        self.pk = pk
+        self.arret = threading.Event()
+
+    def run(self):
+        try:
+            while not self.arret.wait(settings.TACHES_BAIL / 3):
+                try:
+                    _renouveler_bail(self.pk)
+                except Exception:
+                    logger.exception("[TACHES] bail de #%s non renouvelé", self.pk)
+        finally:
+            connection.close()  # connexion propre à ce thread
+
+    def arreter(self):
+        self.arret.set()
+        self.join()
+
+
+def _delai_avant_nouvel_essai(tentatives):
+    base = getattr(settings, "TACHES_RETRY_DELAY", 30)
+    return timedelta(seconds=min(base * 2 ** (tentatives - 1), 3600))
+
+
+def progresser(**etat):
+    """
+    Publie l'avancement de la tâche en cours d'exécution (Tache.progression,
+    visible sur /taches/<pk>/) et prolonge son bail. Sans effet hors du
+    travailleur : une même fonction peut être appelée directement depuis une vue.
+    """
+    pk = getattr(_courante, "pk", None)
+    if pk is not None:
+        _renouveler_bail(pk, progression=etat)
+
+
+def executer(tache):
+    """Exécute une tâche réservée et enregistre son issue. Renvoie le statut."""
+    try:
+        func = _REGISTRE[tache.nom]
+    except KeyError:
+        func = None
+    _courante.pk = tache.pk
+    battement = _Battement(tache.pk)
+    battement.start()
+    try:
+        if func is None:
+            raise TacheInconnue(tache.nom)
+        resultat = func(**tache.params)
+    except Exception:
+        erreur = traceback.format_exc()
+        logger.warning("[TACHES] %s #%s en échec (essai %s)", tache.nom, tache.pk, tache.tentatives)
+        if func is not None and tache.tentatives < tache.max_tentatives:
+            statut = Tache.Statut.EN_ATTENTE
+            fields = {"executer_apres": timezone.now() + _delai_avant_nouvel_essai(tache.tentatives)}
+        else:
+            statut = Tache.Statut.ECHOUEE
+            fields = {"fin_le": timezone.now()}
+        Tache.objects.filter(pk=tache.pk).update(statut=statut, erreur=erreur, **fields)
+        return statut
+    finally:
+        battement.arreter()
+        _courante.pk = None
+
+    Tache.objects.filter(pk=tache.pk).update(
+        statut=Tache.Statut.TERMINEE, resultat=resultat, erreur="", fin_le=timezone.now()
+    )
+    return Tache.Statut.TERMINEE
+
+
+def liberer_bloquees():
+    """Remet en file les tâches "en cours" dont le bail a expiré (travailleur mort)."""
+    now = timezone.now()
+    return (
+        Tache.objects.filter(statut=Tache.Statut.EN_COURS)
+        # Sans bail : réservée avant la migration 0003, comptée depuis son début
+        .filter(Q(expire_le__lt=now) | Q(expire_le__isnull=True, debut_le__lt=now - _bail()))
+        .update(statut=Tache.Statut.EN_ATTENTE, travailleur="", expire_le=None)
+    )
+
+
+def purger(apres=timedelta(days=7)):
+    """Supprime les tâches terminées depuis plus de `apres`."""
+    deleted, _ = Tache.objects.filter(
+        statut__in=(Tache.Statut.TERMINEE, Tache.Statut.ECHOUEE), fin_le__lt=timezone.now() - apres
+    ).delete()
+    return deleted
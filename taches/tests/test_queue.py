@@ -0,0 +1,147 @@
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from taches.models import Tache
+from taches.queue import TacheInconnue, enqueue, executer, liberer_bloquees, progresser, reserver, tache
+
+APPELS = []
+
+
+@tache
+def addition(a, b):
+    APPELS.append((a, b))
+    return a + b
+
+
+@tache(nom="tests.toujours_en_echec")
+def toujours_en_echec():
+    raise RuntimeError("boum")
+
+
+@pytest.fixture(autouse=True)
+def reset_appels():
+    APPELS.clear()
+
+
+@pytest.mark.django_db
+def test_claims_by_priority_then_age():
+    basse = enqueue(addition, a=1, b=1, priorite=Tache.PRIORITE_BASSE)
+    normale = enqueue(addition, a=2, b=2)
+    haute = enqueue(addition, a=3, b=3, priorite=Tache.PRIORITE_HAUTE)
+    plus_tard = enqueue(addition, a=4, b=4, priorite=Tache.PRIORITE_HAUTE, delai=timedelta(hours=1))
+
+    ordre = [reserver().pk for _ in range(3)]
+    assert ordre == [haute.pk, normale.pk, basse.pk]
+    assert reserver() is None  # plus_tard n'est pas encore exécutable
+    plus_tard.refresh_from_db()
+    assert plus_tard.statut == Tache.Statut.EN_ATTENTE
+
+
+@pytest.mark.django_db
+def test_success_stores_result():
+    t = enqueue(addition, a=2, b=3)
+    reservee = reserver("test")
+    assert reservee.statut == Tache.Statut.EN_COURS
+    assert reservee.tentatives == 1
+
+    assert executer(reservee) == Tache.Statut.TERMINEE
+    t.refresh_from_db()
+    assert (t.statut, t.resultat, t.travailleur) == (Tache.Statut.TERMINEE, 5, "test")
+    assert t.fin_le is not None
+
+
+@pytest.mark.django_db
+def test_failures_are_retried_with_backoff_then_fail(settings):
+    settings.TACHES_RETRY_DELAY = 10
+    t = enqueue(toujours_en_echec, max_tentatives=2)
+
+    assert executer(reserver()) == Tache.Statut.EN_ATTENTE
+    t.refresh_from_db()
+    assert "boum" in t.erreur
+    assert t.executer_apres > timezone.now() + timedelta(seconds=5)
+    assert reserver() is None  # pas avant le délai
+
+    Tache.objects.filter(pk=t.pk).update(executer_apres=timezone.now())
+    assert executer(reserver()) == Tache.Statut.ECHOUEE
+    t.refresh_from_db()
+    assert t.tentatives == 2
+
+
+@pytest.mark.django_db
+def test_unknown_task_is_rejected_and_stale_tasks_are_released():
+    with pytest.raises(TacheInconnue):
+        enqueue("nexiste.pas")
+
+    t = enqueue(addition, a=1, b=2)
+    reserver()
+    # En cours depuis une heure, mais bail valide : le travailleur est vivant
+    Tache.objects.filter(pk=t.pk).update(debut_le=timezone.now() - timedelta(hours=1))
+    assert liberer_bloquees() == 0
+    Tache.objects.filter(pk=t.pk).update(expire_le=timezone.now() - timedelta(seconds=1))
+    assert liberer_bloquees() == 1
+    assert reserver().pk == t.pk
+
+
+@tache(nom="tests.longue")
+def longue(duree):
+    time.sleep(duree)
+    progresser(fait=1, total=1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_running_task_lease_is_renewed(settings):
+    settings.TACHES_BAIL = 0.3  # battement toutes les 0,1 s
+    t = enqueue(longue, duree=0.5)
+    reservee = reserver()
+    assert reservee.expire_le > reservee.debut_le
+    # Relève d'un autre travailleur à 0,4 s : sans renouvellement, le bail
+    # aurait expiré pendant l'exécution
+    releve = []
+
+    def relever():
+        releve.append(liberer_bloquees())
+        connection.close()
+
+    controle = threading.Timer(0.4, relever)
+    controle.start()
+    assert executer(reservee) == Tache.Statut.TERMINEE
+    controle.join()
+    assert releve == [0]
+    t.refresh_from_db()
+    assert t.tentatives == 1 and t.progression == {"fait": 1, "total": 1}
+
+
+@pytest.mark.django_db
+def test_worker_command_drains_queue():
+    for i in range(3):
+        enqueue(addition, a=i, b=i)
+    call_command("run_taches", stdout=StringIO())
+
+    assert sorted(APPELS) == [(0, 0), (1, 1), (2, 2)]
+    assert not Tache.objects.exclude(statut=Tache.Statut.TERMINEE).exists()
+
+
+@pytest.mark.django_db
+def test_status_polling_is_limited_to_requester(client, parent_user, autre_parent_user):
+    t = enqueue(addition, a=1, b=2, demandeur=parent_user)
+    url = reverse("taches:statut", args=[t.pk])
+
+    client.force_login(autre_parent_user)
+    assert client.get(url).status_code == 404
+
+    client.force_login(parent_user)
+    data = client.get(url).json()
+    assert (data["statut"], data["terminee"]) == ("en_attente", False)
+
+    executer(reserver())
+    data = client.get(url).json()
+    assert (data["statut"], data["terminee"], data["resultat"]) == ("terminee", True, 3)
+    assert "erreur" not in data
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import statut_tache
+
+app_name = "taches"
+
+urlpatterns = [
+    path("<int:pk>/", statut_tache, name="statut"),
+]
@@ -0,0 +1,33 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import never_cache
+
+from .models import Tache
+
+
+@login_required
+@never_cache
+def statut_tache(request, pk):
+    """
+    Suivi d'une tâche (interrogé en JavaScript) : réservé à celui qui l'a
+    demandée, ou au staff. 404 sinon, pour ne rien révéler.
+    """
+    try:
+        tache = Tache.objects.get(pk=pk)
+    except Tache.DoesNotExist:
+        raise Http404
+    if not request.user.is_staff and tache.demandeur_id != request.user.pk:
+        raise Http404
+
+    data = {
+        "id": tache.pk,
+        "nom": tache.nom,
+        "statut": tache.statut,
+        "terminee": tache.terminee,
+        "tentatives": tache.tentatives,
+        "progression": tache.progression,
+        "resultat": tache.resultat,
+    }
+    if request.user.is_staff:
+        data["erreur"] = tache.erreur
+    return JsonResponse(data)